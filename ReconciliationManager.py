@@ -3,30 +3,190 @@ A class to reconcile the two files (ServiceNow customer records and Monitoring o
 organizations. The method prepare_reconciliation_tasks returns the reconciliation tasks prepared whit the method write_json_output produces the prepared tasks to a JSON file.
 """
 
-import json
+import logging
 
 from collections import defaultdict
+from codec_backends import get_codec_for_path, load_records
+from diagnostics import DELETE_MESSAGE, UPDATE_MESSAGE, RecordDiagnostics
+from field_mappings import (  # NOQA: F401
+    FIELD_MAPPINGS,
+    MONIT_ORG_CHANGE_HINT_FIELD,
+    MONIT_ORG_FIELDS,
+    MONIT_ORG_PROJECTION,
+    SNOW_CUST_CHANGE_HINT_FIELD,
+    SNOW_CUST_FIELDS,
+    SNOW_CUST_PROJECTION,
+)
 from logger_decorator import log_time
+from metrics import MetricsCollector
+from mapped_record import (
+    MappedRecord,
+    get_mapped_record_dict,
+    get_mapped_record_values,
+    paused_gc,
+)
+from record_loader import iter_json_file, project_record
+from task_writer import TaskWriter
+from time import perf_counter_ns
+from value_interner import ValueInterner
 
-FIELD_MAPPINGS = {
-    'sys_id': 'crm_id',
-    'name': 'company',
-    'street': 'address',
-    'city': 'city',
-    'state': 'state',
-    'zip': 'zip',
-    'country': 'country',
-    'latitude': 'latitude',
-    'longitude': 'longitude',
-}
+
+def project_snow_cust_records(snow_cust_records):
+    # Lazily drop every ServiceNow column that is not part of FIELD_MAPPINGS (or the
+    # change hint) so that only the fields of interest are kept alive while the export
+    # is consumed.
+    for snow_cust_record in snow_cust_records:
+        yield project_record(snow_cust_record, SNOW_CUST_PROJECTION)
+
+
+def project_monit_org_records(monit_org_records):
+    # Lazily reduce monitoring org records to their uri and the mapped details.
+    # Nested blocks such as custom_fields, logs and notes are dropped.
+    for monit_org_record in monit_org_records:
+        yield project_record(monit_org_record, MONIT_ORG_PROJECTION)
 
 
 class ReconciliationManager:
-    def __init__(self, logger, snow_cust_data, monit_orgs_data):
+    # Both snow_cust_data and monit_orgs_data can be any iterable of records (lists,
+    # generators, streaming loaders). Each of them is consumed exactly once and only the
+    # mapped ServiceNow records (keyed by sys_id) are kept in memory.
+    # When a task_writer is given, tasks are streamed to it as soon as they are produced
+    # instead of being accumulated in self.tasks. Closing the writer is up to the caller.
+    # Per-phase timings, record counts and task counters are recorded into metrics (a
+    # MetricsCollector, created when not given) for the caller to query or export.
+    # The per-record messages of the updated and deleted orgs go through diagnostics (a
+    # RecordDiagnostics); RecordDiagnostics(logger, per_record=False) only logs a bounded
+    # summary at the end of the run.
+    # With a normalizer (a FieldNormalizer), fields whose values only differ in their
+    # representation (e.g. country "AU" vs "Australia") are not updated.
+    # The repeated values of the mapped records are shared through interner (a bounded
+    # ValueInterner, created when not given).
+    def __init__(
+        self,
+        logger,
+        snow_cust_data,
+        monit_orgs_data,
+        task_writer=None,
+        metrics=None,
+        diagnostics=None,
+        normalizer=None,
+        interner=None,
+    ):
         self.logger = logger
         self.snow_cust_data = snow_cust_data
         self.monit_orgs = monit_orgs_data
+        self.task_writer = task_writer
+        # Tasks of the last run (see _reset_tasks).
+        self._reset_tasks()
+        # Shared values of the low cardinality fields of the mapped ServiceNow records.
+        self.interner = interner if interner is not None else ValueInterner()
+        self.metrics = metrics if metrics is not None else MetricsCollector()
+        self.diagnostics = (
+            diagnostics if diagnostics is not None else RecordDiagnostics(logger)
+        )
+        self.normalizer = normalizer
+        # Export files of the inputs (see from_json_files), hashed by result caches.
+        self.input_fpaths = None
+
+    @classmethod
+    def from_json_files(
+        cls, logger, snow_cust_fpath, monit_orgs_fpath, use_mmap=False, **kwargs
+    ):
+        # Stream both JSON exports record by record, projected down to the fields of
+        # interest, instead of loading them fully into memory. The monitoring orgs share
+        # the interned values of the mapped ServiceNow records, so that most of their
+        # equal values are identical objects.
+        interner = kwargs.setdefault('interner', ValueInterner())
+        snow_cust_data = iter_json_file(
+            snow_cust_fpath, fields=SNOW_CUST_PROJECTION, use_mmap=use_mmap
+        )
+        monit_orgs_data = iter_json_file(
+            monit_orgs_fpath,
+            fields=MONIT_ORG_PROJECTION,
+            use_mmap=use_mmap,
+            interner=interner,
+        )
+        manager = cls(logger, snow_cust_data, monit_orgs_data, **kwargs)
+        manager.input_fpaths = (snow_cust_fpath, monit_orgs_fpath)
+        return manager
+
+    @classmethod
+    def from_files(
+        cls, logger, snow_cust_fpath, monit_orgs_fpath, backend=None, **kwargs
+    ):
+        # Parse each export (JSON, YAML or msgpack, by extension) in one go with the
+        # fastest installed codec (see codec_backends), then project it down to the fields
+        # of interest. Faster than from_json_files, at the cost of holding a parsed export
+        # in memory while it is consumed. backend forces a JSON backend ('orjson',
+        # 'ujson' or 'json').
+        interner = kwargs.setdefault('interner', ValueInterner())
+        snow_cust_data = load_records(
+            snow_cust_fpath,
+            fields=SNOW_CUST_PROJECTION,
+            codec=get_codec_for_path(snow_cust_fpath, backend),
+        )
+        monit_orgs_data = load_records(
+            monit_orgs_fpath,
+            fields=MONIT_ORG_PROJECTION,
+            codec=get_codec_for_path(monit_orgs_fpath, backend),
+            interner=interner,
+        )
+        manager = cls(logger, snow_cust_data, monit_orgs_data, **kwargs)
+        manager.input_fpaths = (snow_cust_fpath, monit_orgs_fpath)
+        return manager
+
+    @classmethod
+    def from_api(
+        cls,
+        logger,
+        snow_cust_url,
+        monit_orgs_url,
+        snow_cust_options=None,
+        monit_orgs_options=None,
+        **kwargs,
+    ):
+        # Fetch both sides from their APIs (ServiceNow Table API and Monitoring API) page
+        # by page, with concurrent requests, straight into the reconciliation. The options
+        # are passed to SnowCustomerSource / MonitoringOrgSource (page_size, concurrency,
+        # headers, ...). Both fetches start right away, the monitoring org pages being
+        # prefetched (up to a bounded number) while the ServiceNow records are mapped.
+        # Imported here so that file based runs do not load asyncio.
+        from source_adapters import MonitoringOrgSource, SnowCustomerSource
+
+        snow_cust_data = SnowCustomerSource(
+            snow_cust_url, **(snow_cust_options or {})
+        ).stream().start()
+        monit_orgs_data = MonitoringOrgSource(
+            monit_orgs_url, **(monit_orgs_options or {})
+        ).stream().start()
+        return cls(logger, snow_cust_data, monit_orgs_data, **kwargs)
+
+    def _reset_tasks(self):
+        # Every run starts from empty tasks, so that preparing the tasks again on the same
+        # instance does not append to the previous ones.
         self.tasks = {'create': [], 'update': [], 'delete': []}
+        self.task_counts = {'create': 0, 'update': 0, 'delete': 0}
+        # Matched orgs whose fields of interest are equal to the ServiceNow record's ones
+        # (hits) skip the field by field comparison.
+        self.fingerprint_stats = {'hits': 0, 'misses': 0}
+        # Time spent comparing the misses field by field, recorded into the metrics once
+        # per run (see _report_task_stats) rather than per record.
+        self.diffing_ns = 0
+
+    def _add_task(self, action, task):
+        self.task_counts[action] += 1
+        if self.task_writer is not None:
+            self.task_writer.write_task(action, task)
+        else:
+            self.tasks[action].append(task)
+
+    def _add_create_task(self, snow_cust_record):
+        self._add_task('create', get_mapped_record_dict(snow_cust_record))
+
+    def _map_snow_cust_record(self, snow_cust_record):
+        # Mapped records are kept as compact MappedRecord objects internally and only
+        # converted to dicts when they are output.
+        return MappedRecord.from_snow_cust_record(snow_cust_record, self.interner)
 
     @log_time()
     def _get_mapped_snow_cust_to_monit_org(self):
@@ -36,12 +196,11 @@ class ReconciliationManager:
             "Mapping ServiceNow customer records to monitoring org's fields of interest..."  # NOQA
         )
         mapped_snow_cust_to_monit_org = defaultdict(list)
-        for snow_cust_record in self.snow_cust_data:
-            mapped_data = {
-                monit_org_field: snow_cust_record[snow_cust_field]
-                for snow_cust_field, monit_org_field in FIELD_MAPPINGS.items()
-            }
-            mapped_snow_cust_to_monit_org[snow_cust_record['sys_id']] = mapped_data
+        with self.metrics.phase('mapping') as phase:
+            for snow_cust_record in self.snow_cust_data:
+                mapped_data = self._map_snow_cust_record(snow_cust_record)
+                mapped_snow_cust_to_monit_org[snow_cust_record['sys_id']] = mapped_data
+            phase.records = len(mapped_snow_cust_to_monit_org)
 
         self.logger.info(
             f"Mapped {len(mapped_snow_cust_to_monit_org)} ServiceNow records."
@@ -53,15 +212,19 @@ class ReconciliationManager:
         self, monit_org_record, snow_cust_record
     ):
         result = {}
+        normalizer = self.normalizer
         for field, value in snow_cust_record.items():
             # Check if monit org record fields of interest matches with the mapped
             # ServiceNow record. If doesn't match, store the mismatched data for update.
-            if value != monit_org_record['details'].get(field):
+            monit_org_value = monit_org_record['details'].get(field)
+            if value != monit_org_value and (
+                normalizer is None or not normalizer.equal(field, value, monit_org_value)
+            ):
                 result[field] = value
 
         if result:
-            self.logger.info(
-                f"Monitoring org: [crm_id: {snow_cust_record['crm_id']}] is to be updated with new details: {result}"  # NOQA
+            self.diagnostics.record(
+                'update', logging.INFO, UPDATE_MESSAGE, snow_cust_record['crm_id'], result
             )
             result['uri'] = monit_org_record['uri']
 
@@ -75,50 +238,318 @@ class ReconciliationManager:
         # Otherwise, monitoring org record is to be deleted.
         crm_id = monit_org_record['details']['crm_id']
         snow_cust_record = snow_cust_to_monit_org_copy.pop(crm_id, None)
-        if snow_cust_record:
+        if snow_cust_record is not None:
+            if get_mapped_record_values(snow_cust_record) == get_mapped_record_values(
+                monit_org_record['details']
+            ):
+                self.fingerprint_stats['hits'] += 1
+                return
+
+            self.fingerprint_stats['misses'] += 1
+            start = perf_counter_ns()
             result = self._get_snow_cust_data_for_monit_org_update(
                 monit_org_record, snow_cust_record
             )
+            self.diffing_ns += perf_counter_ns() - start
             if result:
-                self.tasks['update'].append(result)
+                self._add_task('update', result)
         else:
-            self.logger.warn(
-                f"Monitoring org: [crm_id: {crm_id}] is not found in ServiceNow customer records. This is candidate for deletion."  # NOQA
-            )
-            self.tasks['delete'].append(monit_org_record.get('uri'))
+            self.diagnostics.record('delete', logging.WARNING, DELETE_MESSAGE, crm_id)
+            self._add_task('delete', monit_org_record.get('uri'))
 
     @log_time()
-    def write_json_output(self, name, details):
-        filename = "{}.json".format(name)
-        with open(filename, 'w+') as f:
-            content = json.dumps(details, indent=4, separators=(',', ': '))
-            f.write(content)
+    def write_json_output(self, name, details, fmt='json', indent=4, codec=None):
+        # Tasks are serialized entry by entry through a buffered writer and the file is
+        # atomically put in place once complete. fmt can be 'json', 'jsonl' or 'msgpack'
+        # and indent=None produces compact output. codec is the JSON codec of the entries
+        # (the fastest installed one by default, see codec_backends).
+        filename = "{}.{}".format(name, fmt)
+        with self.metrics.phase('writing') as phase:
+            with TaskWriter(
+                filename, fmt=fmt, indent=indent, codec=codec
+            ) as task_writer:
+                task_writer.write_tasks(details)
+            phase.records = sum(task_writer.counts.values())
 
         self.logger.info(f"Successfully created {filename} file.")
 
-    @log_time(msg='Reconciliation tasks preparation total time spent:')
-    def prepare_reconciliation_tasks(self):
-        self.logger.info("Preparing reconciliation tasks...")
+    @log_time(
+        msg='Reconciliation tasks preparation total time spent:',
+        phase='prepare_reconciliation_tasks',
+    )
+    def prepare_reconciliation_tasks(
+        self, snow_cust_data=None, monit_orgs_data=None, result_cache=None
+    ):
+        # Inputs given here take precedence over the ones given on instantiation.
+        # This allows streaming the exports (e.g. generators) straight into the run.
+        # With a result_cache (a ResultCache), the tasks of inputs already reconciled are
+        # returned from the cache after hashing the inputs.
+        self._reset_tasks()
+        if snow_cust_data is not None:
+            self.snow_cust_data = snow_cust_data
+            self.input_fpaths = None
+        if monit_orgs_data is not None:
+            self.monit_orgs = monit_orgs_data
+            self.input_fpaths = None
 
-        snow_cust_to_monit_org = self._get_mapped_snow_cust_to_monit_org()
-        for monit_org_record in self.monit_orgs:
-            # Monitoring orgs without crm_id are ignored.
-            if monit_org_record.get('details', {}).get('crm_id'):
-                self._check_monit_org_for_update_or_delete(
-                    snow_cust_to_monit_org, monit_org_record
+        cache_key = None
+        if result_cache is not None:
+            from result_cache import get_cache_key
+
+            with self.metrics.phase('input_hashing'):
+                cache_key = get_cache_key(self._get_input_hashes(), self.normalizer)
+            cached_tasks = result_cache.get(cache_key)
+            self.metrics.increment(
+                'result_cache', result='hit' if cached_tasks is not None else 'miss'
+            )
+            if cached_tasks is not None:
+                self.logger.info(
+                    f"Inputs unchanged since a cached run, reusing its tasks ({cache_key})."
                 )
+                return self._use_cached_tasks(cached_tasks)
+
+        self.logger.info("Preparing reconciliation tasks...")
+
+        with paused_gc():
+            snow_cust_to_monit_org = self._get_mapped_snow_cust_to_monit_org()
+            self._match_monit_orgs(snow_cust_to_monit_org, self.monit_orgs)
+
+        tasks = self._finalize_reconciliation_tasks(snow_cust_to_monit_org)
+        if cache_key is not None:
+            if self.task_writer is None:
+                result_cache.put(cache_key, tasks)
+            else:
+                self.logger.warn("Tasks streamed to a task writer are not cached.")
+        return tasks
+
+    def _get_input_hashes(self):
+        # Content hashes of the export files, otherwise of the projected records, in which
+        # case the inputs are consumed into lists for the run.
+        from result_cache import get_file_hashes, get_records_hash
+
+        if self.input_fpaths is not None:
+            return get_file_hashes(self.input_fpaths)
+        self.snow_cust_data, snow_cust_hash = get_records_hash(
+            self.snow_cust_data, SNOW_CUST_PROJECTION
+        )
+        self.monit_orgs, monit_orgs_hash = get_records_hash(
+            self.monit_orgs, MONIT_ORG_PROJECTION
+        )
+        return [snow_cust_hash, monit_orgs_hash]
 
+    def _use_cached_tasks(self, cached_tasks):
+        for action in ('update', 'delete', 'create'):
+            for task in cached_tasks.get(action, []):
+                self._add_task(action, task)
+        self.logger.info(
+            f"Prepared total of reconciliation tasks : {self.task_counts}."
+        )
+        self._report_task_stats()
+        return self.tasks
+
+    def _match_monit_orgs(self, snow_cust_to_monit_org, monit_orgs):
+        with self.metrics.phase('matching') as phase:
+            for monit_org_record in monit_orgs:
+                phase.records += 1
+                # Monitoring orgs without crm_id are ignored.
+                if monit_org_record.get('details', {}).get('crm_id'):
+                    self._check_monit_org_for_update_or_delete(
+                        snow_cust_to_monit_org, monit_org_record
+                    )
+
+    def _finalize_reconciliation_tasks(self, snow_cust_to_monit_org):
         # Remaining ServiceNow customer records that are not found in monitoring org
         # records are candidate for monit org creation.
-        self.tasks['create'] += list(snow_cust_to_monit_org.values())
+        for snow_cust_record in snow_cust_to_monit_org.values():
+            self._add_create_task(snow_cust_record)
         self.logger.info(
-            f"Gathered {len(self.tasks['create'])} ServiceNow record(s) for monitoring org creation."  # NOQA
+            f"Gathered {self.task_counts['create']} ServiceNow record(s) for monitoring org creation."  # NOQA
         )
         # self.logger.debug(
         #     f"ServiceNow records with sys_id(s): {snow_cust_to_monit_org.keys()} for monitoring org creation."  # NOQA
         # )
 
-        total_tasks = {key: len(val) for key, val in self.tasks.items()}
-        self.logger.info(f"Prepared total of reconciliation tasks : {total_tasks}.")
+        self.logger.info(
+            f"Prepared total of reconciliation tasks : {self.task_counts}."
+        )
+        self.logger.info(f"Unchanged organizations fast path : {self.fingerprint_stats}.")
+        self._report_task_stats()
 
         return self.tasks
+
+    def _report_task_stats(self):
+        if self.fingerprint_stats['misses']:
+            self.metrics.add('diffing', self.diffing_ns, self.fingerprint_stats['misses'])
+        for action, count in self.task_counts.items():
+            self.metrics.set('tasks', count, action=action)
+        for result, count in self.fingerprint_stats.items():
+            self.metrics.set('unchanged_fast_path', count, result=result)
+        for name, value in self.interner.stats().items():
+            self.metrics.set_gauge('interned_values', value, stat=name)
+        if self.normalizer is not None:
+            for field, count in self.normalizer.stats.items():
+                self.metrics.set('normalized_matches', count, field=field)
+        if not self.diagnostics.per_record:
+            self.diagnostics.log_summary()
+
+    @log_time(
+        msg='Indexed reconciliation tasks preparation total time spent:',
+        phase='prepare_indexed_reconciliation_tasks',
+    )
+    def prepare_indexed_reconciliation_tasks(self, snow_cust_index):
+        # Same result as prepare_reconciliation_tasks, with the ServiceNow customers looked
+        # up in a prebuilt SnowCustIndex (see SnowCustIndex.open_or_build) instead of being
+        # parsed and mapped from snow_cust_data, which is not used. The index is not
+        # modified, so one index (e.g. a PreparedSnowCustIndex) can be reconciled against
+        # many monitoring exports, by one manager per export, including from threads.
+        self._reset_tasks()
+        self.logger.info(
+            f"Preparing reconciliation tasks against the index {snow_cust_index.fpath}..."
+        )
+        snow_cust_to_monit_org = snow_cust_index.mapping()
+        self._match_monit_orgs(snow_cust_to_monit_org, self.monit_orgs)
+
+        return self._finalize_reconciliation_tasks(snow_cust_to_monit_org)
+
+    @log_time(
+        msg='Partitioned reconciliation tasks preparation total time spent:',
+        phase='prepare_partitioned_reconciliation_tasks',
+    )
+    def prepare_partitioned_reconciliation_tasks(self, shard_count=None):
+        # Same result as prepare_reconciliation_tasks, computed by hash-partitioning both
+        # inputs by sys_id/crm_id and reconciling the shards in a process pool.
+        # shard_count defaults to the number of CPUs.
+        # The engines are imported when used, to keep the startup of the runs which do not
+        # use them short (see reconcile.py).
+        from partitioned_reconciliation import prepare_partitioned_reconciliation_tasks
+
+        self._reset_tasks()
+        return prepare_partitioned_reconciliation_tasks(self, shard_count=shard_count)
+
+    @log_time(
+        msg='Delta reconciliation tasks preparation total time spent:',
+        phase='prepare_delta_reconciliation_tasks',
+    )
+    def prepare_delta_reconciliation_tasks(self, snapshot_store):
+        # Same result as prepare_reconciliation_tasks, using the snapshot of the last run
+        # to skip the work on the pairs that did not change. A monitoring org whose change
+        # hint (date_edit) and whose ServiceNow customer's one (sys_updated_on) are the
+        # same as when the pair was last found in sync is still in sync: neither record is
+        # mapped nor compared. Only the ServiceNow customers of the other orgs and of the
+        # creates are mapped, and only the pairs whose state changed are saved back.
+        from result_cache import get_cache_key
+        from snapshot_store import get_in_sync_state
+
+        self._reset_tasks()
+        self.logger.info("Preparing delta reconciliation tasks...")
+        # The field mappings and normalization rules decide which pairs are in sync.
+        config_key = get_cache_key([], self.normalizer)
+        in_sync_state = snapshot_store.load_in_sync_state(config_key)
+
+        with paused_gc():
+            # Duplicated sys_ids keep the position of their first occurrence and the
+            # values of their last one, as the mapped records of the other engines.
+            snow_cust_records = {}
+            with self.metrics.phase('mapping') as phase:
+                for snow_cust_record in self.snow_cust_data:
+                    snow_cust_records[snow_cust_record['sys_id']] = snow_cust_record
+                phase.records = len(snow_cust_records)
+
+            in_sync_changes = {}
+            removed_uris = []
+            unchanged_count = compared_count = 0
+            with self.metrics.phase('matching') as phase:
+                for monit_org_record in self.monit_orgs:
+                    phase.records += 1
+                    details = monit_org_record.get('details', {})
+                    crm_id = details.get('crm_id')
+                    # Monitoring orgs without crm_id are ignored.
+                    if not crm_id:
+                        continue
+
+                    snow_cust_record = snow_cust_records.pop(crm_id, None)
+                    if snow_cust_record is None:
+                        self._check_monit_org_for_update_or_delete({}, monit_org_record)
+                        continue
+
+                    uri = monit_org_record.get('uri')
+                    date_edit = details.get(MONIT_ORG_CHANGE_HINT_FIELD)
+                    updated_on = snow_cust_record.get(SNOW_CUST_CHANGE_HINT_FIELD)
+                    # The states left in in_sync_state are removed from the snapshot.
+                    previous_state = in_sync_state.pop(uri, None)
+                    # Pairs without change hints are compared on every run.
+                    state = None
+                    if date_edit and updated_on:
+                        state = get_in_sync_state(crm_id, date_edit, updated_on)
+                        if previous_state == state:
+                            self.fingerprint_stats['hits'] += 1
+                            unchanged_count += 1
+                            continue
+
+                    compared_count += 1
+                    update_count = self.task_counts['update']
+                    self._check_monit_org_for_update_or_delete(
+                        {crm_id: self._map_snow_cust_record(snow_cust_record)},
+                        monit_org_record,
+                    )
+                    if state is not None and self.task_counts['update'] == update_count:
+                        in_sync_changes[uri] = state
+                    elif previous_state is not None:
+                        removed_uris.append(uri)
+
+            snow_cust_to_monit_org = {
+                sys_id: self._map_snow_cust_record(snow_cust_record)
+                for sys_id, snow_cust_record in snow_cust_records.items()
+            }
+
+        removed_uris.extend(in_sync_state)
+        snapshot_store.save_changes(config_key, in_sync_changes, removed_uris)
+        self.delta_stats = {
+            'unchanged_matches': unchanged_count,
+            'compared_matches': compared_count,
+            'saved_changes': len(in_sync_changes) + len(removed_uris),
+        }
+        self.logger.info(f"Delta reconciliation stats : {self.delta_stats}.")
+
+        return self._finalize_reconciliation_tasks(snow_cust_to_monit_org)
+
+    @log_time(
+        msg='External reconciliation tasks preparation total time spent:',
+        phase='prepare_external_reconciliation_tasks',
+    )
+    def prepare_external_reconciliation_tasks(self, memory_budget=None, spill_dpath=None):
+        # Same result as prepare_reconciliation_tasks for exports larger than the memory:
+        # both inputs are sorted by sys_id/crm_id with an external merge sort holding about
+        # memory_budget bytes of records (DEFAULT_MEMORY_BUDGET when None), spilling sorted
+        # runs to temporary files in spill_dpath (the system default when None), and
+        # merge-joined.
+        from external_reconciliation import prepare_external_reconciliation_tasks
+
+        self._reset_tasks()
+        return prepare_external_reconciliation_tasks(
+            self, memory_budget=memory_budget, spill_dpath=spill_dpath
+        )
+
+    @log_time(
+        msg='Reconciliation pipeline total time spent:',
+        phase='run_reconciliation_pipeline',
+    )
+    def run_reconciliation_pipeline(self, sink, **kwargs):
+        # Same tasks as prepare_reconciliation_tasks, with the loading of the monitoring
+        # orgs, the matching and the output running concurrently: tasks are streamed to
+        # the sink (a TaskWriter, closed at the end, or a TaskApplier) through a bounded
+        # queue as soon as they are produced. kwargs are queue_size and prefetch_size.
+        from pipeline import run_reconciliation_pipeline
+
+        self._reset_tasks()
+        return run_reconciliation_pipeline(self, sink, **kwargs)
+
+    def apply_reconciliation_tasks(self, base_url, tasks=None, **kwargs):
+        # Apply the prepared tasks (or the given ones) against the monitoring API at
+        # base_url with the asyncio TaskApplier; kwargs are passed to TaskApplier. Returns
+        # the applier's report (applied/failed/skipped counts, throughput, latencies).
+        # Imported here so that runs which only prepare tasks do not load asyncio.
+        from task_applier import TaskApplier
+
+        applier = TaskApplier(base_url, self.logger, metrics=self.metrics, **kwargs)
+        return applier.apply(self.tasks if tasks is None else tasks)
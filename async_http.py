@@ -0,0 +1,191 @@
+"""
+A minimal asyncio HTTP/1.1 client (standard library only), shared by the task applier and the
+source adapters: keep-alive connections, a bounded connection pool and JSON helpers.
+"""
+
+import asyncio
+import base64
+import json
+import ssl
+
+from urllib.parse import urlsplit
+
+DEFAULT_POOL_SIZE = 10
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Requests which can be sent again when it is unknown whether the server received them.
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+# Malformed responses raise ValueError.
+REQUEST_ERRORS = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError)
+
+
+class RequestNotSentError(ConnectionError):
+    # The request failed before any of it was sent (e.g. the connection was refused), so
+    # it can be retried whatever its method.
+    pass
+
+
+def get_basic_auth_header(username, password):
+    credentials = base64.b64encode(f'{username}:{password}'.encode('utf-8')).decode('ascii')
+    return {'Authorization': f'Basic {credentials}'}
+
+
+class HTTPResponse:
+    __slots__ = ('status', 'headers', 'body')
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class AsyncHTTPConnection:
+    # A single keep-alive HTTP/1.1 connection. Requests on a connection are sequential.
+    def __init__(self, host, port, use_ssl=False):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.reader = None
+        self.writer = None
+        self.keep_alive = True
+
+    async def connect(self):
+        try:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host,
+                self.port,
+                ssl=ssl.create_default_context() if self.use_ssl else None,
+            )
+        except OSError as e:
+            raise RequestNotSentError(
+                f"Cannot connect to {self.host}:{self.port}: {e!r}."
+            ) from e
+        return self
+
+    def is_closed(self):
+        # Whether the server closed the connection while it was idle.
+        return self.writer is None or self.writer.is_closing() or self.reader.at_eof()
+
+    async def request(self, method, path, body=None, headers=None):
+        body = body or b''
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            f'Content-Length: {len(body)}',
+        ]
+        lines.extend(f'{name}: {value}' for name, value in (headers or {}).items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the server.")
+        version, status = status_line.decode('latin-1').split(None, 2)[:2]
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            response_body = await self._read_chunked()
+        elif 'content-length' in response_headers:
+            response_body = await self.reader.readexactly(
+                int(response_headers['content-length'])
+            )
+        elif method == 'HEAD' or status in ('204', '304'):
+            response_body = b''
+        else:
+            response_body = await self.reader.read()
+            self.keep_alive = False
+
+        if version == 'HTTP/1.0' or response_headers.get('connection', '').lower() == 'close':
+            self.keep_alive = False
+
+        return HTTPResponse(int(status), response_headers, response_body)
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                # Trailers, up to the final empty line.
+                while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class ConnectionPool:
+    # At most `size` connections to the base URL, reused across requests.
+    def __init__(self, base_url, size=DEFAULT_POOL_SIZE):
+        url = urlsplit(base_url)
+        self.use_ssl = url.scheme == 'https'
+        self.host = url.hostname
+        self.port = url.port or (443 if self.use_ssl else 80)
+        self.base_path = url.path.rstrip('/')
+        self.size = size
+        self.idle = []
+        self.semaphore = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _connect(self):
+        self.opened += 1
+        return await AsyncHTTPConnection(self.host, self.port, self.use_ssl).connect()
+
+    def _pop_idle(self):
+        while self.idle:
+            connection = self.idle.pop()
+            if not connection.is_closed():
+                return connection
+            connection.close()
+        return None
+
+    async def request(self, method, path, body=None, headers=None):
+        async with self.semaphore:
+            connection = self._pop_idle()
+            if connection is not None:
+                try:
+                    response = await connection.request(
+                        method, self.base_path + path, body, headers
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # The server closed the idle connection. Only idempotent requests are
+                    # retried on a new one, the server may have received the others.
+                    connection.close()
+                    if method not in IDEMPOTENT_METHODS:
+                        raise
+                    connection = None
+                except BaseException:
+                    # Including a cancellation, which leaves the response unread.
+                    connection.close()
+                    raise
+            if connection is None:
+                connection = await self._connect()
+                try:
+                    response = await connection.request(
+                        method, self.base_path + path, body, headers
+                    )
+                except BaseException:
+                    connection.close()
+                    raise
+
+            if connection.keep_alive:
+                self.idle.append(connection)
+            else:
+                connection.close()
+            return response
+
+    def close(self):
+        while self.idle:
+            self.idle.pop().close()
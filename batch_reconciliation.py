@@ -0,0 +1,184 @@
+"""
+Multi-tenant batch reconciliation. A manifest lists the ServiceNow customer / monitoring org
+export pairs of every tenant with the destination of their tasks, and the tenants are reconciled
+by one shared pool of worker processes, so that the interpreter startup and the imports are paid
+once per worker instead of once per tenant. Tenants are scheduled largest inputs first, which
+keeps the longest reconciliations from being started last (shorter makespan). A failing tenant
+does not stop the others: its error is reported in the consolidated summary, next to the task
+counts and per-phase timings of every tenant.
+
+    $ python batch_reconciliation.py manifest.json --workers 4 --summary summary.json
+
+The manifest is a JSON array (or {"tenants": [...]}) of
+{"tenant": ..., "snow_cust_fpath": ..., "monit_orgs_fpath": ..., "output": ...} objects, with
+optional "fmt" (json, jsonl or msgpack) and "indent". Relative paths are relative to the manifest.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from logger_decorator import StandardLogger
+from partitioned_reconciliation import get_default_shard_count
+
+MANIFEST_FIELDS = ('tenant', 'snow_cust_fpath', 'monit_orgs_fpath', 'output')
+MANIFEST_PATH_FIELDS = ('snow_cust_fpath', 'monit_orgs_fpath', 'output')
+
+
+def load_manifest(manifest_fpath):
+    with open(manifest_fpath, 'r') as f:
+        manifest = json.loads(f.read())
+    return get_tenant_jobs(manifest, os.path.dirname(os.path.abspath(manifest_fpath)))
+
+
+def get_tenant_jobs(manifest, base_dpath='.'):
+    # Validated tenant jobs of a manifest, with absolute paths.
+    entries = manifest['tenants'] if isinstance(manifest, dict) else manifest
+    jobs = []
+    tenants = set()
+    for index, entry in enumerate(entries):
+        missing_fields = [field for field in MANIFEST_FIELDS if not entry.get(field)]
+        if missing_fields:
+            raise ValueError(f"Manifest entry {index} is missing {missing_fields}.")
+        if entry['tenant'] in tenants:
+            raise ValueError(f"Tenant {entry['tenant']} is listed more than once.")
+        tenants.add(entry['tenant'])
+
+        job = dict(entry)
+        for field in MANIFEST_PATH_FIELDS:
+            job[field] = os.path.join(base_dpath, entry[field])
+        job.setdefault('fmt', 'json')
+        job.setdefault('indent', 4)
+        jobs.append(job)
+    return jobs
+
+
+def get_input_size(job):
+    # Size of the inputs of a job, unknown (0) for missing files, which fail in the run.
+    size = 0
+    for field in ('snow_cust_fpath', 'monit_orgs_fpath'):
+        try:
+            size += os.path.getsize(job[field])
+        except OSError:
+            pass
+    return size
+
+
+def schedule_jobs(jobs):
+    # Largest inputs first (longest processing time first).
+    return sorted(jobs, key=get_input_size, reverse=True)
+
+
+def reconcile_tenant(job):
+    # Reconcile one tenant into its output file. Errors are returned in the result rather
+    # than raised, so that they only fail their tenant.
+    from ReconciliationManager import ReconciliationManager
+    from task_writer import TaskWriter
+
+    start = time.perf_counter()
+    result = {'tenant': job['tenant'], 'input_bytes': get_input_size(job)}
+    try:
+        logger = StandardLogger(f"ReconciliationManager.{job['tenant']}")
+        output_fpath = '{}.{}'.format(job['output'], job['fmt'])
+        os.makedirs(os.path.dirname(output_fpath) or '.', exist_ok=True)
+        if os.path.splitext(job['snow_cust_fpath'])[1].lower() == '.json':
+            from_files = ReconciliationManager.from_json_files
+        else:
+            from_files = ReconciliationManager.from_files
+        with TaskWriter(
+            output_fpath, fmt=job['fmt'], indent=job['indent']
+        ) as task_writer:
+            manager = from_files(
+                logger,
+                job['snow_cust_fpath'],
+                job['monit_orgs_fpath'],
+                task_writer=task_writer,
+            )
+            manager.prepare_reconciliation_tasks()
+    except Exception as e:
+        result.update(ok=False, error=repr(e))
+    else:
+        result.update(
+            ok=True,
+            output=output_fpath,
+            task_counts=dict(manager.task_counts),
+            phases={
+                name: phase['total_ns'] / 1e9
+                for name, phase in manager.metrics.as_dict()['phases'].items()
+            },
+        )
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def run_batch(jobs, max_workers=None, logger=None):
+    # Reconcile the tenant jobs in a shared process pool and return the consolidated
+    # summary. Results are listed in manifest order.
+    max_workers = min(max_workers or get_default_shard_count(), len(jobs)) or 1
+    logger = logger or StandardLogger('BatchReconciliation')
+    logger.info(f"Reconciling {len(jobs)} tenant(s) with {max_workers} worker(s)...")
+
+    start = time.perf_counter()
+    results = {}
+    scheduled_jobs = schedule_jobs(jobs)
+    if max_workers == 1:
+        for job in scheduled_jobs:
+            results[job['tenant']] = reconcile_tenant(job)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # The pool starts the submitted jobs in order.
+            futures = {
+                job['tenant']: executor.submit(reconcile_tenant, job)
+                for job in scheduled_jobs
+            }
+            for tenant, future in futures.items():
+                try:
+                    results[tenant] = future.result()
+                except Exception as e:
+                    # Worker process crash (e.g. killed).
+                    results[tenant] = {'tenant': tenant, 'ok': False, 'error': repr(e)}
+
+    tenant_results = [results[job['tenant']] for job in jobs]
+    task_counts = {'create': 0, 'update': 0, 'delete': 0}
+    for result in tenant_results:
+        if result['ok']:
+            for action, count in result['task_counts'].items():
+                task_counts[action] += count
+        else:
+            logger.error(f"Tenant {result['tenant']} failed: {result['error']}")
+    summary = {
+        'tenants': tenant_results,
+        'succeeded': sum(result['ok'] for result in tenant_results),
+        'failed': sum(not result['ok'] for result in tenant_results),
+        'task_counts': task_counts,
+        'workers': max_workers,
+        'seconds': time.perf_counter() - start,
+    }
+    logger.info(
+        f"Reconciled {summary['succeeded']} tenant(s), {summary['failed']} failed, in {summary['seconds']:.3f} seconds."  # NOQA
+    )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-tenant batch reconciliation.")
+    parser.add_argument('manifest', help="Manifest JSON file of the tenants.")
+    parser.add_argument('--workers', type=int, help="Worker processes (CPU count).")
+    parser.add_argument('--summary', help="Write the summary to this JSON file.")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(load_manifest(args.manifest), max_workers=args.workers)
+    content = json.dumps(summary, indent=4, separators=(',', ': '))
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            f.write(content)
+    print(content)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Benchmark of the (de)serialization backends (see codec_backends) on the test data exports: time
+to parse both exports and to write the reconciliation tasks (indented and compact JSON) with
+every installed JSON backend, and to parse the reduced YAML exports with the pure Python and the
+libyaml loaders.
+
+    $ python benchmarks/bench_codecs.py
+"""
+
+import json
+import os
+import sys
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_DIR)
+
+import yaml  # NOQA: E402
+
+from codec_backends import JSON_BACKENDS, get_json_codec  # NOQA: E402
+from ReconciliationManager import ReconciliationManager  # NOQA: E402
+from task_writer import TaskWriter  # NOQA: E402
+
+TEST_DATAPATH = os.path.join(PROJECT_DIR, 'tests', 'test_data')
+JSON_INPUTS = ['snow-customers.json', 'monitoring-orgs.json']
+YAML_INPUTS = ['snow-customers-reduced.yml', 'monitoring-orgs-reduced.yml']
+REPEAT = 20
+
+
+class QuietLogger:
+    def debug(self, message):
+        pass
+
+    def info(self, message):
+        pass
+
+    def warn(self, message):
+        pass
+
+    def error(self, message):
+        pass
+
+
+def timed(function):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        function()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def read(fname):
+    with open(os.path.join(TEST_DATAPATH, fname), 'rb') as f:
+        return f.read()
+
+
+def write_tasks(fpath, tasks, codec, indent):
+    with TaskWriter(fpath, indent=indent, fsync=False, codec=codec) as task_writer:
+        task_writer.write_tasks(tasks)
+
+
+def main():
+    json_inputs = [read(fname) for fname in JSON_INPUTS]
+    yaml_inputs = [read(fname) for fname in YAML_INPUTS]
+    tasks = ReconciliationManager(
+        QuietLogger(), *[json.loads(data) for data in json_inputs]
+    ).prepare_reconciliation_tasks()
+    output_fpath = os.path.join(PROJECT_DIR, 'tests', 'outputs', 'bench_codecs.json')
+
+    results = {'json': {}, 'yaml': {}}
+    for backend in JSON_BACKENDS:
+        try:
+            codec = get_json_codec(backend)
+        except ImportError:
+            continue
+        results['json'][backend] = {
+            'load_seconds': timed(lambda: [codec.loads(data) for data in json_inputs]),
+            'write_indented_seconds': timed(
+                lambda: write_tasks(output_fpath, tasks, codec, 4)
+            ),
+            'write_compact_seconds': timed(
+                lambda: write_tasks(output_fpath, tasks, codec, None)
+            ),
+        }
+    for name, loader in [
+        ('SafeLoader', yaml.SafeLoader),
+        ('CSafeLoader', getattr(yaml, 'CSafeLoader', None)),
+    ]:
+        if loader is not None:
+            results['yaml'][name] = {
+                'load_seconds': timed(
+                    lambda: [yaml.load(data, Loader=loader) for data in yaml_inputs]
+                )
+            }
+    os.remove(output_fpath)
+
+    print(json.dumps(results, indent=4, separators=(',', ': ')))
+
+
+if __name__ == '__main__':
+    main()
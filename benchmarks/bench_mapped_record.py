@@ -0,0 +1,80 @@
+"""
+Memory benchmark of the mapped ServiceNow records: the compact MappedRecord layout against the
+previous dict-per-record layout. The records are streamed from the test data export (replicated
+with distinct sys_ids) so that only what the mapping retains is measured.
+
+    $ python benchmarks/bench_mapped_record.py
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_DIR)
+
+from field_mappings import FIELD_MAPPINGS, SNOW_CUST_PROJECTION  # NOQA: E402
+from mapped_record import MappedRecord  # NOQA: E402
+from record_loader import iter_json_file  # NOQA: E402
+
+SNOW_CUST_FPATH = os.path.join(PROJECT_DIR, 'tests', 'test_data', 'snow-customers.json')
+REPLICAS = 20
+
+
+def iter_snow_cust_records():
+    for replica in range(REPLICAS):
+        for snow_cust_record in iter_json_file(SNOW_CUST_FPATH, fields=SNOW_CUST_PROJECTION):
+            snow_cust_record['sys_id'] = '{:04x}{}'.format(
+                replica, snow_cust_record['sys_id'][4:]
+            )
+            yield snow_cust_record
+
+
+def map_to_dicts(snow_cust_records):
+    return {
+        snow_cust_record['sys_id']: {
+            monit_org_field: snow_cust_record[snow_cust_field]
+            for snow_cust_field, monit_org_field in FIELD_MAPPINGS.items()
+        }
+        for snow_cust_record in snow_cust_records
+    }
+
+
+def map_to_mapped_records(snow_cust_records):
+    interned_values = {}
+    return {
+        snow_cust_record['sys_id']: MappedRecord.from_snow_cust_record(
+            snow_cust_record, interned_values
+        )
+        for snow_cust_record in snow_cust_records
+    }
+
+
+def measure(mapper):
+    records = list(iter_snow_cust_records())
+    start = time.perf_counter()
+    mapper(records)
+    elapsed = time.perf_counter() - start
+    del records
+
+    tracemalloc.start()
+    mapped = mapper(iter_snow_cust_records())
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'records': len(mapped),
+        'bytes_per_record': retained / len(mapped),
+        'mapping_seconds': elapsed,
+    }
+
+
+def main():
+    results = {mapper.__name__: measure(mapper) for mapper in [map_to_dicts, map_to_mapped_records]}
+    print(json.dumps(results, indent=4, separators=(',', ': ')))
+
+
+if __name__ == '__main__':
+    main()
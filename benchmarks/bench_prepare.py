@@ -0,0 +1,117 @@
+"""
+End-to-end benchmark of the reconciliation engines: the whole prepare_*_reconciliation_tasks call
+(mapping, matching, diffing and task collection) on synthetic exports (see synthetic_data.py)
+already loaded in memory, so that a regression of a per-record hot path is not hidden by the
+parsing time or by a benchmark of the path in isolation. The delta engine is measured on a second
+run against the snapshot of a first one, which is its intended use.
+
+    $ python benchmarks/bench_prepare.py --scale 100000 --engines default partitioned delta
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run_benchmarks import DEFAULT_DATA_DIR, QuietLogger, prepare_data  # NOQA: E402
+
+ENGINES = ['default', 'partitioned', 'external', 'delta']
+DEFAULT_SCALE = 100000
+REPEAT = 5
+
+
+def load_exports(data_dir):
+    with open(os.path.join(data_dir, 'expected.json'), 'r') as f:
+        expected = json.loads(f.read())
+    with open(expected['snow_cust_fpath'], 'r') as f:
+        snow_cust_data = json.loads(f.read())
+    with open(expected['monit_orgs_fpath'], 'r') as f:
+        monit_orgs_data = json.loads(f.read())
+    return snow_cust_data, monit_orgs_data, expected['expected_task_counts']
+
+
+def prepare(engine, snow_cust_data, monit_orgs_data, snapshot_fpath):
+    # One reconciliation with the engine, returning the manager.
+    from diagnostics import RecordDiagnostics
+    from ReconciliationManager import ReconciliationManager
+    from snapshot_store import SnapshotStore
+
+    logger = QuietLogger()
+    manager = ReconciliationManager(
+        logger,
+        snow_cust_data,
+        monit_orgs_data,
+        diagnostics=RecordDiagnostics(logger, per_record=False),
+    )
+    if engine == 'default':
+        manager.prepare_reconciliation_tasks()
+    elif engine == 'delta':
+        with SnapshotStore(snapshot_fpath) as snapshot_store:
+            manager.prepare_delta_reconciliation_tasks(snapshot_store)
+    else:
+        getattr(manager, f'prepare_{engine}_reconciliation_tasks')()
+    return manager
+
+
+def measure(engine, snow_cust_data, monit_orgs_data, expected_task_counts, repeat):
+    timings = []
+    with tempfile.TemporaryDirectory() as tmp_dpath:
+        snapshot_fpath = os.path.join(tmp_dpath, 'snapshot.db')
+        if engine == 'delta':
+            # First run, writing the snapshot the measured runs start from.
+            prepare(engine, snow_cust_data, monit_orgs_data, snapshot_fpath)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            manager = prepare(engine, snow_cust_data, monit_orgs_data, snapshot_fpath)
+            timings.append(time.perf_counter() - start)
+            if manager.task_counts != expected_task_counts:
+                raise AssertionError(
+                    f"Unexpected task counts {manager.task_counts} of engine {engine}, expected {expected_task_counts}"  # NOQA
+                )
+
+    records = len(snow_cust_data) + len(monit_orgs_data)
+    return {
+        'best_seconds': min(timings),
+        'median_seconds': statistics.median(timings),
+        'records_per_second': records / min(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=int, default=DEFAULT_SCALE)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=['default'])
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    snow_cust_data, monit_orgs_data, expected_task_counts = load_exports(
+        prepare_data(args.data_dir, args.scale, args.seed)
+    )
+    results = {'scale': args.scale, 'engines': {}}
+    for engine in args.engines:
+        result = measure(
+            engine, snow_cust_data, monit_orgs_data, expected_task_counts, args.repeat
+        )
+        results['engines'][engine] = result
+        print(
+            f"{engine:<12} best {result['best_seconds']:7.3f}s  "
+            f"median {result['median_seconds']:7.3f}s  "
+            f"{result['records_per_second']:10.0f} records/s"
+        )
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(results, indent=4, separators=(',', ': ')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of the incremental JSON record loader against the full-load path
+(json.loads(f.read())) on the test data exports. Reports wall time and peak traced memory.
+
+    $ python benchmarks/bench_record_loader.py
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_DIR)
+
+from record_loader import iter_json_file  # NOQA: E402
+from ReconciliationManager import MONIT_ORG_PROJECTION, SNOW_CUST_PROJECTION  # NOQA: E402
+
+TEST_DATAPATH = os.path.join(PROJECT_DIR, 'tests', 'test_data')
+INPUTS = [
+    ('snow-customers.json', SNOW_CUST_PROJECTION),
+    ('monitoring-orgs.json', MONIT_ORG_PROJECTION),
+]
+REPEAT = 5
+
+
+def full_load(fpath, fields):
+    with open(fpath, 'r') as f:
+        return json.loads(f.read())
+
+
+def streamed_load(fpath, fields):
+    return list(iter_json_file(fpath, fields=fields))
+
+
+def streamed_mmap_load(fpath, fields):
+    return list(iter_json_file(fpath, fields=fields, use_mmap=True))
+
+
+def measure(loader, fpath, fields):
+    best_time = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        loader(fpath, fields)
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+
+    tracemalloc.start()
+    records = loader(fpath, fields)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'records': len(records), 'seconds': best_time, 'peak_bytes': peak}
+
+
+def main():
+    results = {}
+    for fname, fields in INPUTS:
+        fpath = os.path.join(TEST_DATAPATH, fname)
+        results[fname] = {
+            loader.__name__: measure(loader, fpath, fields)
+            for loader in [full_load, streamed_load, streamed_mmap_load]
+        }
+
+    print(json.dumps(results, indent=4, separators=(',', ': ')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Startup benchmark of the command-line entry point (python -m reconcile): wall time of a bare
+interpreter, of --help and of a run on the reduced test exports (mostly startup), each in fresh
+processes, together with the slowest imports of the run as reported by -X importtime. The
+overhead of the run over the bare interpreter is checked against a budget, so that a new eager
+import of a heavy dependency fails the benchmark:
+
+    $ python benchmarks/bench_startup.py --budget-ms 150 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+TEST_DATAPATH = os.path.join(PROJECT_DIR, 'tests', 'test_data')
+INPUTS = ['snow-customers-reduced.json', 'monitoring-orgs-reduced.json']
+DEFAULT_BUDGET_MS = 150
+REPEAT = 15
+TOP_IMPORTS = 10
+
+
+def get_commands(output_fpath):
+    run = [sys.executable, '-m', 'reconcile']
+    run += [os.path.join(TEST_DATAPATH, fname) for fname in INPUTS]
+    run += ['-o', output_fpath, '--log-level', 'WARNING']
+    return {
+        'interpreter': [sys.executable, '-c', 'pass'],
+        'help': [sys.executable, '-m', 'reconcile', '--help'],
+        'run': run,
+    }
+
+
+def time_command(command, repeat):
+    # Median wall time (ms) of fresh processes running the command.
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_DIR, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def get_slowest_imports(command, count=TOP_IMPORTS):
+    # Top level imports of the command by cumulative time (us), from -X importtime.
+    process = subprocess.run(
+        [command[0], '-X', 'importtime'] + command[1:],
+        cwd=PROJECT_DIR,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    imports = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:') :].split('|')
+        # Top level imports only (nested ones are indented further).
+        if name.startswith('   ') and not name.startswith('    '):
+            imports.append((name.strip(), int(cumulative)))
+    return sorted(imports, key=lambda entry: entry[1], reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dpath:
+        commands = get_commands(os.path.join(tmp_dpath, 'tasks.json'))
+        timings = {
+            name: time_command(command, args.repeat) for name, command in commands.items()
+        }
+        slowest_imports = get_slowest_imports(commands['run'])
+
+    overhead_ms = timings['run'] - timings['interpreter']
+    results = {
+        'timings_ms': timings,
+        'overhead_ms': overhead_ms,
+        'budget_ms': args.budget_ms,
+        'slowest_imports_us': dict(slowest_imports),
+    }
+    for name, timing in timings.items():
+        print(f"{name:<12} {timing:8.1f} ms")
+    print(f"{'overhead':<12} {overhead_ms:8.1f} ms (budget: {args.budget_ms} ms)")
+    print("Slowest imports of the run:")
+    for name, cumulative in slowest_imports:
+        print(f"    {name:<32} {cumulative / 1000:8.1f} ms")
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(results, indent=4))
+    return 0 if overhead_ms <= args.budget_ms else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
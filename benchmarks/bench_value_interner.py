@@ -0,0 +1,102 @@
+"""
+Benchmark of the value interner on the test data ServiceNow export (replicated with distinct
+sys_ids): retained memory of the mapped records without interning, with the previous unbounded
+dict and with the ValueInterner, and the time to compare every mapped record with an equal
+monitoring org (parsed separately, as the monitoring export would be) with and without the
+monitoring side sharing the interned values.
+
+    $ python benchmarks/bench_value_interner.py
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_DIR)
+
+from field_mappings import FIELD_MAPPINGS, SNOW_CUST_PROJECTION  # NOQA: E402
+from mapped_record import MappedRecord, get_mapped_record_values  # NOQA: E402
+from record_loader import iter_json_file  # NOQA: E402
+from value_interner import ValueInterner  # NOQA: E402
+
+SNOW_CUST_FPATH = os.path.join(PROJECT_DIR, 'tests', 'test_data', 'snow-customers.json')
+REPLICAS = 20
+REPEAT = 20
+
+
+def iter_snow_cust_records():
+    for replica in range(REPLICAS):
+        for snow_cust_record in iter_json_file(SNOW_CUST_FPATH, fields=SNOW_CUST_PROJECTION):
+            snow_cust_record['sys_id'] = '{:04x}{}'.format(
+                replica, snow_cust_record['sys_id'][4:]
+            )
+            yield snow_cust_record
+
+
+def iter_monit_org_details(interner=None):
+    # Details equal to the mapped records, as separately parsed objects.
+    for snow_cust_record in iter_snow_cust_records():
+        details = {
+            monit_org_field: snow_cust_record[snow_cust_field]
+            for snow_cust_field, monit_org_field in FIELD_MAPPINGS.items()
+        }
+        if interner is not None:
+            interner.intern_record(details)
+        yield details
+
+
+def map_records(snow_cust_records, interned_values):
+    return [
+        MappedRecord.from_snow_cust_record(snow_cust_record, interned_values)
+        for snow_cust_record in snow_cust_records
+    ]
+
+
+def measure_memory(get_interned_values):
+    tracemalloc.start()
+    mapped = map_records(iter_snow_cust_records(), get_interned_values())
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'records': len(mapped), 'bytes_per_record': retained / len(mapped)}
+
+
+def measure_diff(share_interned_values):
+    interner = ValueInterner()
+    mapped = map_records(iter_snow_cust_records(), interner)
+    monit_org_details = list(
+        iter_monit_org_details(interner if share_interned_values else None)
+    )
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        unchanged = sum(
+            get_mapped_record_values(record) == get_mapped_record_values(details)
+            for record, details in zip(mapped, monit_org_details)
+        )
+    elapsed = (time.perf_counter() - start) / REPEAT
+    return {
+        'unchanged': unchanged,
+        'diff_seconds': elapsed,
+        'interner': interner.stats(),
+    }
+
+
+def main():
+    results = {
+        'memory': {
+            'not_interned': measure_memory(lambda: None),
+            'dict': measure_memory(dict),
+            'value_interner': measure_memory(ValueInterner),
+        },
+        'diff': {
+            'monit_orgs_not_interned': measure_diff(False),
+            'monit_orgs_interned': measure_diff(True),
+        },
+    }
+    print(json.dumps(results, indent=4, separators=(',', ': ')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark harness of the reconciliation on synthetic exports (see synthetic_data.py). For every
+scale, the exports are generated once (and cached) and the reconciliation is measured in a fresh
+process, so that the peak RSS of a scale is not affected by the previous ones. Per-phase times
+(load, mapping, diff, write), throughput and peak RSS are written as JSON together with the
+commit they were measured on, and can be compared with a previous result file.
+
+    $ python benchmarks/run_benchmarks.py --scales 10000 100000 1000000 --output results.json
+    $ python benchmarks/run_benchmarks.py --scales 10000 --compare results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, PROJECT_DIR)
+
+DEFAULT_SCALES = [10000, 100000, 1000000]
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'reconciliation-benchmarks')
+PHASES = ['load', 'mapping', 'diff', 'write']
+
+
+class QuietLogger:
+    # Only warnings and errors are logged. The per-record messages are collected by a
+    # RecordDiagnostics(per_record=False) instead (see measure), so that per-record log
+    # lines do not dominate the timings.
+    def __init__(self):
+        self.logging = logging.getLogger('benchmarks')
+
+    def debug(self, message):
+        pass
+
+    def info(self, message):
+        pass
+
+    def warn(self, message):
+        self.logging.warning(message)
+
+    def error(self, message):
+        self.logging.error(message)
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=PROJECT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(data_dir):
+    # Run one reconciliation over the exports of data_dir, phase by phase, through the
+    # steps of prepare_reconciliation_tasks.
+    from diagnostics import RecordDiagnostics
+    from mapped_record import paused_gc
+    from metrics import get_peak_rss_bytes
+    from record_loader import iter_json_file
+    from ReconciliationManager import (
+        MONIT_ORG_PROJECTION,
+        SNOW_CUST_PROJECTION,
+        ReconciliationManager,
+    )
+
+    with open(os.path.join(data_dir, 'expected.json'), 'r') as f:
+        expected = json.loads(f.read())
+
+    timings = {}
+    start = time.perf_counter()
+    snow_cust_data = list(
+        iter_json_file(expected['snow_cust_fpath'], fields=SNOW_CUST_PROJECTION)
+    )
+    monit_orgs_data = list(
+        iter_json_file(expected['monit_orgs_fpath'], fields=MONIT_ORG_PROJECTION)
+    )
+    timings['load'] = time.perf_counter() - start
+
+    logger = QuietLogger()
+    manager = ReconciliationManager(
+        logger,
+        snow_cust_data,
+        monit_orgs_data,
+        diagnostics=RecordDiagnostics(logger, per_record=False),
+    )
+    start = time.perf_counter()
+    with paused_gc():
+        snow_cust_to_monit_org = manager._get_mapped_snow_cust_to_monit_org()
+        timings['mapping'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        manager._match_monit_orgs(snow_cust_to_monit_org, manager.monit_orgs)
+    tasks = manager._finalize_reconciliation_tasks(snow_cust_to_monit_org)
+    timings['diff'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    manager.write_json_output(os.path.join(data_dir, 'output'), tasks)
+    timings['write'] = time.perf_counter() - start
+
+    if manager.task_counts != expected['expected_task_counts']:
+        raise AssertionError(
+            f"Unexpected task counts {manager.task_counts}, expected {expected['expected_task_counts']}"  # NOQA
+        )
+
+    records = len(snow_cust_data) + len(monit_orgs_data)
+    total = sum(timings.values())
+    return {
+        'records': records,
+        'task_counts': manager.task_counts,
+        'seconds': timings,
+        'total_seconds': total,
+        'records_per_second': records / total if total else None,
+        'peak_rss_bytes': get_peak_rss_bytes(),
+    }
+
+
+def prepare_data(data_dir, scale, seed):
+    from synthetic_data import write_synthetic_exports
+
+    scale_dir = os.path.join(data_dir, f'{scale}-{seed}')
+    expected_fpath = os.path.join(scale_dir, 'expected.json')
+    if not os.path.exists(expected_fpath):
+        expected = write_synthetic_exports(scale_dir, scale, seed=seed)
+        with open(expected_fpath, 'w') as f:
+            f.write(json.dumps(expected))
+
+    return scale_dir
+
+
+def get_phase_seconds(result, phase):
+    return result['total_seconds'] if phase == 'total' else result['seconds'][phase]
+
+
+def compare(results, baseline):
+    # Print the relative change of every phase against a previous result file.
+    baseline_results = baseline['results']
+    for scale, result in results['results'].items():
+        if scale not in baseline_results:
+            continue
+        for phase in PHASES + ['total']:
+            current = get_phase_seconds(result, phase)
+            previous = get_phase_seconds(baseline_results[scale], phase)
+            change = (current - previous) / previous * 100 if previous else 0.0
+            print(f"{scale:>10} {phase:>8}: {previous:.3f}s -> {current:.3f}s ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--compare', help="Compare with a previous results JSON file.")
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure)))
+        return
+
+    results = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'results': {},
+    }
+    for scale in args.scales:
+        scale_dir = prepare_data(args.data_dir, scale, args.seed)
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--measure', scale_dir]
+        )
+        results['results'][str(scale)] = json.loads(output)
+
+    content = json.dumps(results, indent=4, separators=(',', ': '))
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(content)
+    print(content)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(results, json.loads(f.read()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Synthetic generator of ServiceNow customer and Monitoring organization exports, at a configurable
+scale and with configurable ratios of creates, updates, deletes and orgs without crm_id. The
+records carry the same (unused) fields as the test data exports, and are written one at a time
+so that exports larger than the memory can be generated.
+
+    $ python benchmarks/synthetic_data.py 100000 /tmp/cmdb-100k
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import uuid
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+TEST_DATAPATH = os.path.join(PROJECT_DIR, 'tests', 'test_data')
+sys.path.insert(0, PROJECT_DIR)
+
+from field_mappings import FIELD_MAPPINGS  # NOQA: E402
+
+DEFAULT_RATIOS = {
+    # Fractions of the number of ServiceNow customers.
+    'create': 0.05,
+    'update': 0.10,
+    'delete': 0.02,
+    'no_crm_id': 0.05,
+}
+CITIES = [
+    ('Sydney', 'NSW', 'Australia'),
+    ('Melbourne', 'VIC', 'Australia'),
+    ('Brisbane', 'QLD', 'Australia'),
+    ('Perth', 'WA', 'Australia'),
+    ('Auckland', 'AUK', 'New Zealand'),
+    ('Austin', 'TX', 'USA'),
+    ('Seattle', 'WA', 'USA'),
+]
+WORDS = ['Pearl', 'Fortune', 'Smart', 'Bridge', 'Deluge', 'Lighting', 'Electrics', 'Tech']
+
+
+def get_templates():
+    # The first record of each test data export, used for the fields that are not mapped.
+    with open(os.path.join(TEST_DATAPATH, 'snow-customers-reduced.json'), 'r') as f:
+        snow_cust_template = json.loads(f.read())[0]
+    with open(os.path.join(TEST_DATAPATH, 'monitoring-orgs-reduced.json'), 'r') as f:
+        monit_org_template = json.loads(f.read())[0]
+
+    return snow_cust_template, monit_org_template
+
+
+def get_counts(count, ratios=None):
+    ratios = dict(DEFAULT_RATIOS, **(ratios or {}))
+    counts = {action: int(count * ratio) for action, ratio in ratios.items()}
+    if counts['create'] + counts['update'] > count:
+        raise ValueError("The create and update ratios cannot exceed 1.")
+    counts['unchanged'] = count - counts['create'] - counts['update']
+    return counts
+
+
+def generate_snow_cust_record(rnd, template):
+    city, state, country = rnd.choice(CITIES)
+    record = dict(template)
+    record.update(
+        sys_id=uuid.UUID(int=rnd.getrandbits(128)).hex,
+        name=' '.join(rnd.sample(WORDS, 2)),
+        street='{} {} Street'.format(rnd.randint(1, 999), rnd.choice(WORDS)),
+        city=city,
+        state=state,
+        zip=str(rnd.randint(1000, 9999)),
+        country=country,
+        latitude='{:.6f}'.format(rnd.uniform(-45, 45)),
+        longitude='{:.6f}'.format(rnd.uniform(100, 180)),
+    )
+    record['u_sysid'] = record['sys_id']
+    return record
+
+
+def generate_monit_org_record(rnd, template, org_id, snow_cust_record=None):
+    uri = '/api/organization/{}'.format(org_id)
+    details = json.loads(json.dumps(template['details']))
+    details['logs']['URI'] = '{}/log/?hide_filterinfo=1&limit=1000'.format(uri)
+    details['notes']['URI'] = '{}/note/?hide_filterinfo=1&limit=1000'.format(uri)
+    details['date_edit'] = str(1600000000 + rnd.randint(0, 30000000))
+    if snow_cust_record is not None:
+        for snow_cust_field, monit_org_field in FIELD_MAPPINGS.items():
+            details[monit_org_field] = snow_cust_record[snow_cust_field]
+    else:
+        details['crm_id'] = ''
+        details['company'] = ' '.join(rnd.sample(WORDS, 2))
+
+    return {'uri': uri, 'details': details}
+
+
+class JSONArrayFileWriter:
+    # Writes a JSON array one element at a time.
+    def __init__(self, fpath):
+        self.file = open(fpath, 'w')
+        self.count = 0
+
+    def write(self, record):
+        self.file.write(',\n' if self.count else '[\n')
+        self.file.write(json.dumps(record))
+        self.count += 1
+
+    def close(self):
+        self.file.write('\n]' if self.count else '[]')
+        self.file.close()
+
+
+def write_synthetic_exports(directory, count, ratios=None, seed=0):
+    # Write snow-customers.json and monitoring-orgs.json with `count` ServiceNow customers
+    # to the directory. Returns the paths and the expected task counts.
+    counts = get_counts(count, ratios)
+    rnd = random.Random(seed)
+    snow_cust_template, monit_org_template = get_templates()
+    os.makedirs(directory, exist_ok=True)
+    snow_cust_fpath = os.path.join(directory, 'snow-customers.json')
+    monit_orgs_fpath = os.path.join(directory, 'monitoring-orgs.json')
+
+    snow_cust_writer = JSONArrayFileWriter(snow_cust_fpath)
+    monit_orgs_writer = JSONArrayFileWriter(monit_orgs_fpath)
+    # Customers are, in order: unchanged, to be updated, then to be created.
+    for index in range(count):
+        snow_cust_record = generate_snow_cust_record(rnd, snow_cust_template)
+        snow_cust_writer.write(snow_cust_record)
+        if index >= counts['unchanged'] + counts['update']:
+            continue
+
+        monit_org_record = generate_monit_org_record(
+            rnd, monit_org_template, index + 1, snow_cust_record
+        )
+        if index >= counts['unchanged']:
+            monit_org_record['details']['company'] += ' (old name)'
+        monit_orgs_writer.write(monit_org_record)
+
+    org_id = count
+    for _ in range(counts['delete']):
+        org_id += 1
+        monit_org_record = generate_monit_org_record(
+            rnd,
+            monit_org_template,
+            org_id,
+            generate_snow_cust_record(rnd, snow_cust_template),
+        )
+        monit_orgs_writer.write(monit_org_record)
+    for _ in range(counts['no_crm_id']):
+        org_id += 1
+        monit_orgs_writer.write(generate_monit_org_record(rnd, monit_org_template, org_id))
+
+    snow_cust_writer.close()
+    monit_orgs_writer.close()
+
+    return {
+        'snow_cust_fpath': snow_cust_fpath,
+        'monit_orgs_fpath': monit_orgs_fpath,
+        'expected_task_counts': {
+            'create': counts['create'],
+            'update': counts['update'],
+            'delete': counts['delete'],
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('count', type=int, help="Number of ServiceNow customers.")
+    parser.add_argument('directory', help="Output directory of the exports.")
+    parser.add_argument('--seed', type=int, default=0)
+    for action, ratio in DEFAULT_RATIOS.items():
+        parser.add_argument(f'--{action.replace("_", "-")}-ratio', type=float, default=ratio)
+    args = parser.parse_args()
+
+    ratios = {action: getattr(args, f'{action}_ratio') for action in DEFAULT_RATIOS}
+    result = write_synthetic_exports(args.directory, args.count, ratios, args.seed)
+    print(json.dumps(result, indent=4, separators=(',', ': ')))
+
+
+if __name__ == '__main__':
+    main()
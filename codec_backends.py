@@ -0,0 +1,205 @@
+"""
+Pluggable (de)serialization backends of the reconciliation inputs and outputs. JSON is parsed and
+produced by the fastest installed backend (orjson, then ujson, then the standard library json),
+YAML with the libyaml CSafeLoader/CSafeDumper when PyYAML was built with it, and msgpack is
+available as a compact binary format. Every backend produces the same output as the standard
+library json module: the accelerated ones fall back to it for what they do not support (indents
+other than 2 are re-indented, non-ASCII output is escaped like json.dumps does). Floats are the
+exception: orjson writes 1e+16 as 1e16 and NaN/Infinity as null, which the string fields of the
+reconciliation never hold.
+"""
+
+import json
+import os
+
+from collections.abc import Mapping
+
+from record_loader import project_record
+
+JSON_BACKENDS = ('orjson', 'ujson', 'json')
+CODEC_FORMATS = {
+    '.json': 'json',
+    '.yml': 'yaml',
+    '.yaml': 'yaml',
+    '.msgpack': 'msgpack',
+    '.mpk': 'msgpack',
+}
+# Placeholder of an indentation level while re-indenting (escaped in JSON strings).
+INDENT_PLACEHOLDER = '\x00'
+
+
+def reindent(content, indent):
+    # Re-indent a 2 spaces indented JSON document with str.replace passes (one per
+    # nesting level), which is much faster than a regex substitution callback. JSON
+    # strings cannot contain raw newlines, so every leading space of a line is indentation.
+    content = content.replace('\n  ', '\n' + INDENT_PLACEHOLDER)
+    nested_indent = INDENT_PLACEHOLDER + '  '
+    while nested_indent in content:
+        content = content.replace(nested_indent, INDENT_PLACEHOLDER * 2)
+    return content.replace(INDENT_PLACEHOLDER, ' ' * indent)
+
+
+def to_builtin(obj):
+    # Mappings such as MappedRecord are serialized as dicts.
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JSONCodec:
+    # Standard library json. dumps() follows the layout of the task outputs:
+    # json.dumps(obj, indent=indent, separators=(',', ': ')), or compact without indent.
+    name = 'json'
+    fmt = 'json'
+    binary = False
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj, indent=None):
+        if indent is None:
+            return json.dumps(obj, separators=(',', ':'), default=to_builtin)
+        return json.dumps(
+            obj, indent=indent, separators=(',', ': '), default=to_builtin
+        )
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+        self.loads = orjson.loads
+
+    def dumps(self, obj, indent=None):
+        if indent is not None and indent <= 0:
+            return super(OrjsonCodec, self).dumps(obj, indent)
+        option = self.orjson.OPT_INDENT_2 if indent else 0
+        try:
+            content = self.orjson.dumps(obj, default=to_builtin, option=option).decode()
+        except TypeError:
+            # Non-str keys, integers above 64 bits, ...
+            return super(OrjsonCodec, self).dumps(obj, indent)
+        if not content.isascii():
+            return super(OrjsonCodec, self).dumps(obj, indent)
+        if indent and indent != 2:
+            content = reindent(content, indent)
+        return content
+
+
+class UjsonCodec(JSONCodec):
+    # ujson's indented layout differs from json's one, only compact output is produced
+    # with it.
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+
+        self.ujson = ujson
+        self.loads = ujson.loads
+
+    def dumps(self, obj, indent=None):
+        if indent is not None:
+            return super(UjsonCodec, self).dumps(obj, indent)
+        try:
+            return self.ujson.dumps(
+                obj, ensure_ascii=True, escape_forward_slashes=False, default=to_builtin
+            )
+        except (TypeError, OverflowError):
+            return super(UjsonCodec, self).dumps(obj, indent)
+
+
+JSON_CODECS = {'orjson': OrjsonCodec, 'ujson': UjsonCodec, 'json': JSONCodec}
+
+
+class YAMLCodec:
+    fmt = 'yaml'
+    binary = False
+
+    def __init__(self):
+        import yaml
+
+        self.yaml = yaml
+        self.loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        self.dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+        self.name = 'libyaml' if self.loader is not yaml.SafeLoader else 'yaml'
+
+    def loads(self, data):
+        return self.yaml.load(data, Loader=self.loader)
+
+    def dumps(self, obj, indent=None):
+        return self.yaml.dump(
+            obj, Dumper=self.dumper, indent=indent, sort_keys=False, allow_unicode=True
+        )
+
+
+class MsgpackCodec:
+    name = 'msgpack'
+    fmt = 'msgpack'
+    binary = True
+
+    def __init__(self):
+        import msgpack
+
+        self.msgpack = msgpack
+
+    def loads(self, data):
+        return self.msgpack.unpackb(data, raw=False)
+
+    def dumps(self, obj, indent=None):
+        return self.msgpack.packb(obj, use_bin_type=True, default=to_builtin)
+
+
+def get_json_codec(backend=None):
+    # The first installed backend of JSON_BACKENDS, or the given one (ImportError when
+    # it is not installed).
+    if backend is not None:
+        if backend not in JSON_CODECS:
+            raise ValueError(f"JSON backend not supported: {backend}")
+        return JSON_CODECS[backend]()
+
+    for backend in JSON_BACKENDS:
+        try:
+            return JSON_CODECS[backend]()
+        except ImportError:
+            continue
+
+
+def get_codec(fmt='json', backend=None):
+    if fmt == 'json':
+        return get_json_codec(backend)
+    if fmt == 'yaml':
+        return YAMLCodec()
+    if fmt == 'msgpack':
+        return MsgpackCodec()
+    raise ValueError(f"Codec format not supported: {fmt}")
+
+
+def get_codec_for_path(fpath, backend=None):
+    # Codec of a file, by its extension.
+    extension = os.path.splitext(fpath)[1].lower()
+    if extension not in CODEC_FORMATS:
+        raise ValueError(f"No codec for the extension of {fpath}")
+    return get_codec(CODEC_FORMATS[extension], backend)
+
+
+def load_records(fpath, fields=None, codec=None, interner=None):
+    # Yield the records of a whole export (a JSON/YAML/msgpack array) parsed in one go by
+    # the codec of its extension, which is faster than the incremental JSON loader but
+    # holds the parsed export in memory until it is consumed.
+    codec = codec or get_codec_for_path(fpath)
+    with open(fpath, 'rb') as f:
+        data = f.read()
+    records = codec.loads(data) or []
+    del data
+    # Consumed records are dropped from the parsed export.
+    records.reverse()
+    while records:
+        record = records.pop()
+        if fields is not None:
+            record = project_record(record, fields)
+        if interner is not None:
+            interner.intern_record(record)
+        yield record
@@ -0,0 +1,143 @@
+"""
+Per-record diagnostics of the reconciliation (organizations to be updated or deleted). Instead of
+formatting and writing one log line per record, RecordDiagnostics counts the records per action,
+keeps the first samples of each action for a bounded summary and only formats the per-record
+messages when they are enabled and their log level is. BackgroundLogging moves the writing of the
+log records to a QueueListener thread, so that slow handlers never block the diff loop.
+"""
+
+import logging
+import queue
+
+DEFAULT_SAMPLE_SIZE = 10
+# Per-record messages of the engines: update (crm_id, changed fields), delete (crm_id).
+UPDATE_MESSAGE = "Monitoring org: [crm_id: %s] is to be updated with new details: %s"
+DELETE_MESSAGE = "Monitoring org: [crm_id: %s] is not found in ServiceNow customer records. This is candidate for deletion."  # NOQA
+LOGGER_METHODS = {logging.DEBUG: 'debug', logging.INFO: 'info', logging.WARNING: 'warn'}
+
+
+def get_logging_logger(logger):
+    # The standard library logger behind a logger wrapper (an object with a `logging`
+    # attribute, being either the logging module or a logging.Logger), if any.
+    if isinstance(logger, logging.Logger):
+        return logger
+    wrapped = getattr(logger, 'logging', None)
+    if wrapped is logging:
+        return logging.getLogger()
+    if isinstance(wrapped, logging.Logger):
+        return wrapped
+    return None
+
+
+def is_enabled_for(logger, level):
+    # Loggers whose level cannot be determined are assumed to log everything.
+    logging_logger = get_logging_logger(logger)
+    return logging_logger is None or logging_logger.isEnabledFor(level)
+
+
+class RecordDiagnostics:
+    # per_record=False only keeps the counts and samples of the bounded summary, which is
+    # logged once with log_summary().
+    def __init__(self, logger, sample_size=DEFAULT_SAMPLE_SIZE, per_record=True):
+        self.logger = logger
+        self.sample_size = sample_size
+        self.per_record = per_record
+        self.counts = {}
+        self.samples = {}
+        # Log levels are resolved once, not for every record.
+        self._enabled = {
+            level: per_record and is_enabled_for(logger, level)
+            for level in LOGGER_METHODS
+        }
+
+    def spawn(self, logger):
+        # Empty diagnostics with the same settings, e.g. for a worker process.
+        return type(self)(logger, self.sample_size, self.per_record)
+
+    def record(self, action, level, msg, *args):
+        # msg is %-formatted with args, only for the first samples of the action and when
+        # the per-record message is logged.
+        count = self.counts.get(action, 0)
+        self.counts[action] = count + 1
+        enabled = self._enabled[level]
+        if count < self.sample_size:
+            message = msg % args
+            self.samples.setdefault(action, []).append(message)
+            if enabled:
+                getattr(self.logger, LOGGER_METHODS[level])(message)
+        elif enabled:
+            getattr(self.logger, LOGGER_METHODS[level])(msg % args)
+
+    def merge(self, other):
+        for action, count in other.counts.items():
+            self.counts[action] = self.counts.get(action, 0) + count
+            samples = self.samples.setdefault(action, [])
+            samples.extend(other.samples.get(action, [])[: self.sample_size - len(samples)])
+
+    def reset(self):
+        self.counts = {}
+        self.samples = {}
+
+    def summary(self):
+        return {
+            action: {'count': count, 'samples': list(self.samples.get(action, []))}
+            for action, count in self.counts.items()
+        }
+
+    def log_summary(self):
+        for action, count in self.counts.items():
+            samples = self.samples.get(action, [])
+            self.logger.info(
+                f"Diagnostics of {action} : {count} record(s), first {len(samples)} sample(s): {samples}"  # NOQA
+            )
+
+
+class BackgroundLogging:
+    # Replace the handlers of the logger's standard library logger by a QueueHandler while
+    # active; the original handlers are run by a QueueListener thread. stop() (or leaving
+    # the context) flushes the queue and restores the handlers.
+    #
+    #     with BackgroundLogging(logger):
+    #         manager.prepare_reconciliation_tasks()
+    def __init__(self, logger):
+        self.logging_logger = get_logging_logger(logger)
+        if self.logging_logger is None:
+            raise ValueError("Background logging needs a standard library logger.")
+        self.queue = queue.SimpleQueue()
+        self.handlers = []
+        self.queue_handler = None
+        self.listener = None
+
+    def start(self):
+        # logging.handlers is only imported by the runs which log in the background.
+        from logging.handlers import QueueHandler, QueueListener
+
+        if self.listener is not None:
+            return self
+        self.handlers = list(self.logging_logger.handlers)
+        for handler in self.handlers:
+            self.logging_logger.removeHandler(handler)
+        self.queue_handler = QueueHandler(self.queue)
+        self.logging_logger.addHandler(self.queue_handler)
+        self.listener = QueueListener(
+            self.queue, *self.handlers, respect_handler_level=True
+        )
+        self.listener.start()
+        return self
+
+    def stop(self):
+        if self.listener is None:
+            return
+        self.logging_logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.handlers:
+            self.logging_logger.addHandler(handler)
+        self.listener = None
+        self.queue_handler = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
@@ -0,0 +1,303 @@
+"""
+Out-of-core reconciliation for exports larger than the memory. Both projected inputs are sorted
+by sys_id/crm_id with an external merge sort (sorted runs spilled to temporary files whenever the
+buffered records reach the memory budget), and a single streaming merge-join of the two sorted
+streams emits the create, update and delete tasks. Every task is spilled again with the position
+of the record it originates from, so that the tasks are output in the same order as the ones of
+ReconciliationManager.prepare_reconciliation_tasks, with the same semantics (duplicated sys_ids
+keep the position of their first occurrence and the values of their last one, orgs without
+crm_id are ignored, duplicated crm_ids only match once).
+"""
+
+import heapq
+import json
+import tempfile
+
+from operator import itemgetter
+
+from codec_backends import get_json_codec
+from field_mappings import MONIT_ORG_FIELDS
+from mapped_record import MappedRecord
+from record_loader import project_record
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# Maximum number of runs merged at once (open spill files).
+DEFAULT_FAN_IN = 64
+# Approximate memory taken by a buffered entry besides its serialized line.
+ENTRY_OVERHEAD = 120
+
+
+def get_sort_key(key):
+    # sys_ids and crm_ids are strings; other JSON values are sorted after them, by their
+    # JSON representation.
+    return key if isinstance(key, str) else '\uffff' + json.dumps(key, sort_keys=True)
+
+
+class MemoryBudget:
+    # Memory budget shared by the ExternalSorters of a reconciliation. Whenever their
+    # buffered entries reach the limit, the largest buffer which is not being iterated is
+    # spilled, so that the sorters together hold about limit bytes of entries.
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.sorters = []
+
+    def reserve(self, size):
+        self.used += size
+        self.make_room(0)
+
+    def make_room(self, size):
+        # Spill the largest buffers until size bytes of the budget are free, or until no
+        # buffer can be spilled.
+        while self.used + size >= self.limit:
+            spillable_sorters = [
+                sorter
+                for sorter in self.sorters
+                if sorter.buffer_bytes and not sorter.iterating
+            ]
+            if not spillable_sorters:
+                return
+            max(spillable_sorters, key=lambda sorter: sorter.buffer_bytes)._spill()
+
+    def release(self, size):
+        self.used -= size
+
+
+class ExternalSorter:
+    # Sorts (key, item) entries, whose keys are tuples of JSON values and items are JSON
+    # values, holding at most memory_budget bytes (approximately) of entries in memory.
+    # memory_budget is a number of bytes or a MemoryBudget shared with other sorters.
+    def __init__(
+        self,
+        memory_budget=DEFAULT_MEMORY_BUDGET,
+        spill_dpath=None,
+        fan_in=DEFAULT_FAN_IN,
+        codec=None,
+    ):
+        if not isinstance(memory_budget, MemoryBudget):
+            memory_budget = MemoryBudget(memory_budget)
+        self.memory_budget = memory_budget
+        memory_budget.sorters.append(self)
+        self.spill_dpath = spill_dpath
+        self.fan_in = fan_in
+        self.codec = codec or get_json_codec()
+        self.buffer = []
+        self.buffer_bytes = 0
+        # Set while the sorted entries are iterated, the buffer can no longer be spilled.
+        self.iterating = False
+        self.runs = []
+        self.spilled_runs = 0
+
+    def add(self, key, item):
+        line = self.codec.dumps([key, item])
+        self.buffer.append((key, line))
+        size = len(line) + ENTRY_OVERHEAD
+        self.buffer_bytes += size
+        self.memory_budget.reserve(size)
+
+    def _new_run(self):
+        self.spilled_runs += 1
+        return tempfile.TemporaryFile('w+', encoding='utf-8', dir=self.spill_dpath)
+
+    def _spill(self):
+        self.buffer.sort(key=itemgetter(0))
+        run = self._new_run()
+        for _, line in self.buffer:
+            run.write(line)
+            run.write('\n')
+        self.runs.append(run)
+        self.buffer = []
+        self._release_buffer()
+
+    def _release_buffer(self):
+        self.memory_budget.release(self.buffer_bytes)
+        self.buffer_bytes = 0
+
+    def _iter_run(self, run):
+        run.seek(0)
+        loads = self.codec.loads
+        for line in run:
+            key, item = loads(line)
+            yield tuple(key), item
+
+    def _merge_runs(self, runs):
+        return heapq.merge(*[self._iter_run(run) for run in runs], key=itemgetter(0))
+
+    def __iter__(self):
+        # Sorted entries. The sorter is single use.
+        self.iterating = True
+        if not self.runs:
+            self.buffer.sort(key=itemgetter(0))
+            loads = self.codec.loads
+            try:
+                for key, line in self.buffer:
+                    yield key, loads(line)[1]
+            finally:
+                self.close()
+            return
+
+        if self.buffer:
+            self._spill()
+        # Multi-pass merge when there are more runs than files to merge at once.
+        while len(self.runs) > self.fan_in:
+            runs, self.runs = self.runs[: self.fan_in], self.runs[self.fan_in :]
+            merged_run = self._new_run()
+            for key, item in self._merge_runs(runs):
+                merged_run.write(self.codec.dumps([key, item]))
+                merged_run.write('\n')
+            for run in runs:
+                run.close()
+            self.runs.append(merged_run)
+        try:
+            yield from self._merge_runs(self.runs)
+        finally:
+            self.close()
+
+    def close(self):
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.buffer = []
+        self._release_buffer()
+
+
+class PositionedTaskSpill:
+    # Task writer of the manager during the merge-join: tasks are spilled with the
+    # position of the record they originate from, to be output in the serial order
+    # afterwards. Updates and deletes follow the monitoring orgs, creates the ServiceNow
+    # customers.
+    def __init__(self, monit_org_task_sorter, create_task_sorter):
+        self.monit_org_task_sorter = monit_org_task_sorter
+        self.create_task_sorter = create_task_sorter
+        self.position = None
+
+    def write_task(self, action, task):
+        if action == 'create':
+            self.create_task_sorter.add((self.position,), task)
+        else:
+            self.monit_org_task_sorter.add((self.position,), [action, task])
+
+
+def iter_snow_cust_groups(snow_cust_sorter):
+    # (sort key, first position, values of the last occurrence) per sys_id.
+    group_key = group_position = group_values = None
+    for (sort_key, position), values in snow_cust_sorter:
+        if sort_key != group_key:
+            if group_key is not None:
+                yield group_key, group_position, group_values
+            group_key, group_position = sort_key, position
+        group_values = values
+    if group_key is not None:
+        yield group_key, group_position, group_values
+
+
+def prepare_external_reconciliation_tasks(manager, memory_budget=None, spill_dpath=None):
+    if memory_budget is None:
+        memory_budget = DEFAULT_MEMORY_BUDGET
+    manager.logger.info(
+        f"Preparing reconciliation tasks out of core (memory budget: {memory_budget} bytes)..."  # NOQA
+    )
+    # The sorters share one budget: the ServiceNow customers can use all of it, then the
+    # monitoring orgs spill the customers' buffer when they need the room, and the task
+    # sorters share what the inputs do not hold during the merge-join.
+    budget = MemoryBudget(memory_budget)
+    snow_cust_sorter = ExternalSorter(budget, spill_dpath)
+    monit_org_sorter = ExternalSorter(budget, spill_dpath)
+    monit_org_task_sorter = ExternalSorter(budget, spill_dpath)
+    create_task_sorter = ExternalSorter(budget, spill_dpath)
+    sorters = [snow_cust_sorter, monit_org_sorter, monit_org_task_sorter, create_task_sorter]
+
+    task_writer = manager.task_writer
+    try:
+        with manager.metrics.phase('mapping') as phase:
+            for position, snow_cust_record in enumerate(manager.snow_cust_data):
+                mapped_record = manager._map_snow_cust_record(snow_cust_record)
+                snow_cust_sorter.add(
+                    (get_sort_key(snow_cust_record['sys_id']), position),
+                    mapped_record.values_tuple(),
+                )
+                phase.records += 1
+
+        with manager.metrics.phase('sorting') as phase:
+            for position, monit_org_record in enumerate(manager.monit_orgs):
+                phase.records += 1
+                # Monitoring orgs without crm_id are ignored.
+                crm_id = monit_org_record.get('details', {}).get('crm_id')
+                if crm_id:
+                    # Only the mapped fields of the details are compared.
+                    monit_org_sorter.add(
+                        (get_sort_key(crm_id), position),
+                        {
+                            'uri': monit_org_record.get('uri'),
+                            'details': project_record(
+                                monit_org_record['details'], MONIT_ORG_FIELDS
+                            ),
+                        },
+                    )
+
+        # The inputs buffered in memory are iterated during the merge-join, where they
+        # can no longer be spilled: half of the budget is kept for the task sorters.
+        budget.make_room(memory_budget // 2)
+        task_spill = PositionedTaskSpill(monit_org_task_sorter, create_task_sorter)
+        manager.task_writer = task_spill
+        with manager.metrics.phase('matching') as phase:
+            snow_cust_groups = iter_snow_cust_groups(snow_cust_sorter)
+            snow_cust_group = next(snow_cust_groups, None)
+            for (sort_key, position), monit_org_record in monit_org_sorter:
+                phase.records += 1
+                # ServiceNow customers before the crm_id have no org: creates.
+                while snow_cust_group is not None and snow_cust_group[0] < sort_key:
+                    task_spill.position = snow_cust_group[1]
+                    manager._add_create_task(get_mapped_record(manager, snow_cust_group))
+                    snow_cust_group = next(snow_cust_groups, None)
+
+                # Only the first org of a crm_id is matched, the following ones are
+                # deleted.
+                snow_cust_to_monit_org = {}
+                if snow_cust_group is not None and snow_cust_group[0] == sort_key:
+                    snow_cust_to_monit_org[
+                        monit_org_record['details']['crm_id']
+                    ] = get_mapped_record(manager, snow_cust_group)
+                    snow_cust_group = next(snow_cust_groups, None)
+                task_spill.position = position
+                manager._check_monit_org_for_update_or_delete(
+                    snow_cust_to_monit_org, monit_org_record
+                )
+
+            while snow_cust_group is not None:
+                task_spill.position = snow_cust_group[1]
+                manager._add_create_task(get_mapped_record(manager, snow_cust_group))
+                snow_cust_group = next(snow_cust_groups, None)
+        manager.task_writer = task_writer
+
+        # Tasks in the serial order: updates and deletes by monitoring org position, then
+        # the creates by ServiceNow customer position.
+        with manager.metrics.phase('ordering') as phase:
+            for _, (action, task) in monit_org_task_sorter:
+                output_task(manager, action, task)
+                phase.records += 1
+            for _, task in create_task_sorter:
+                output_task(manager, 'create', task)
+                phase.records += 1
+    finally:
+        manager.task_writer = task_writer
+        for sorter in sorters:
+            sorter.close()
+
+    spilled_runs = sum(sorter.spilled_runs for sorter in sorters)
+    manager.metrics.set('spilled_runs', spilled_runs)
+    manager.logger.info(f"Spilled sorted runs : {spilled_runs}.")
+    # All the tasks are output: only the logs and stats are left to finalize.
+    return manager._finalize_reconciliation_tasks({})
+
+
+def get_mapped_record(manager, snow_cust_group):
+    return MappedRecord(manager.interner.intern_values(snow_cust_group[2]))
+
+
+def output_task(manager, action, task):
+    # The tasks were counted when they were spilled.
+    if manager.task_writer is not None:
+        manager.task_writer.write_task(action, task)
+    else:
+        manager.tasks[action].append(task)
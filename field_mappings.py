@@ -0,0 +1,26 @@
+"""
+The mapping of the ServiceNow customer fields to the Monitoring organization fields of interest,
+and the field sets derived from it.
+"""
+
+FIELD_MAPPINGS = {
+    'sys_id': 'crm_id',
+    'name': 'company',
+    'street': 'address',
+    'city': 'city',
+    'state': 'state',
+    'zip': 'zip',
+    'country': 'country',
+    'latitude': 'latitude',
+    'longitude': 'longitude',
+}
+SNOW_CUST_FIELDS = tuple(FIELD_MAPPINGS.keys())
+MONIT_ORG_FIELDS = tuple(FIELD_MAPPINGS.values())
+# Fields that change whenever a record is edited, used as cheap change hints.
+SNOW_CUST_CHANGE_HINT_FIELD = 'sys_updated_on'
+MONIT_ORG_CHANGE_HINT_FIELD = 'date_edit'
+SNOW_CUST_PROJECTION = SNOW_CUST_FIELDS + (SNOW_CUST_CHANGE_HINT_FIELD,)
+MONIT_ORG_PROJECTION = {
+    'uri': None,
+    'details': MONIT_ORG_FIELDS + (MONIT_ORG_CHANGE_HINT_FIELD,),
+}
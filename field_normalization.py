@@ -0,0 +1,220 @@
+"""
+Field-level normalization of the fields of interest, so that representation differences between
+ServiceNow and the Monitoring system (country "AU" vs "Australia", coordinates with another
+precision, trailing whitespace, case) are not reported as updates. The per-field rules are
+compiled once into comparator functions, the normalized form of every distinct value is cached,
+and comparators only run for values that are not already equal.
+"""
+
+DEFAULT_CACHE_SIZE = 100000
+DEFAULT_COORDINATE_TOLERANCE = 1e-6
+
+# ISO 3166-1 alpha-2 codes by their usual names and alpha-3 codes (casefolded).
+COUNTRY_CODES = {}
+for code, *aliases in (
+    ('AR', 'ARG', 'Argentina'),
+    ('AT', 'AUT', 'Austria'),
+    ('AU', 'AUS', 'Australia'),
+    ('BE', 'BEL', 'Belgium'),
+    ('BR', 'BRA', 'Brazil'),
+    ('CA', 'CAN', 'Canada'),
+    ('CH', 'CHE', 'Switzerland'),
+    ('CL', 'CHL', 'Chile'),
+    ('CN', 'CHN', 'China'),
+    ('CZ', 'CZE', 'Czech Republic', 'Czechia'),
+    ('DE', 'DEU', 'Germany'),
+    ('DK', 'DNK', 'Denmark'),
+    ('ES', 'ESP', 'Spain'),
+    ('FI', 'FIN', 'Finland'),
+    ('FJ', 'FJI', 'Fiji'),
+    ('FR', 'FRA', 'France'),
+    ('GB', 'GBR', 'UK', 'United Kingdom', 'Great Britain'),
+    ('HK', 'HKG', 'Hong Kong'),
+    ('ID', 'IDN', 'Indonesia'),
+    ('IE', 'IRL', 'Ireland'),
+    ('IL', 'ISR', 'Israel'),
+    ('IN', 'IND', 'India'),
+    ('IT', 'ITA', 'Italy'),
+    ('JP', 'JPN', 'Japan'),
+    ('KR', 'KOR', 'South Korea', 'Korea, Republic of'),
+    ('MX', 'MEX', 'Mexico'),
+    ('MY', 'MYS', 'Malaysia'),
+    ('NL', 'NLD', 'Netherlands', 'The Netherlands'),
+    ('NO', 'NOR', 'Norway'),
+    ('NZ', 'NZL', 'New Zealand'),
+    ('PG', 'PNG', 'Papua New Guinea'),
+    ('PH', 'PHL', 'Philippines'),
+    ('PL', 'POL', 'Poland'),
+    ('PT', 'PRT', 'Portugal'),
+    ('SE', 'SWE', 'Sweden'),
+    ('SG', 'SGP', 'Singapore'),
+    ('TH', 'THA', 'Thailand'),
+    ('TW', 'TWN', 'Taiwan'),
+    ('US', 'USA', 'United States', 'United States of America'),
+    ('VN', 'VNM', 'Vietnam', 'Viet Nam'),
+    ('ZA', 'ZAF', 'South Africa'),
+):
+    for alias in (code, *aliases):
+        COUNTRY_CODES[alias.casefold()] = code
+
+# Australian state and territory abbreviations by their names (casefolded).
+AU_STATE_CODES = {}
+for code, name in (
+    ('ACT', 'Australian Capital Territory'),
+    ('NSW', 'New South Wales'),
+    ('NT', 'Northern Territory'),
+    ('QLD', 'Queensland'),
+    ('SA', 'South Australia'),
+    ('TAS', 'Tasmania'),
+    ('VIC', 'Victoria'),
+    ('WA', 'Western Australia'),
+):
+    AU_STATE_CODES[code.casefold()] = code
+    AU_STATE_CODES[name.casefold()] = code
+
+# Rules per monitoring org field: a list of steps applied in order. Steps are names of
+# NORMALIZATION_STEPS, ('aliases', {casefolded value: normalized value}), ('float',
+# tolerance) as the last step, or module-level functions (to stay picklable).
+DEFAULT_NORMALIZATION_RULES = {
+    'company': ['strip', 'collapse_whitespace'],
+    'address': ['strip', 'collapse_whitespace', 'casefold'],
+    'city': ['strip', 'collapse_whitespace', 'casefold'],
+    'state': ['strip', 'collapse_whitespace', 'au_state', 'casefold'],
+    'zip': ['strip'],
+    'country': ['strip', 'collapse_whitespace', 'country'],
+    'latitude': ['strip', ('float', DEFAULT_COORDINATE_TOLERANCE)],
+    'longitude': ['strip', ('float', DEFAULT_COORDINATE_TOLERANCE)],
+}
+
+
+def strip(value):
+    return value.strip()
+
+
+def collapse_whitespace(value):
+    return ' '.join(value.split())
+
+
+def casefold(value):
+    return value.casefold()
+
+
+def get_alias_step(aliases):
+    def alias_step(value):
+        return aliases.get(value.casefold(), value)
+
+    return alias_step
+
+
+NORMALIZATION_STEPS = {
+    'strip': strip,
+    'collapse_whitespace': collapse_whitespace,
+    'casefold': casefold,
+    'country': get_alias_step(COUNTRY_CODES),
+    'au_state': get_alias_step(AU_STATE_CODES),
+}
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def compile_key(steps, cache_size):
+    # Function of a value to its normalized form, cached per distinct value. Only strings
+    # are normalized; other values are their own normalized form.
+    functions = []
+    for step in steps:
+        if callable(step):
+            functions.append(step)
+        elif isinstance(step, tuple) and step[0] == 'aliases':
+            functions.append(
+                get_alias_step({key.casefold(): value for key, value in step[1].items()})
+            )
+        else:
+            functions.append(NORMALIZATION_STEPS[step])
+
+    cache = {}
+
+    def key(value):
+        try:
+            return cache[value]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable values are not cached.
+            return value
+        normalized = value
+        if isinstance(value, str):
+            for function in functions:
+                normalized = function(normalized)
+        if len(cache) < cache_size:
+            cache[value] = normalized
+        return normalized
+
+    return key
+
+
+def compile_comparator(steps, cache_size):
+    # Function telling whether two (unequal) values are equal once normalized.
+    tolerance = None
+    if steps and isinstance(steps[-1], tuple) and steps[-1][0] == 'float':
+        tolerance = steps[-1][1]
+        steps = steps[:-1]
+    key = compile_key(steps, cache_size)
+    if tolerance is None:
+        return lambda value, other_value: key(value) == key(other_value)
+
+    float_cache = {}
+
+    def float_key(value):
+        try:
+            return float_cache[value]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable values are not cached.
+            return value, to_float(value)
+        normalized = key(value)
+        result = (normalized, to_float(normalized))
+        if len(float_cache) < cache_size:
+            float_cache[value] = result
+        return result
+
+    def comparator(value, other_value):
+        normalized, number = float_key(value)
+        other_normalized, other_number = float_key(other_value)
+        if number is not None and other_number is not None:
+            return abs(number - other_number) <= tolerance
+        return normalized == other_normalized
+
+    return comparator
+
+
+class FieldNormalizer:
+    # normalizer.equal(field, snow_cust_value, monit_org_value). Fields without rules are
+    # compared as they are.
+    def __init__(self, rules=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.rules = DEFAULT_NORMALIZATION_RULES if rules is None else rules
+        self.cache_size = cache_size
+        self.comparators = {
+            field: compile_comparator(list(steps), cache_size)
+            for field, steps in self.rules.items()
+        }
+        # Unequal values found equal once normalized, per field.
+        self.stats = {}
+
+    def equal(self, field, value, other_value):
+        if value == other_value:
+            return True
+        comparator = self.comparators.get(field)
+        if comparator is None or not comparator(value, other_value):
+            return False
+        self.stats[field] = self.stats.get(field, 0) + 1
+        return True
+
+    def __reduce__(self):
+        # The compiled comparators are rebuilt from the rules, e.g. in worker processes.
+        return (type(self), (self.rules, self.cache_size))
@@ -1,23 +1,53 @@
-from datetime import datetime
-import inspect
+from functools import wraps
+from time import perf_counter_ns
+import logging
 
 
-def log_time(msg=None):
+class StandardLogger:
+    # Logger of the interface used across the package (debug, info, warn and error) over a
+    # standard library logger, e.g. for the CLIs and the worker processes.
+    def __init__(self, name='ReconciliationManager'):
+        self.logging = logging.getLogger(name)
+
+    def debug(self, message):
+        self.logging.debug(message)
+
+    def info(self, message):
+        self.logging.info(message)
+
+    def warn(self, message):
+        self.logging.warning(message)
+
+    def error(self, message):
+        self.logging.error(message)
+
+
+def get_logger(args, f):
+    # The logger of the decorated method's object, if any. Otherwise the module logger of
+    # the decorated function.
+    if args and hasattr(args[0], 'logger'):
+        return args[0].logger
+    return logging.getLogger(f.__module__)
+
+
+def log_time(msg=None, phase=None):
+    # Log the time spent in the decorated function and, given a phase name and when the
+    # decorated method's object has a MetricsCollector (metrics attribute), record it as
+    # that phase. Functions timed by explicit metrics phases do not need one.
     def decorator(f):
         nonlocal msg
         if msg is None:
             msg = '{} time spent: '.format(f.__name__)
 
+        @wraps(f)
         def inner(*args, **kwargs):
-            # check if the object has a logger
-            global logger
-            if args and hasattr(args[0], 'logger'):
-                logger = args[0].logger
-            start = datetime.now()
+            start = perf_counter_ns()
             result = f(*args, **kwargs)
-            logger.info(
-                msg + ' {} seconds'.format((datetime.now() - start).total_seconds())
-            )
+            elapsed_ns = perf_counter_ns() - start
+            metrics = getattr(args[0], 'metrics', None) if phase and args else None
+            if metrics is not None:
+                metrics.add(phase, elapsed_ns)
+            get_logger(args, f).info(msg + ' {} seconds'.format(elapsed_ns / 1e9))
             return result
 
         return inner
@@ -26,11 +56,15 @@ def log_time(msg=None):
 
 
 def log_params(f):
-    arg_spec = inspect.getargspec(f).args
+    # Imported here, inspect is slow to import and only needed by this decorator.
+    import inspect
+
+    arg_spec = inspect.getfullargspec(f).args
     has_self = arg_spec and arg_spec[0] == 'self'
 
+    @wraps(f)
     def decorator(*args, **kwargs):
-        logger.info(
+        get_logger(args, f).info(
             'calling {} with args: {}, and kwargs: {}'.format(
                 f.__name__, args if not has_self else args[1:], kwargs
             )
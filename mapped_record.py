@@ -0,0 +1,131 @@
+"""
+A compact representation of a ServiceNow customer record mapped to the Monitoring organization's
+fields of interest. Instead of a dict repeating the field names of FIELD_MAPPINGS in every record,
+the values are kept in a tuple following the FIELD_MAPPINGS order. Records behave as read-only
+mappings (and compare equal to the equivalent dicts), and are converted to dicts with to_dict() at
+the output boundary.
+"""
+
+import gc
+
+from collections.abc import Mapping
+from contextlib import contextmanager
+from operator import itemgetter
+
+from field_mappings import MONIT_ORG_FIELDS, SNOW_CUST_FIELDS
+from value_interner import INTERNED_FIELD_INDEXES
+
+FIELD_INDEXES = {field: index for index, field in enumerate(MONIT_ORG_FIELDS)}
+get_snow_cust_values = itemgetter(*SNOW_CUST_FIELDS)
+get_monit_org_values = itemgetter(*MONIT_ORG_FIELDS)
+
+
+class MappedRecord(Mapping):
+    # The mapping phase creates one record per ServiceNow customer: records are built
+    # from the tuple of the itemgetter, and values(), items(), get() and to_dict() work
+    # on the tuple directly rather than through the Mapping mixin methods.
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        self._values = tuple(values)
+
+    @classmethod
+    def from_snow_cust_record(cls, snow_cust_record, interned_values=None):
+        # Map a ServiceNow customer record. When interned_values (a ValueInterner or a
+        # dict) is given, equal values of the interned fields are stored as one shared
+        # object.
+        values = get_snow_cust_values(snow_cust_record)
+        if interned_values is not None:
+            if type(interned_values) is dict:
+                values = list(values)
+                for index in INTERNED_FIELD_INDEXES:
+                    value = values[index]
+                    values[index] = interned_values.setdefault(value, value)
+                values = tuple(values)
+            else:
+                values = interned_values.intern_values(values)
+
+        record = new_object(cls)
+        record._values = values
+        return record
+
+    def __getitem__(self, field):
+        return self._values[FIELD_INDEXES[field]]
+
+    def get(self, field, default=None):
+        index = FIELD_INDEXES.get(field)
+        return default if index is None else self._values[index]
+
+    def __contains__(self, field):
+        return field in FIELD_INDEXES
+
+    def __iter__(self):
+        return iter(MONIT_ORG_FIELDS)
+
+    def __len__(self):
+        return len(MONIT_ORG_FIELDS)
+
+    def values(self):
+        return self._values
+
+    def items(self):
+        return tuple(zip(MONIT_ORG_FIELDS, self._values))
+
+    def __eq__(self, other):
+        if type(other) is MappedRecord:
+            return self._values == other._values
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.to_dict())
+
+    def __reduce__(self):
+        return (type(self), (self._values,))
+
+    def values_tuple(self):
+        # Values of the fields in FIELD_MAPPINGS order.
+        return self._values
+
+    def to_dict(self):
+        return dict(zip(MONIT_ORG_FIELDS, self._values))
+
+
+new_object = object.__new__
+
+
+def get_mapped_record_values(record):
+    # Values of the fields of interest of a mapped ServiceNow record or of a monitoring
+    # org's details, in FIELD_MAPPINGS order (None for missing fields). Equal values
+    # tuples mean that no update is needed. An exact type check, as isinstance() against
+    # a Mapping subclass is slow on this per-record path.
+    if type(record) is MappedRecord:
+        return record._values
+    try:
+        return get_monit_org_values(record)
+    except KeyError:
+        return tuple(record.get(field) for field in MONIT_ORG_FIELDS)
+
+
+def get_mapped_record_dict(record):
+    # Task dict of a mapped ServiceNow record (or copy of a dict record).
+    if type(record) is MappedRecord:
+        return dict(zip(MONIT_ORG_FIELDS, record._values))
+    return dict(record)
+
+
+@contextmanager
+def paused_gc():
+    # MappedRecords are tracked by the cyclic garbage collector, so mapping a large export
+    # triggers full collections that traverse the records mapped so far and the loaded
+    # inputs, again and again. The records form no reference cycles, so the automatic
+    # collection is paused while they are built and matched, and restored afterwards.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
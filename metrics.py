@@ -0,0 +1,246 @@
+"""
+Structured metrics of a reconciliation run. A MetricsCollector aggregates per-phase timings
+(monotonic perf_counter_ns), record counts and memory deltas, plus labelled counters, and can be
+queried as a dict or exported as JSON or Prometheus text once the run is over. Recording an event
+only updates a few integers under a lock, so the collector can be left on in production; all
+the formatting happens at export time.
+"""
+
+import json
+import sys
+import threading
+import tracemalloc
+
+from time import perf_counter_ns
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+# ru_maxrss is in bytes on macOS and in kilobytes on Linux.
+MAXRSS_UNIT_BYTES = 1 if sys.platform == 'darwin' else 1024
+
+
+def get_peak_rss_bytes():
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAXRSS_UNIT_BYTES
+
+
+def get_traced_memory_bytes():
+    # Only meaningful (and only cheap) when tracemalloc is already tracing.
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+
+class PhaseTimer:
+    # Context manager measuring one occurrence of a phase. The number of records processed
+    # during the phase can be set on the timer before it exits.
+    __slots__ = ('collector', 'name', 'records', 'start', 'peak_rss', 'traced_memory')
+
+    def __init__(self, collector, name, records=0):
+        self.collector = collector
+        self.name = name
+        self.records = records
+
+    def __enter__(self):
+        self.peak_rss = get_peak_rss_bytes()
+        self.traced_memory = get_traced_memory_bytes()
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed_ns = perf_counter_ns() - self.start
+        traced_memory = get_traced_memory_bytes()
+        self.collector.add(
+            self.name,
+            elapsed_ns,
+            self.records,
+            get_peak_rss_bytes() - self.peak_rss,
+            traced_memory - self.traced_memory
+            if traced_memory is not None and self.traced_memory is not None
+            else 0,
+        )
+        return False
+
+
+class ProfiledPhaseTimer(PhaseTimer):
+    # Phase timer of a collector with a profiler (see profiling.PhaseProfiler), which
+    # profiles the phase and records its peak traced memory.
+    __slots__ = ('profiled_phase',)
+
+    def __enter__(self):
+        self.profiled_phase = self.collector.profiler.start_phase(self.name)
+        return super(ProfiledPhaseTimer, self).__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super(ProfiledPhaseTimer, self).__exit__(exc_type, exc_value, traceback)
+        result = self.collector.profiler.stop_phase(self.profiled_phase)
+        peak = self.collector.get_gauge('phase_peak_traced_bytes', phase=self.name)
+        if peak is None or result['peak_traced_bytes'] > peak:
+            self.collector.set_gauge(
+                'phase_peak_traced_bytes', result['peak_traced_bytes'], phase=self.name
+            )
+        return False
+
+
+class MetricsCollector:
+    # profiler (a profiling.PhaseProfiler) profiles every phase; without it, phases only
+    # cost their timer.
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self._lock = threading.Lock()
+        # phase -> [calls, total_ns, min_ns, max_ns, records, peak_rss_delta, traced_delta]
+        self._phases = {}
+        # (name, sorted label items) -> value
+        self._counters = {}
+        self._gauges = {}
+
+    def phase(self, name, records=0):
+        # with metrics.phase('mapping') as phase: ...; phase.records = count
+        if self.profiler is None:
+            return PhaseTimer(self, name, records)
+        return ProfiledPhaseTimer(self, name, records)
+
+    def add(self, name, elapsed_ns, records=0, peak_rss_delta=0, traced_memory_delta=0):
+        # Record one occurrence of a phase that took elapsed_ns nanoseconds. Per-record
+        # timings (e.g. the diffing) are accumulated by the caller and added once per run,
+        # a call taking a lock.
+        with self._lock:
+            stats = self._phases.get(name)
+            if stats is None:
+                self._phases[name] = [
+                    1,
+                    elapsed_ns,
+                    elapsed_ns,
+                    elapsed_ns,
+                    records,
+                    peak_rss_delta,
+                    traced_memory_delta,
+                ]
+                return
+            stats[0] += 1
+            stats[1] += elapsed_ns
+            if elapsed_ns < stats[2]:
+                stats[2] = elapsed_ns
+            if elapsed_ns > stats[3]:
+                stats[3] = elapsed_ns
+            stats[4] += records
+            stats[5] += peak_rss_delta
+            stats[6] += traced_memory_delta
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._counters[(name, tuple(sorted(labels.items())))] = value
+
+    def set_gauge(self, name, value, **labels):
+        # Gauges hold the last value set, e.g. a queue depth.
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def reset(self):
+        with self._lock:
+            self._phases.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    def get_phase(self, name):
+        stats = self.as_dict()['phases'].get(name)
+        if stats is None:
+            raise KeyError(f"No metrics recorded for phase {name}.")
+        return stats
+
+    def get_counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def get_gauge(self, name, **labels):
+        with self._lock:
+            return self._gauges.get((name, tuple(sorted(labels.items()))))
+
+    def as_dict(self):
+        with self._lock:
+            phases = {name: list(stats) for name, stats in self._phases.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        return {
+            'phases': {
+                name: {
+                    'calls': calls,
+                    'total_ns': total_ns,
+                    'min_ns': min_ns,
+                    'max_ns': max_ns,
+                    'mean_ns': total_ns // calls,
+                    'records': records,
+                    'peak_rss_delta_bytes': peak_rss_delta,
+                    'traced_memory_delta_bytes': traced_memory_delta,
+                }
+                for name, (
+                    calls,
+                    total_ns,
+                    min_ns,
+                    max_ns,
+                    records,
+                    peak_rss_delta,
+                    traced_memory_delta,
+                ) in phases.items()
+            },
+            'counters': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in counters.items()
+            ],
+            'gauges': [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in gauges.items()
+            ],
+        }
+
+    def to_json(self, indent=4):
+        return json.dumps(self.as_dict(), indent=indent, separators=(',', ': '))
+
+    def to_prometheus(self, prefix='reconciliation'):
+        # Prometheus text exposition format (version 0.0.4).
+        metrics = self.as_dict()
+        lines = []
+        phase_metrics = [
+            ('phase_calls_total', 'counter', "Occurrences of the phase.", 'calls'),
+            ('phase_seconds_total', 'counter', "Time spent in the phase.", 'total_ns'),
+            ('phase_records_total', 'counter', "Records processed by the phase.", 'records'),
+            (
+                'phase_peak_rss_delta_bytes',
+                'gauge',
+                "Growth of the peak RSS during the phase.",
+                'peak_rss_delta_bytes',
+            ),
+        ]
+        for metric, metric_type, help_text, field in phase_metrics:
+            lines.append(f'# HELP {prefix}_{metric} {help_text}')
+            lines.append(f'# TYPE {prefix}_{metric} {metric_type}')
+            for name, stats in sorted(metrics['phases'].items()):
+                value = stats[field] / 1e9 if field == 'total_ns' else stats[field]
+                lines.append(f'{prefix}_{metric}{{phase="{escape_label(name)}"}} {value}')
+
+        for kind, metric_type in (('counters', 'counter'), ('gauges', 'gauge')):
+            for name in sorted({metric['name'] for metric in metrics[kind]}):
+                lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+                for metric in metrics[kind]:
+                    if metric['name'] != name:
+                        continue
+                    labels = ','.join(
+                        f'{label}="{escape_label(value)}"'
+                        for label, value in metric['labels'].items()
+                    )
+                    labels = f'{{{labels}}}' if labels else ''
+                    lines.append(f"{prefix}_{name}{labels} {metric['value']}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
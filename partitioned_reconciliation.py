@@ -0,0 +1,268 @@
+"""
+Partitioned execution of the reconciliation. Both inputs are hash-partitioned by sys_id/crm_id
+into shards which are reconciled in parallel by a process pool. The partitions are lists of the
+positions of the records: the workers are forked and inherit the inputs, so that each of them
+maps and compares the records of its shard without receiving them, and only returns its tasks.
+Every task is tagged with the position of the record it originates from, so that merging the
+per-shard results gives exactly the same tasks, in the same order, as the serial reconciliation.
+"""
+
+import heapq
+import os
+
+from bisect import bisect_left
+from itertools import compress, repeat
+from operator import itemgetter
+
+from logger_decorator import StandardLogger
+from mapped_record import paused_gc
+
+# Inputs of the reconciliation, set while the pool workers are forked (see
+# reconcile_inherited_shard).
+inherited_inputs = None
+
+
+def get_default_shard_count():
+    return os.cpu_count() or 1
+
+
+def get_shard(key, shard_count):
+    # Only computed in the parent process, so the built-in hash (salted per process) can be
+    # used. Equal keys (e.g. 1 and 1.0) get the same shard, like they get the same entry of
+    # the sys_id keyed dict.
+    return hash(key) % shard_count
+
+
+def partition_positions(keys, shard_count):
+    # Positions of the keys of every shard, in input order. The positions are sorted by
+    # shard (the sort is stable) and split, rather than appended one by one.
+    shards = list(map(get_shard, keys, repeat(shard_count)))
+    positions = sorted(range(len(keys)), key=shards.__getitem__)
+    sorted_shards = list(map(shards.__getitem__, positions))
+    bounds = [bisect_left(sorted_shards, shard) for shard in range(shard_count + 1)]
+    return [positions[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+class PositionedTasks:
+    # Task writer of a shard's manager: updates and deletes are kept with the position of
+    # the monitoring org they originate from.
+    def __init__(self):
+        self.position = None
+        self.tasks = {'update': [], 'delete': []}
+
+    def write_task(self, action, task):
+        self.tasks[action].append((self.position, task))
+
+
+def reconcile_shard(
+    manager_cls,
+    snow_cust_records,
+    monit_orgs,
+    snow_cust_positions=None,
+    monit_org_positions=None,
+    diagnostics=None,
+    normalizer=None,
+):
+    # Reconcile the records of one shard, at the given positions of the inputs (all of
+    # them by default), in input order.
+    # Returns the positioned tasks of the shard (the updates, the uris of the deletes and,
+    # for the creates, the positions of the first and last occurrences of the ServiceNow
+    # customers), its fingerprint stats, diagnostics, normalizer stats and diffing time.
+    if snow_cust_positions is None:
+        snow_cust_positions = range(len(snow_cust_records))
+    if monit_org_positions is None:
+        monit_org_positions = range(len(monit_orgs))
+    positioned_tasks = PositionedTasks()
+    manager = manager_cls(
+        StandardLogger(),
+        (),
+        (),
+        task_writer=positioned_tasks,
+        diagnostics=diagnostics,
+        normalizer=normalizer,
+    )
+    with paused_gc():
+        # Duplicated sys_ids keep the position of their first occurrence and the values of
+        # their last one.
+        snow_cust_to_monit_org = {}
+        first_positions = {}
+        last_positions = {}
+        for position in snow_cust_positions:
+            snow_cust_record = snow_cust_records[position]
+            sys_id = snow_cust_record['sys_id']
+            snow_cust_to_monit_org[sys_id] = manager._map_snow_cust_record(snow_cust_record)
+            first_positions.setdefault(sys_id, position)
+            last_positions[sys_id] = position
+
+        for position in monit_org_positions:
+            monit_org_record = monit_orgs[position]
+            # Monitoring orgs without crm_id are ignored.
+            if monit_org_record.get('details', {}).get('crm_id'):
+                positioned_tasks.position = position
+                manager._check_monit_org_for_update_or_delete(
+                    snow_cust_to_monit_org, monit_org_record
+                )
+
+    positioned_tasks.tasks['create'] = [
+        (first_positions[sys_id], last_positions[sys_id])
+        for sys_id in snow_cust_to_monit_org
+    ]
+    normalizer_stats = manager.normalizer.stats if normalizer is not None else {}
+    return (
+        positioned_tasks.tasks,
+        manager.fingerprint_stats,
+        manager.diagnostics,
+        normalizer_stats,
+        manager.diffing_ns,
+    )
+
+
+def reconcile_inherited_shard(manager_cls, shard, diagnostics, normalizer):
+    # reconcile_shard in a forked worker, on the inputs and partitions inherited from the
+    # parent.
+    snow_cust_records, monit_orgs, snow_cust_shards, monit_org_shards = inherited_inputs
+    return reconcile_shard(
+        manager_cls,
+        snow_cust_records,
+        monit_orgs,
+        snow_cust_shards[shard],
+        monit_org_shards[shard],
+        diagnostics,
+        normalizer,
+    )
+
+
+def get_fork_context():
+    # Imported here so that importing the module (e.g. for get_default_shard_count) does
+    # not load multiprocessing.
+    import multiprocessing
+
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context('fork')
+
+
+def prepare_partitioned_reconciliation_tasks(manager, shard_count=None):
+    # Reconcile the shards of the manager's inputs in a process pool and hand the merged
+    # tasks over to the manager (so that task writers and counters apply as usual).
+    global inherited_inputs
+
+    shard_count = shard_count or get_default_shard_count()
+    fork_context = get_fork_context() if shard_count > 1 else None
+    if shard_count > 1 and fork_context is None:
+        manager.logger.warn(
+            "Processes cannot be forked on this platform, reconciling a single partition."
+        )
+        shard_count = 1
+    manager.logger.info(
+        f"Preparing reconciliation tasks across {shard_count} partition(s)..."
+    )
+
+    # The only serial work before the workers start: streamed inputs are consumed into
+    # lists and the positions of the records are partitioned, without copying or mapping
+    # the records.
+    with manager.metrics.phase('partitioning') as phase, paused_gc():
+        snow_cust_records = manager.snow_cust_data
+        if not isinstance(snow_cust_records, list):
+            snow_cust_records = list(snow_cust_records)
+        monit_orgs = manager.monit_orgs
+        if not isinstance(monit_orgs, list):
+            monit_orgs = list(monit_orgs)
+        phase.records = len(snow_cust_records) + len(monit_orgs)
+
+        if shard_count > 1:
+            snow_cust_shards = partition_positions(
+                list(map(itemgetter('sys_id'), snow_cust_records)), shard_count
+            )
+            # Monitoring orgs without crm_id are ignored.
+            crm_ids = [
+                monit_org_record.get('details', {}).get('crm_id')
+                for monit_org_record in monit_orgs
+            ]
+            linked_positions = list(compress(range(len(crm_ids)), crm_ids))
+            monit_org_shards = [
+                list(map(linked_positions.__getitem__, shard_positions))
+                for shard_positions in partition_positions(
+                    list(map(crm_ids.__getitem__, linked_positions)), shard_count
+                )
+            ]
+
+    manager_cls = type(manager)
+    # Forked workers inherit the paused collector, which would otherwise traverse the
+    # loaded inputs they inherit too.
+    with manager.metrics.phase('matching') as phase, paused_gc():
+        phase.records = len(monit_orgs)
+        if shard_count == 1:
+            shard_results = [
+                reconcile_shard(
+                    manager_cls,
+                    snow_cust_records,
+                    monit_orgs,
+                    diagnostics=manager.diagnostics.spawn(StandardLogger()),
+                    normalizer=manager.normalizer,
+                )
+            ]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            inherited_inputs = (
+                snow_cust_records,
+                monit_orgs,
+                snow_cust_shards,
+                monit_org_shards,
+            )
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=shard_count, mp_context=fork_context
+                ) as executor:
+                    futures = [
+                        executor.submit(
+                            reconcile_inherited_shard,
+                            manager_cls,
+                            shard,
+                            manager.diagnostics.spawn(StandardLogger()),
+                            manager.normalizer,
+                        )
+                        for shard in range(shard_count)
+                    ]
+                    shard_results = [future.result() for future in futures]
+            finally:
+                inherited_inputs = None
+
+    for _, fingerprint_stats, diagnostics, normalizer_stats, diffing_ns in shard_results:
+        for key, count in fingerprint_stats.items():
+            manager.fingerprint_stats[key] += count
+        manager.diffing_ns += diffing_ns
+        manager.diagnostics.merge(diagnostics)
+        if shard_count > 1:
+            # The in-process shard shares the manager's normalizer.
+            for field, count in normalizer_stats.items():
+                manager.normalizer.stats[field] = (
+                    manager.normalizer.stats.get(field, 0) + count
+                )
+
+    # Each shard's tasks are already sorted by position, so a k-way merge restores the
+    # serial order of every action.
+    with manager.metrics.phase('ordering') as phase:
+        for action in ('update', 'delete'):
+            merged_tasks = heapq.merge(
+                *[positioned_tasks[action] for positioned_tasks, *_ in shard_results],
+                key=lambda positioned_task: positioned_task[0],
+            )
+            for _, task in merged_tasks:
+                manager._add_task(action, task)
+                phase.records += 1
+        for _, last_position in heapq.merge(
+            *[positioned_tasks['create'] for positioned_tasks, *_ in shard_results]
+        ):
+            manager._add_create_task(
+                manager._map_snow_cust_record(snow_cust_records[last_position])
+            )
+            phase.records += 1
+
+    manager.logger.info(
+        f"Prepared total of reconciliation tasks : {manager.task_counts}."
+    )
+    manager._report_task_stats()
+
+    return manager.tasks
@@ -0,0 +1,205 @@
+"""
+Pipelined reconciliation. The ServiceNow records are first ingested into the mapped index, then
+the monitoring orgs are read ahead by a prefetch thread and streamed through the matching stage,
+while the update/delete tasks it emits flow through a bounded queue to a sink thread (a TaskWriter
+or a TaskApplier) as soon as they are produced. The creates follow at the end of the stream. The
+stages run concurrently, and bounded queues make a slow stage hold back the ones before it
+instead of piling up records in memory. Queue depths are recorded as metrics gauges.
+"""
+
+import queue
+import threading
+
+from time import perf_counter_ns
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_PREFETCH_SIZE = 1000
+# Polling interval of the blocked queue operations, to notice a failed stage.
+POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class PipelineAborted(Exception):
+    pass
+
+
+class BoundedQueue:
+    # queue.Queue whose blocking operations give up once the pipeline is aborted. The
+    # depth and the time spent blocked on a full queue (backpressure) are recorded.
+    def __init__(self, name, maxsize, aborted, metrics):
+        self.name = name
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.aborted = aborted
+        self.metrics = metrics
+        self.max_depth = 0
+
+    def put(self, item):
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        try:
+            self.queue.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+
+        start = perf_counter_ns()
+        while True:
+            if self.aborted.is_set():
+                raise PipelineAborted(f"Pipeline aborted while writing to {self.name}.")
+            try:
+                self.queue.put(item, timeout=POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        self.metrics.add(f'{self.name}_queue_full_wait', perf_counter_ns() - start, 1)
+
+    def get(self):
+        while True:
+            if self.aborted.is_set():
+                raise PipelineAborted(f"Pipeline aborted while reading from {self.name}.")
+            try:
+                return self.queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            if item is _DONE:
+                return
+            yield item
+
+    def record_depths(self):
+        self.metrics.set_gauge('queue_depth', self.queue.qsize(), queue=self.name)
+        self.metrics.set_gauge('queue_max_depth', self.max_depth, queue=self.name)
+        self.metrics.set_gauge('queue_size', self.queue.maxsize, queue=self.name)
+
+
+class QueueTaskWriter:
+    # Task writer of the manager during a pipeline run: tasks go to the tasks queue.
+    def __init__(self, tasks_queue):
+        self.tasks_queue = tasks_queue
+
+    def write_task(self, action, task):
+        self.tasks_queue.put((action, task))
+
+
+class WriterSink:
+    # Writes the tasks to a TaskWriter, which is closed at the end of the stream (and
+    # aborted if the pipeline fails).
+    def __init__(self, task_writer):
+        self.task_writer = task_writer
+
+    def consume(self, task_stream):
+        for action, task in task_stream:
+            self.task_writer.write_task(action, task)
+        self.task_writer.close()
+        return dict(self.task_writer.counts)
+
+    def abort(self):
+        self.task_writer.abort()
+
+
+class ApplierSink:
+    # Applies the tasks against the monitoring API as they come.
+    def __init__(self, task_applier):
+        self.task_applier = task_applier
+
+    def consume(self, task_stream):
+        return self.task_applier.apply_stream(task_stream)
+
+    def abort(self):
+        pass
+
+
+def get_sink(sink):
+    # TaskWriter and TaskApplier objects are wrapped in their sink.
+    if hasattr(sink, 'consume'):
+        return sink
+    if hasattr(sink, 'apply_stream'):
+        return ApplierSink(sink)
+    if hasattr(sink, 'write_task'):
+        return WriterSink(sink)
+    raise TypeError(f"Unsupported pipeline sink: {sink!r}")
+
+
+class StageThread(threading.Thread):
+    # Runs a stage, keeping its result or exception. A failure aborts the pipeline.
+    def __init__(self, name, target, aborted):
+        super(StageThread, self).__init__(name=name, daemon=True)
+        self.stage_target = target
+        self.aborted = aborted
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.stage_target()
+        except BaseException as e:
+            self.error = e
+            self.aborted.set()
+
+
+def prefetch(iterable, records_queue):
+    for record in iterable:
+        records_queue.put(record)
+    records_queue.put(_DONE)
+
+
+def run_reconciliation_pipeline(
+    manager, sink, queue_size=DEFAULT_QUEUE_SIZE, prefetch_size=DEFAULT_PREFETCH_SIZE
+):
+    # Same tasks as prepare_reconciliation_tasks, streamed to the sink in the same order.
+    # Returns {'task_counts': ..., 'sink': <result of the sink>} where the result is the
+    # TaskWriter's counts or the TaskApplier's report.
+    sink = get_sink(sink)
+    metrics = manager.metrics
+    aborted = threading.Event()
+    monit_orgs_queue = BoundedQueue('monit_orgs', prefetch_size, aborted, metrics)
+    tasks_queue = BoundedQueue('tasks', queue_size, aborted, metrics)
+
+    manager.logger.info("Running the reconciliation pipeline...")
+    task_writer = manager.task_writer
+    manager.task_writer = QueueTaskWriter(tasks_queue)
+    sink_thread = StageThread(
+        'pipeline-sink', lambda: sink.consume(iter(tasks_queue)), aborted
+    )
+    # The monitoring orgs are read ahead while the ServiceNow records are mapped.
+    prefetch_thread = StageThread(
+        'pipeline-prefetch',
+        lambda: prefetch(manager.monit_orgs, monit_orgs_queue),
+        aborted,
+    )
+    sink_thread.start()
+    prefetch_thread.start()
+    try:
+        # The mapped index needs every ServiceNow record before any match can be made.
+        snow_cust_to_monit_org = manager._get_mapped_snow_cust_to_monit_org()
+        manager._match_monit_orgs(snow_cust_to_monit_org, monit_orgs_queue)
+        manager._finalize_reconciliation_tasks(snow_cust_to_monit_org)
+        tasks_queue.put(_DONE)
+    except BaseException:
+        aborted.set()
+        raise
+    finally:
+        manager.task_writer = task_writer
+        prefetch_thread.join()
+        sink_thread.join()
+        monit_orgs_queue.record_depths()
+        tasks_queue.record_depths()
+        if aborted.is_set():
+            sink.abort()
+        # The failure of a stage is the cause of the others (PipelineAborted).
+        for thread in (prefetch_thread, sink_thread):
+            if thread.error is not None and not isinstance(thread.error, PipelineAborted):
+                raise thread.error
+
+    max_depths = {
+        'monit_orgs': monit_orgs_queue.max_depth,
+        'tasks': tasks_queue.max_depth,
+    }
+    manager.logger.info(f"Pipeline queues max depths : {max_depths}.")
+
+    return {'task_counts': dict(manager.task_counts), 'sink': sink_thread.result}
@@ -0,0 +1,163 @@
+"""
+Opt-in profiling of the reconciliation phases. A PhaseProfiler given to the MetricsCollector of a
+run (MetricsCollector(profiler=PhaseProfiler(directory))) wraps every phase recorded through
+metrics.phase() (mapping, matching, sorting, writing, ...) with cProfile and tracemalloc, and
+writes for each occurrence of a phase a .pstats file (for pstats / snakeviz) and a report of the
+top allocations made during the phase, plus a profile.json summary with the time and the peak
+traced memory of every phase. Streamed inputs are loaded, and streamed tasks serialized, by the
+phase consuming or producing them.
+
+Without a profiler, metrics.phase() returns the plain PhaseTimer and this module is not even
+imported, so the profiling mode costs nothing when it is disabled. When it is enabled, cProfile
+and tracemalloc slow the run down several times: the phase timings of a profiled run are only
+meaningful relative to each other. Only the thread entering a phase is profiled by cProfile.
+"""
+
+import cProfile
+import json
+import os
+import threading
+import tracemalloc
+
+from time import perf_counter_ns
+
+DEFAULT_TOP_ALLOCATIONS = 25
+DEFAULT_TRACE_FRAMES = 1
+SUMMARY_FNAME = 'profile.json'
+# Allocations of the profiling machinery are left out of the reports.
+IGNORED_FILENAMES = (tracemalloc.__file__, cProfile.__file__, '<frozen importlib._bootstrap>')
+
+
+class ProfiledPhase:
+    __slots__ = ('name', 'index', 'profile', 'start', 'start_memory', 'snapshot', 'peak')
+
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+        self.profile = cProfile.Profile()
+        self.peak = 0
+
+
+class PhaseProfiler:
+    # Profiles the phases entered through a MetricsCollector. A phase nested in another
+    # one of the same thread pauses the profile of the enclosing phase, so that each
+    # .pstats only holds its own phase's calls, while the peak memory of the enclosing
+    # phase includes the nested ones. Phases of other threads are profiled separately.
+    def __init__(
+        self,
+        directory,
+        top_allocations=DEFAULT_TOP_ALLOCATIONS,
+        trace_frames=DEFAULT_TRACE_FRAMES,
+    ):
+        self.directory = directory
+        self.top_allocations = top_allocations
+        self.trace_frames = trace_frames
+        self.lock = threading.Lock()
+        # Active phases of all the threads, and the stack of phases of each thread.
+        self.active = []
+        self.local = threading.local()
+        self.count = 0
+        self.started_tracing = False
+        self.results = []
+        os.makedirs(directory, exist_ok=True)
+
+    def _update_peaks(self):
+        # Fold the peak traced memory since the last update into the active phases.
+        _, peak = tracemalloc.get_traced_memory()
+        for phase in self.active:
+            if peak > phase.peak:
+                phase.peak = peak
+        tracemalloc.reset_peak()
+
+    def get_stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def start_phase(self, name):
+        stack = self.get_stack()
+        if stack:
+            stack[-1].profile.disable()
+        with self.lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.trace_frames)
+                self.started_tracing = True
+            self.count += 1
+            phase = ProfiledPhase(name, self.count)
+            phase.snapshot = tracemalloc.take_snapshot()
+            self._update_peaks()
+            phase.start_memory = tracemalloc.get_traced_memory()[0]
+            self.active.append(phase)
+            stack.append(phase)
+            phase.start = perf_counter_ns()
+            phase.profile.enable()
+            return phase
+
+    def stop_phase(self, phase):
+        phase.profile.disable()
+        elapsed_ns = perf_counter_ns() - phase.start
+        stack = self.get_stack()
+        stack.remove(phase)
+        with self.lock:
+            self._update_peaks()
+            self.active.remove(phase)
+            snapshot = tracemalloc.take_snapshot()
+            result = self._write_reports(phase, snapshot, elapsed_ns)
+            self.results.append(result)
+            if not self.active and self.started_tracing:
+                tracemalloc.stop()
+                self.started_tracing = False
+        if stack:
+            stack[-1].profile.enable()
+        return result
+
+    def _write_reports(self, phase, snapshot, elapsed_ns):
+        peak_bytes = max(phase.peak - phase.start_memory, 0)
+        prefix = os.path.join(self.directory, f'{phase.index:03d}-{phase.name}')
+        phase.profile.dump_stats(prefix + '.pstats')
+
+        filters = [
+            tracemalloc.Filter(False, filename) for filename in IGNORED_FILENAMES
+        ]
+        statistics = snapshot.filter_traces(filters).compare_to(
+            phase.snapshot.filter_traces(filters), 'lineno'
+        )
+        allocations = [stat for stat in statistics if stat.size_diff > 0]
+        lines = [
+            f"Top {self.top_allocations} allocations of phase {phase.name} "
+            f"(peak traced memory: {peak_bytes} bytes above start)",
+        ]
+        lines.extend(str(stat) for stat in allocations[: self.top_allocations])
+        with open(prefix + '.allocations.txt', 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+        return {
+            'phase': phase.name,
+            'index': phase.index,
+            'seconds': elapsed_ns / 1e9,
+            'peak_traced_bytes': peak_bytes,
+            'pstats': prefix + '.pstats',
+            'allocations': prefix + '.allocations.txt',
+        }
+
+    def get_peaks(self):
+        # Highest peak traced memory (above the start of the phase) per phase name.
+        peaks = {}
+        for result in self.results:
+            peaks[result['phase']] = max(
+                peaks.get(result['phase'], 0), result['peak_traced_bytes']
+            )
+        return peaks
+
+    def write_summary(self):
+        fpath = os.path.join(self.directory, SUMMARY_FNAME)
+        with open(fpath, 'w') as f:
+            f.write(
+                json.dumps(
+                    {'phases': self.results, 'peak_traced_bytes': self.get_peaks()},
+                    indent=4,
+                    separators=(',', ': '),
+                )
+            )
+        return fpath
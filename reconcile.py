@@ -0,0 +1,191 @@
+"""
+Command-line entry point of the reconciliation. Reconciles a ServiceNow customer export with a
+monitoring org export (JSON, YAML or msgpack, by extension) and writes the tasks:
+
+    $ python -m reconcile snow-customers.json monitoring-orgs.json -o tasks.json
+    $ python -m reconcile snow.yml orgs.yml -o tasks.jsonl --engine partitioned --normalize
+
+Startup matters when the reconciliation is run by many short cron jobs: only the modules needed
+by the chosen options are imported (PyYAML for YAML inputs, multiprocessing for the partitioned
+engine, an accelerated JSON codec unless --backend json), and nothing at all is imported before
+the arguments are parsed. benchmarks/bench_startup.py tracks the startup time against a budget.
+"""
+
+import argparse
+import os
+import sys
+
+ENGINES = ('default', 'partitioned', 'external', 'indexed', 'pipeline')
+OUTPUT_FORMATS = {'.json': 'json', '.jsonl': 'jsonl', '.msgpack': 'msgpack'}
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m reconcile',
+        description="Reconcile ServiceNow customers with monitoring organizations.",
+    )
+    parser.add_argument('snow_cust_fpath', help="ServiceNow customers export.")
+    parser.add_argument('monit_orgs_fpath', help="Monitoring orgs export.")
+    parser.add_argument(
+        '-o', '--output', default='tasks.json', help="Tasks file (default: tasks.json)."
+    )
+    parser.add_argument(
+        '--format',
+        choices=sorted(set(OUTPUT_FORMATS.values())),
+        help="Tasks format (default: by the output extension, otherwise json).",
+    )
+    parser.add_argument('--indent', type=int, default=4, help="JSON indent (default: 4).")
+    parser.add_argument('--compact', action='store_true', help="Compact JSON output.")
+    parser.add_argument(
+        '--backend',
+        choices=('orjson', 'ujson', 'json'),
+        help="JSON backend (default: the fastest installed one).",
+    )
+    parser.add_argument(
+        '--engine', choices=ENGINES, default='default', help="Reconciliation engine."
+    )
+    parser.add_argument('--shards', type=int, help="Shards of the partitioned engine.")
+    parser.add_argument(
+        '--memory-budget', type=int, help="Memory budget (bytes) of the external engine."
+    )
+    parser.add_argument('--spill-dir', help="Spill files directory of the external engine.")
+    parser.add_argument('--index', help="ServiceNow index file of the indexed engine.")
+    parser.add_argument(
+        '--normalize', action='store_true', help="Compare normalized field values."
+    )
+    parser.add_argument('--cache-dir', help="Result cache directory (default engine).")
+    parser.add_argument('--metrics', help="Write the run metrics to this JSON file.")
+    parser.add_argument(
+        '--profile', help="Write per-phase cProfile and allocation reports here."
+    )
+    parser.add_argument(
+        '--log-level',
+        default='INFO',
+        choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'),
+        help="Log level (default: INFO).",
+    )
+    return parser
+
+
+def get_output_format(args):
+    if args.format:
+        return args.format
+    return OUTPUT_FORMATS.get(os.path.splitext(args.output)[1].lower(), 'json')
+
+
+def get_manager(args, logger, task_writer):
+    from ReconciliationManager import ReconciliationManager
+
+    kwargs = {'task_writer': task_writer}
+    if args.profile:
+        from metrics import MetricsCollector
+        from profiling import PhaseProfiler
+
+        kwargs['metrics'] = MetricsCollector(profiler=PhaseProfiler(args.profile))
+    if args.normalize:
+        from field_normalization import FieldNormalizer
+
+        kwargs['normalizer'] = FieldNormalizer()
+    is_json = all(
+        os.path.splitext(fpath)[1].lower() == '.json'
+        for fpath in (args.snow_cust_fpath, args.monit_orgs_fpath)
+    )
+    if is_json and args.backend is None:
+        # Incremental loader, no codec needed.
+        return ReconciliationManager.from_json_files(
+            logger, args.snow_cust_fpath, args.monit_orgs_fpath, **kwargs
+        )
+    return ReconciliationManager.from_files(
+        logger, args.snow_cust_fpath, args.monit_orgs_fpath, backend=args.backend, **kwargs
+    )
+
+
+def run(args, logger):
+    from codec_backends import get_json_codec
+    from task_writer import TaskWriter
+
+    fmt = get_output_format(args)
+    indent = None if args.compact else args.indent
+    codec = get_json_codec(args.backend) if fmt != 'msgpack' else None
+    if args.engine == 'pipeline':
+        # The pipeline closes its task writer.
+        task_writer = TaskWriter(args.output, fmt=fmt, indent=indent, codec=codec)
+        try:
+            manager = get_manager(args, logger, None)
+        except BaseException:
+            task_writer.abort()
+            raise
+        manager.run_reconciliation_pipeline(task_writer)
+        return manager
+
+    # The result cache stores the tasks of a run, so cached runs prepare the tasks in
+    # memory and write them once prepared instead of streaming them.
+    cached = args.engine == 'default' and args.cache_dir is not None
+    task_writer = TaskWriter(args.output, fmt=fmt, indent=indent, codec=codec)
+    try:
+        manager = get_manager(args, logger, None if cached else task_writer)
+        if args.engine == 'default':
+            result_cache = None
+            if cached:
+                from result_cache import ResultCache
+
+                result_cache = ResultCache(args.cache_dir)
+            manager.prepare_reconciliation_tasks(result_cache=result_cache)
+        elif args.engine == 'partitioned':
+            manager.prepare_partitioned_reconciliation_tasks(shard_count=args.shards)
+        elif args.engine == 'external':
+            manager.prepare_external_reconciliation_tasks(
+                memory_budget=args.memory_budget, spill_dpath=args.spill_dir
+            )
+        else:
+            from snow_cust_index import SnowCustIndex
+
+            with SnowCustIndex.open_or_build(args.snow_cust_fpath, args.index) as index:
+                manager.prepare_indexed_reconciliation_tasks(index)
+    except BaseException:
+        task_writer.abort()
+        raise
+    # Completing the output (e.g. the JSON document of the tasks) is the writing phase.
+    with manager.metrics.phase('writing') as phase:
+        try:
+            if cached:
+                task_writer.write_tasks(manager.tasks)
+            task_writer.close()
+        except BaseException:
+            task_writer.abort()
+            raise
+        phase.records = sum(task_writer.counts.values())
+    return manager
+
+
+def main(argv=None):
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if args.engine == 'indexed' and not args.index:
+        parser.error("the indexed engine needs --index")
+
+    import logging
+
+    from logger_decorator import StandardLogger
+
+    logging.basicConfig(level=args.log_level, format=LOG_FORMAT, stream=sys.stderr)
+    logger = StandardLogger('reconcile')
+    try:
+        manager = run(args, logger)
+    except (OSError, ValueError) as e:
+        logger.error(f"Reconciliation failed: {e!r}")
+        return 1
+
+    if args.metrics:
+        with open(args.metrics, 'w') as f:
+            f.write(manager.metrics.to_json())
+    if args.profile:
+        fpath = manager.metrics.profiler.write_summary()
+        logger.info(f"Wrote the profile of the phases to {fpath}.")
+    logger.info(f"Wrote {manager.task_counts} task(s) to {args.output}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""
+Long-running reconciliation service. The mapped ServiceNow customers (by sys_id) and the
+projected monitoring orgs (by uri, and their uris by crm_id) are indexed once by a full
+reconciliation and kept warm in memory. Single record change events then only reconcile the
+crm_id they touch, with the rules of ReconciliationManager._check_monit_org_for_update_or_delete,
+so that a renamed customer is turned into an update task in constant time instead of a full run
+on fresh exports. A full reconciliation can still be triggered (or run periodically) to correct
+drift. Events are posted as JSON to a local HTTP endpoint:
+
+    $ python reconciliation_service.py snow-customers.json monitoring-orgs.json --port 8080
+    $ curl -d '{"type": "snow_cust_deleted", "sys_id": "..."}' localhost:8080/events
+
+Events are {"type": "snow_cust_upserted", "record": {...}} (a ServiceNow customer record),
+{"type": "snow_cust_deleted", "sys_id": ...}, {"type": "monit_org_changed", "record": {...}}
+(a monitoring org record, with its uri) or {"type": "monit_org_deleted", "uri": ...}.
+"""
+
+import argparse
+import json
+import sys
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ReconciliationManager import ReconciliationManager
+from field_mappings import MONIT_ORG_PROJECTION, SNOW_CUST_PROJECTION
+from logger_decorator import StandardLogger
+from metrics import MetricsCollector
+from record_loader import iter_json_file, project_record
+from value_interner import ValueInterner
+
+EVENT_TYPES = (
+    'snow_cust_upserted',
+    'snow_cust_deleted',
+    'monit_org_changed',
+    'monit_org_deleted',
+)
+
+
+class EventTaskBuffer:
+    # Task writer of the service's managers: collects the tasks of the event (or full
+    # reconciliation) being handled and forwards them to the sink.
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.tasks = []
+
+    def write_task(self, action, task):
+        self.tasks.append({'action': action, 'task': task})
+        if self.sink is not None:
+            self.sink.write_task(action, task)
+
+    def flush(self):
+        tasks, self.tasks = self.tasks, []
+        return tasks
+
+
+class ReconciliationService:
+    # load_inputs returns the ServiceNow customer and monitoring org records of a full
+    # reconciliation (e.g. iterators over the latest exports). Tasks are written to sink
+    # (any object with write_task(action, task), e.g. a QueueTaskWriter) when given, and
+    # returned by handle_event and reconcile. manager_kwargs (metrics, diagnostics,
+    # normalizer) are passed to the ReconciliationManager of the events.
+    def __init__(self, logger, load_inputs, sink=None, **manager_kwargs):
+        self.logger = logger
+        self.load_inputs = load_inputs
+        self.task_buffer = EventTaskBuffer(sink)
+        self.manager_kwargs = manager_kwargs
+        # Shared by the managers of the successive full reconciliations.
+        manager_kwargs.setdefault('interner', ValueInterner())
+        manager_kwargs.setdefault('metrics', MetricsCollector())
+        self.lock = threading.RLock()
+        # Warm indexes.
+        self.snow_custs = {}
+        self.monit_orgs = {}
+        self.monit_org_uris = {}
+        self.event_counts = dict.fromkeys(EVENT_TYPES, 0)
+        self.reconciliations = 0
+        self.manager = self._new_manager()
+
+    @classmethod
+    def from_json_files(cls, logger, snow_cust_fpath, monit_orgs_fpath, **kwargs):
+        # Full reconciliations stream the current content of the export files.
+        def load_inputs():
+            return (
+                iter_json_file(snow_cust_fpath, fields=SNOW_CUST_PROJECTION),
+                iter_json_file(monit_orgs_fpath, fields=MONIT_ORG_PROJECTION),
+            )
+
+        return cls(logger, load_inputs, **kwargs)
+
+    def _new_manager(self):
+        return ReconciliationManager(
+            self.logger,
+            (),
+            (),
+            task_writer=self.task_buffer,
+            **self.manager_kwargs,
+        )
+
+    def reconcile(self):
+        # Full reconciliation of the loaded inputs, rebuilding the warm indexes. Returns
+        # its tasks, the ones of ReconciliationManager.prepare_reconciliation_tasks.
+        with self.lock:
+            snow_cust_data, monit_orgs_data = self.load_inputs()
+            self.manager = manager = self._new_manager()
+            with manager.metrics.phase('mapping') as phase:
+                snow_custs = {}
+                for snow_cust_record in snow_cust_data:
+                    mapped_record = manager._map_snow_cust_record(snow_cust_record)
+                    snow_custs[snow_cust_record['sys_id']] = mapped_record
+                phase.records = len(snow_custs)
+
+            monit_orgs = [
+                project_record(monit_org_record, MONIT_ORG_PROJECTION)
+                for monit_org_record in monit_orgs_data
+            ]
+            self.snow_custs = snow_custs
+            self.monit_orgs = {}
+            self.monit_org_uris = {}
+            for monit_org_record in monit_orgs:
+                if monit_org_record.get('uri') is not None:
+                    self._index_monit_org(monit_org_record)
+
+            remaining_snow_custs = dict(snow_custs)
+            manager._match_monit_orgs(remaining_snow_custs, monit_orgs)
+            manager._finalize_reconciliation_tasks(remaining_snow_custs)
+            self.reconciliations += 1
+            return self.task_buffer.flush()
+
+    def _index_monit_org(self, monit_org_record):
+        # Index a new or changed org. A changed org with the same crm_id keeps its place
+        # among the orgs of the crm_id, which decides the one checked for updates (the
+        # first) and the ones deleted, as in a full reconciliation.
+        uri = monit_org_record['uri']
+        crm_id = monit_org_record.get('details', {}).get('crm_id')
+        previous_record = self.monit_orgs.get(uri)
+        if previous_record is None or (
+            previous_record.get('details', {}).get('crm_id') != crm_id
+        ):
+            self._unindex_monit_org(uri)
+            # Monitoring orgs without crm_id are ignored.
+            if crm_id:
+                self.monit_org_uris.setdefault(crm_id, []).append(uri)
+        self.monit_orgs[uri] = monit_org_record
+        return crm_id
+
+    def _unindex_monit_org(self, uri):
+        # Drop the org of uri, returning its previous crm_id.
+        monit_org_record = self.monit_orgs.pop(uri, None)
+        if monit_org_record is None:
+            return None
+        crm_id = monit_org_record.get('details', {}).get('crm_id')
+        uris = self.monit_org_uris.get(crm_id)
+        if uris:
+            uris.remove(uri)
+            if not uris:
+                del self.monit_org_uris[crm_id]
+        return crm_id
+
+    def _reconcile_crm_id(self, crm_id):
+        # Tasks of a full reconciliation for the ServiceNow customer and the orgs of
+        # crm_id: its first org is checked for updates, the other ones are deleted, and
+        # the customer is created when it has no org.
+        if not crm_id:
+            return
+        snow_cust_record = self.snow_custs.get(crm_id)
+        uris = self.monit_org_uris.get(crm_id)
+        if not uris:
+            if snow_cust_record is not None:
+                self.manager._add_create_task(snow_cust_record)
+            return
+        snow_cust_to_monit_org = {}
+        if snow_cust_record is not None:
+            snow_cust_to_monit_org[crm_id] = snow_cust_record
+        for uri in uris:
+            self.manager._check_monit_org_for_update_or_delete(
+                snow_cust_to_monit_org, self.monit_orgs[uri]
+            )
+
+    def _prepare_event(self, event):
+        # Check an event and map or project its record, raising ValueError, KeyError,
+        # TypeError or AttributeError on an invalid event. A prepared event is applied
+        # without errors, so that the events of a batch are all applied or none is. The
+        # keys of the indexes are checked to be hashable.
+        event_type = event.get('type')
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type: {event_type}")
+        if event_type == 'snow_cust_upserted':
+            snow_cust_record = event['record']
+            hash(snow_cust_record['sys_id'])
+            return event_type, (
+                snow_cust_record['sys_id'],
+                self.manager._map_snow_cust_record(snow_cust_record),
+            )
+        if event_type == 'monit_org_changed':
+            monit_org_record = project_record(event['record'], MONIT_ORG_PROJECTION)
+            if monit_org_record.get('uri') is None:
+                raise ValueError("Monitoring org change events need the org uri.")
+            hash(monit_org_record['uri'])
+            hash(monit_org_record.get('details', {}).get('crm_id'))
+            return event_type, monit_org_record
+        key = event['sys_id' if event_type == 'snow_cust_deleted' else 'uri']
+        hash(key)
+        return event_type, key
+
+    def _apply_event(self, event_type, payload):
+        if event_type == 'snow_cust_upserted':
+            sys_id, mapped_record = payload
+            self.snow_custs[sys_id] = mapped_record
+            crm_ids = [sys_id]
+        elif event_type == 'snow_cust_deleted':
+            self.snow_custs.pop(payload, None)
+            crm_ids = [payload]
+        elif event_type == 'monit_org_changed':
+            previous_record = self.monit_orgs.get(payload['uri'])
+            previous_crm_id = (
+                previous_record.get('details', {}).get('crm_id')
+                if previous_record is not None
+                else None
+            )
+            crm_id = self._index_monit_org(payload)
+            crm_ids = [crm_id]
+            # An org moved away from a crm_id may leave its customer without org.
+            if previous_crm_id and previous_crm_id != crm_id:
+                crm_ids.insert(0, previous_crm_id)
+        else:
+            crm_ids = [self._unindex_monit_org(payload)]
+
+        self.event_counts[event_type] += 1
+        self.manager.metrics.increment('events', type=event_type)
+        for crm_id in crm_ids:
+            self._reconcile_crm_id(crm_id)
+
+    def handle_event(self, event):
+        # Apply a change event to the warm indexes and return the resulting tasks.
+        return self.handle_events([event])
+
+    def handle_events(self, events):
+        # Apply a batch of change events and return the resulting tasks. The batch is
+        # atomic: when an event is invalid, none of them is applied.
+        with self.lock:
+            prepared_events = [self._prepare_event(event) for event in events]
+            for event_type, payload in prepared_events:
+                self._apply_event(event_type, payload)
+            return self.task_buffer.flush()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'snow_custs': len(self.snow_custs),
+                'monit_orgs': len(self.monit_orgs),
+                'events': dict(self.event_counts),
+                'reconciliations': self.reconciliations,
+            }
+
+    def serve(self, host='127.0.0.1', port=8080, reconcile_interval=None):
+        # Serve the HTTP endpoint until interrupted, after a first full reconciliation.
+        # reconcile_interval (seconds) runs periodic full reconciliations.
+        self.reconcile()
+        server = ServiceHTTPServer((host, port), self)
+        stopped = threading.Event()
+        if reconcile_interval:
+
+            def reconcile_periodically():
+                while not stopped.wait(reconcile_interval):
+                    try:
+                        self.reconcile()
+                    except Exception as e:
+                        self.logger.error(f"Periodic full reconciliation failed: {e!r}")
+
+            threading.Thread(target=reconcile_periodically, daemon=True).start()
+        self.logger.info(
+            f"Reconciliation service listening on {host}:{server.server_port}."
+        )
+        try:
+            server.serve_forever()
+        finally:
+            stopped.set()
+            server.server_close()
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    # POST /events (an event or a list of events, applied all or none) and POST /reconcile
+    # return the tasks, GET /stats the sizes of the indexes and the event counts.
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.send_json(200, self.server.service.stats())
+        else:
+            self.send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        service = self.server.service
+        content = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            if self.path == '/events':
+                events = json.loads(content)
+                if isinstance(events, dict):
+                    events = [events]
+                if not isinstance(events, list):
+                    raise ValueError("Events must be an event or a list of events.")
+                tasks = service.handle_events(events)
+            elif self.path == '/reconcile':
+                tasks = service.reconcile()
+            else:
+                self.send_json(404, {'error': 'Not found'})
+                return
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.send_json(400, {'error': repr(e)})
+            return
+        self.send_json(200, {'tasks': tasks})
+
+    def send_json(self, status, content):
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        self.server.service.logger.debug(format % args)
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super(ServiceHTTPServer, self).__init__(address, ServiceRequestHandler)
+        self.service = service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long-running reconciliation service.")
+    parser.add_argument('snow_cust_fpath', help="ServiceNow customers JSON export.")
+    parser.add_argument('monit_orgs_fpath', help="Monitoring orgs JSON export.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument(
+        '--reconcile-interval', type=float, help="Seconds between full reconciliations."
+    )
+    args = parser.parse_args(argv)
+
+    service = ReconciliationService.from_json_files(
+        StandardLogger('ReconciliationService'),
+        args.snow_cust_fpath,
+        args.monit_orgs_fpath,
+    )
+    try:
+        service.serve(args.host, args.port, reconcile_interval=args.reconcile_interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Incremental loader for the JSON exports (ServiceNow customers and Monitoring organizations).
+The top-level JSON array is parsed element by element from a file object or a memory-mapped
+file, so only one record (optionally projected down to the fields of interest) is alive at a time.
+"""
+
+import codecs
+import json
+import mmap
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+
+
+def project_record(record, fields):
+    # Keep only the requested fields of a record. fields is either a sequence of field
+    # names or a dict of field name -> nested fields (None keeps the value as is).
+    if isinstance(fields, dict):
+        projected_record = {}
+        for field, nested_fields in fields.items():
+            if field not in record:
+                continue
+            value = record[field]
+            if nested_fields is not None and isinstance(value, dict):
+                value = project_record(value, nested_fields)
+            projected_record[field] = value
+        return projected_record
+
+    return {field: record[field] for field in fields if field in record}
+
+
+class JSONArrayReader:
+    def __init__(self, fp, fields=None, chunk_size=DEFAULT_CHUNK_SIZE, interner=None):
+        self.fp = fp
+        self.fields = fields
+        self.interner = interner
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.utf8_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read_chunk(self):
+        # Append the next chunk of the file to the buffer, dropping the consumed part.
+        # Returns False when the end of the file is reached.
+        if self.eof:
+            return False
+
+        chunk = self.fp.read(self.chunk_size)
+        while isinstance(chunk, bytes):
+            # A multi-byte character may be split across raw chunks, in which case the
+            # decoder holds it back until the rest of it is read.
+            raw_chunk = chunk
+            chunk = self.utf8_decoder.decode(raw_chunk, final=not raw_chunk)
+            if chunk or not raw_chunk:
+                break
+            chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        # Move to the next non-whitespace character, reading more data when needed.
+        # Returns the character found or None at the end of the file.
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read_chunk():
+                return None
+
+    def _expect(self, chars):
+        char = self._skip_whitespace()
+        if char is None or char not in chars:
+            raise json.JSONDecodeError(
+                f"Expecting one of {chars!r}", self.buffer, self.pos
+            )
+        self.pos += 1
+        return char
+
+    def _decode_value(self):
+        # Decode the next array element. A value cut by the end of the buffer may still
+        # decode (e.g. the number 7.25 read as 7), so it is only accepted once it is
+        # followed by an array delimiter or the end of the file is reached.
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._read_chunk():
+                    raise
+                continue
+
+            next_pos = end
+            while next_pos < len(self.buffer) and self.buffer[next_pos] in WHITESPACE:
+                next_pos += 1
+            if (
+                next_pos < len(self.buffer) and self.buffer[next_pos] in ',]'
+            ) or not self._read_chunk():
+                self.pos = end
+                return value
+
+    def __iter__(self):
+        if self._skip_whitespace() is None:
+            return
+        self._expect('[')
+        if self._skip_whitespace() == ']':
+            self.pos += 1
+            return
+
+        while True:
+            self._skip_whitespace()
+            record = self._decode_value()
+            if self.fields is not None:
+                record = project_record(record, self.fields)
+            if self.interner is not None:
+                self.interner.intern_record(record)
+            yield record
+
+            if self._expect(',]') == ']':
+                return
+
+
+def iter_json_array(fp, fields=None, chunk_size=DEFAULT_CHUNK_SIZE, interner=None):
+    # Yield the elements of the top-level JSON array of a text/binary file object or an
+    # mmap object one at a time. With an interner (a ValueInterner), the repeated values
+    # of its fields are shared between records.
+    return iter(
+        JSONArrayReader(fp, fields=fields, chunk_size=chunk_size, interner=interner)
+    )
+
+
+def iter_json_file(
+    path, fields=None, use_mmap=False, chunk_size=DEFAULT_CHUNK_SIZE, interner=None
+):
+    # Yield the records of a JSON export file. The file is only opened once iteration
+    # starts and is closed as soon as the generator is exhausted or closed.
+    with open(path, 'rb') as f:
+        if not use_mmap:
+            yield from iter_json_array(
+                f, fields=fields, chunk_size=chunk_size, interner=interner
+            )
+            return
+
+        try:
+            mapped_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be memory-mapped.
+            yield from iter_json_array(
+                f, fields=fields, chunk_size=chunk_size, interner=interner
+            )
+            return
+
+        with mapped_file:
+            yield from iter_json_array(
+                mapped_file, fields=fields, chunk_size=chunk_size, interner=interner
+            )
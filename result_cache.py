@@ -0,0 +1,148 @@
+"""
+A local on-disk cache of reconciliation results, keyed by the fingerprints of both inputs (the
+content hash of the export files, or a hash of the projected records of other inputs) and of the
+field mappings, so that a run on exports that did not change since a previous run (retries,
+several consumers of the same exports) only costs the hashing pass. Entries are JSON files in the
+cache directory, written atomically; the least recently used ones are evicted once the cache holds
+more than max_entries entries or max_bytes bytes.
+"""
+
+import json
+import os
+import tempfile
+
+from hashlib import blake2b
+
+from codec_backends import get_json_codec
+from field_mappings import FIELD_MAPPINGS
+from record_loader import project_record
+from snow_cust_index import get_file_hash
+
+# Bumped whenever the tasks produced for the same inputs change.
+CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 16
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+ENTRY_SUFFIX = '.tasks.json'
+
+
+def get_records_hash(records, fields):
+    # Consume an iterable of records, returning them as a list and the hash of their
+    # projection on fields.
+    records_hash = blake2b(digest_size=16)
+    consumed_records = []
+    for record in records:
+        records_hash.update(repr(project_record(record, fields)).encode('utf-8'))
+        records_hash.update(b'\n')
+        consumed_records.append(record)
+    return consumed_records, records_hash.digest()
+
+
+def get_step_name(step):
+    # Name of a function normalization step. Unlike its repr, which contains its address,
+    # the qualified name of a module level function is the same in every process. Lambdas
+    # and nested functions (e.g. one alias step per aliases dict) have no such name.
+    qualname = getattr(step, '__qualname__', None)
+    if qualname is None or '<' in qualname:
+        raise ValueError(
+            f"Normalization step {step!r} cannot be part of a cache key, use a module level function."  # NOQA
+        )
+    return f'{step.__module__}.{qualname}'
+
+
+def get_cache_key(input_hashes, normalizer=None):
+    # Key of the tasks of the inputs. The field mappings and the normalization rules
+    # change the tasks produced for the same inputs.
+    key = blake2b(digest_size=16)
+    key.update(f'{CACHE_VERSION}\n'.encode('utf-8'))
+    key.update(json.dumps(FIELD_MAPPINGS).encode('utf-8'))
+    if normalizer is not None:
+        key.update(
+            json.dumps(normalizer.rules, sort_keys=True, default=get_step_name).encode(
+                'utf-8'
+            )
+        )
+    for input_hash in input_hashes:
+        key.update(input_hash)
+    return key.hexdigest()
+
+
+def get_file_hashes(fpaths):
+    return [get_file_hash(fpath) for fpath in fpaths]
+
+
+class ResultCache:
+    def __init__(
+        self, directory, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES
+    ):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.codec = get_json_codec()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def get_fpath(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        # Cached tasks of the key, or None. A hit marks the entry as recently used.
+        fpath = self.get_fpath(key)
+        try:
+            with open(fpath, 'rb') as f:
+                tasks = self.codec.loads(f.read())
+            os.utime(fpath)
+        except (OSError, ValueError):
+            # Missing, evicted meanwhile or unreadable entry.
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return tasks
+
+    def put(self, key, tasks):
+        fd, tmp_fpath = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.codec.dumps(tasks))
+            os.replace(tmp_fpath, self.get_fpath(key))
+        except BaseException:
+            if os.path.exists(tmp_fpath):
+                os.remove(tmp_fpath)
+            raise
+        self.evict()
+
+    def invalidate(self, key):
+        # Drop the entry of the key. Returns whether there was one.
+        try:
+            os.remove(self.get_fpath(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def clear(self):
+        for key, _, _ in self.get_entries():
+            self.invalidate(key)
+
+    def get_entries(self):
+        # (key, size, last use) of the entries, least recently used first.
+        entries = []
+        for fname in os.listdir(self.directory):
+            if not fname.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, fname))
+            except FileNotFoundError:
+                continue
+            entries.append((fname[: -len(ENTRY_SUFFIX)], stat.st_size, stat.st_mtime_ns))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self):
+        entries = self.get_entries()
+        count = len(entries)
+        total_bytes = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            if self.invalidate(key):
+                self.stats['evictions'] += 1
+            count -= 1
+            total_bytes -= size
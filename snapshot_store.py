@@ -0,0 +1,79 @@
+"""
+A local on-disk (SQLite) snapshot of the last reconciled state, used for incremental (delta)
+reconciliation runs. For every monitoring org (keyed by uri) found in sync with its ServiceNow
+customer, it stores the state of the pair: the crm_id and the change hints of both records
+(date_edit / sys_updated_on), so that a pair whose hints did not move since is known to be in sync
+without mapping or comparing the records. The state is only valid for the field mappings and
+normalization rules it was computed with (the config key), and is discarded when they change.
+"""
+
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS in_sync (
+    uri TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+"""
+
+
+def get_in_sync_state(crm_id, date_edit, updated_on):
+    # One string per pair, which loads about twice as fast as a row of three columns.
+    return f'{crm_id}\t{date_edit}\t{updated_on}'
+
+
+class SnapshotStore:
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self.connection = sqlite3.connect(fpath)
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def get_config_key(self):
+        row = self.connection.execute(
+            "SELECT value FROM settings WHERE name = 'config_key'"
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def load_in_sync_state(self, config_key):
+        # Returns {uri: state} of the pairs in sync at the last run (see
+        # get_in_sync_state), or {} when the last run used another config key.
+        if self.get_config_key() != config_key:
+            return {}
+        return dict(self.connection.execute("SELECT uri, state FROM in_sync"))
+
+    def save_changes(self, config_key, in_sync_changes, removed_uris):
+        # Apply the differences found by a run in a single transaction. Changes are
+        # {uri: state} and removals an iterable of uris, so the cost of saving is
+        # proportional to the number of pairs whose state changed. The state of another
+        # config key is replaced.
+        with self.connection:
+            if self.get_config_key() != config_key:
+                self.connection.execute("DELETE FROM in_sync")
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO settings VALUES ('config_key', ?)",
+                    (config_key,),
+                )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO in_sync VALUES (?, ?)", in_sync_changes.items()
+            )
+            self.connection.executemany(
+                "DELETE FROM in_sync WHERE uri = ?", ((uri,) for uri in removed_uris)
+            )
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM in_sync")
+            self.connection.execute("DELETE FROM settings")
@@ -0,0 +1,373 @@
+"""
+A compact on-disk index of the mapped ServiceNow customer records, keyed by sys_id. The index is
+built once from the ServiceNow export and then opened with mmap: lookups binary-search the sorted
+fixed-width (32 characters) sys_id keys and decode the values of a single record from the packed
+value region, so no JSON is parsed when a reconciliation starts, and concurrent jobs share the
+index through the page cache. The index records the size, mtime and hash of its source export to
+tell whether it has to be rebuilt.
+
+Layout (little-endian): header, field names (JSON), sorted keys (count * 32 bytes), slots in
+source order (count * uint32), value offsets ((count + 1) * uint64) and the value region. A
+record's values are stored as field count type bytes (None, str or JSON), field count uint32
+lengths and the UTF-8 encoded values.
+
+PreparedSnowCustIndex is the in-memory counterpart, for ServiceNow customers that do not come
+from an export file (or are reconciled within one process): the records are mapped once and the
+index is never modified afterwards, so it can be reconciled against many monitoring exports,
+sequentially or from threads, each run matching against its own mapping() view.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+from hashlib import blake2b
+
+from field_mappings import MONIT_ORG_FIELDS, SNOW_CUST_PROJECTION
+from mapped_record import MappedRecord
+from record_loader import iter_json_file
+
+MAGIC = b'SNCIDX01'
+VERSION = 1
+KEY_SIZE = 32
+# magic, version, reserved, count, field count, source size, source mtime (ns), source hash,
+# keys, order, offsets and values offsets, field names length.
+HEADER = struct.Struct('<8sHHIIQq16sQQQQI')
+HASH_CHUNK_SIZE = 1024 * 1024
+TYPE_NONE, TYPE_STR, TYPE_JSON = 0, 1, 2
+
+
+def get_file_hash(fpath):
+    file_hash = blake2b(digest_size=16)
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    return file_hash.digest()
+
+
+def encode_values(values):
+    types = bytearray()
+    lengths = []
+    data = []
+    for value in values:
+        if value is None:
+            types.append(TYPE_NONE)
+            encoded = b''
+        elif isinstance(value, str):
+            types.append(TYPE_STR)
+            encoded = value.encode('utf-8')
+        else:
+            types.append(TYPE_JSON)
+            encoded = json.dumps(value).encode('utf-8')
+        lengths.append(len(encoded))
+        data.append(encoded)
+    return bytes(types) + struct.pack(f'<{len(lengths)}I', *lengths) + b''.join(data)
+
+
+def encode_key(sys_id):
+    key = sys_id.encode('ascii') if isinstance(sys_id, str) else None
+    if key is None or len(key) != KEY_SIZE:
+        raise ValueError(f"sys_id {sys_id!r} is not a {KEY_SIZE} characters key.")
+    return key
+
+
+def build_snow_cust_index(source_fpath, index_fpath):
+    # Compile the ServiceNow export into an index file, atomically replaced. Like the
+    # sys_id keyed dict of the reconciliation, duplicated sys_ids keep the position of
+    # their first occurrence and the values of their last one. Returns the record count.
+    stat = os.stat(source_fpath)
+    source_hash = get_file_hash(source_fpath)
+    records = {}
+    for snow_cust_record in iter_json_file(source_fpath, fields=SNOW_CUST_PROJECTION):
+        mapped_record = MappedRecord.from_snow_cust_record(snow_cust_record)
+        records[encode_key(snow_cust_record['sys_id'])] = mapped_record.values_tuple()
+
+    keys = sorted(records)
+    slots = {key: slot for slot, key in enumerate(keys)}
+    order = [slots[key] for key in records]
+    offsets = [0]
+    values = []
+    for key in keys:
+        encoded = encode_values(records[key])
+        values.append(encoded)
+        offsets.append(offsets[-1] + len(encoded))
+
+    fields = json.dumps(MONIT_ORG_FIELDS).encode('utf-8')
+    keys_offset = HEADER.size + len(fields)
+    order_offset = keys_offset + KEY_SIZE * len(keys)
+    offsets_offset = order_offset + 4 * len(keys)
+    values_offset = offsets_offset + 8 * len(offsets)
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        0,
+        len(keys),
+        len(MONIT_ORG_FIELDS),
+        stat.st_size,
+        stat.st_mtime_ns,
+        source_hash,
+        keys_offset,
+        order_offset,
+        offsets_offset,
+        values_offset,
+        len(fields),
+    )
+
+    fd, tmp_fpath = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(index_fpath)), suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(fields)
+            f.write(b''.join(keys))
+            f.write(struct.pack(f'<{len(order)}I', *order))
+            f.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+            for encoded in values:
+                f.write(encoded)
+        os.replace(tmp_fpath, index_fpath)
+    except BaseException:
+        if os.path.exists(tmp_fpath):
+            os.remove(tmp_fpath)
+        raise
+
+    return len(keys)
+
+
+class IndexKeys:
+    # Sequence of the sorted keys, for bisect.
+    def __init__(self, index):
+        self.buffer = index.buffer
+        self.keys_offset = index.keys_offset
+        self.count = index.count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, slot):
+        start = self.keys_offset + KEY_SIZE * slot
+        return self.buffer[start : start + KEY_SIZE]
+
+
+class SnowCustIndex:
+    def __init__(self, index_fpath):
+        self.fpath = index_fpath
+        with open(index_fpath, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self.buffer) < HEADER.size:
+                raise ValueError(f"{index_fpath} is not a ServiceNow customer index.")
+            (
+                magic,
+                version,
+                _,
+                self.count,
+                field_count,
+                self.source_size,
+                self.source_mtime_ns,
+                self.source_hash,
+                self.keys_offset,
+                self.order_offset,
+                self.offsets_offset,
+                self.values_offset,
+                fields_length,
+            ) = HEADER.unpack_from(self.buffer, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{index_fpath} is not a ServiceNow customer index.")
+            fields = json.loads(self.buffer[HEADER.size : HEADER.size + fields_length])
+            if tuple(fields) != MONIT_ORG_FIELDS:
+                raise ValueError(f"{index_fpath} was built for other field mappings.")
+        except BaseException:
+            self.buffer.close()
+            raise
+
+        self.field_count = field_count
+        self.values_header = struct.Struct(f'<{field_count}B{field_count}I')
+        self.keys = IndexKeys(self)
+
+    @classmethod
+    def open_or_build(cls, source_fpath, index_fpath):
+        # Open the index of the ServiceNow export, (re)building it when it is missing,
+        # unreadable or stale.
+        if os.path.exists(index_fpath):
+            try:
+                index = cls(index_fpath)
+            except ValueError:
+                index = None
+            if index is not None:
+                if not index.is_stale(source_fpath):
+                    return index
+                index.close()
+
+        build_snow_cust_index(source_fpath, index_fpath)
+        return cls(index_fpath)
+
+    def is_stale(self, source_fpath):
+        # Size and mtime are checked first; a source with another mtime but the same size
+        # is only stale if its content hash changed.
+        stat = os.stat(source_fpath)
+        if stat.st_size != self.source_size:
+            return True
+        if stat.st_mtime_ns == self.source_mtime_ns:
+            return False
+        return get_file_hash(source_fpath) != self.source_hash
+
+    def close(self):
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def find_slot(self, sys_id):
+        # Slot of the sys_id in the sorted keys, or None.
+        if not isinstance(sys_id, str) or len(sys_id) != KEY_SIZE:
+            return None
+        try:
+            key = sys_id.encode('ascii')
+        except UnicodeEncodeError:
+            return None
+        slot = bisect.bisect_left(self.keys, key)
+        if slot < self.count and self.keys[slot] == key:
+            return slot
+        return None
+
+    def get_values(self, slot):
+        (start,) = struct.unpack_from('<Q', self.buffer, self.offsets_offset + 8 * slot)
+        start += self.values_offset
+        header = self.values_header.unpack_from(self.buffer, start)
+        types = header[: self.field_count]
+        position = start + self.values_header.size
+        values = []
+        for value_type, length in zip(types, header[self.field_count :]):
+            if value_type == TYPE_NONE:
+                values.append(None)
+            else:
+                encoded = self.buffer[position : position + length]
+                value = encoded.decode('utf-8')
+                values.append(value if value_type == TYPE_STR else json.loads(value))
+            position += length
+        return tuple(values)
+
+    def get_record(self, slot):
+        record = MappedRecord.__new__(MappedRecord)
+        record._values = self.get_values(slot)
+        return record
+
+    def get_sys_id(self, slot):
+        return self.keys[slot].decode('ascii')
+
+    def get(self, sys_id, default=None):
+        # Mapped record of the sys_id, for ad-hoc lookups.
+        slot = self.find_slot(sys_id)
+        return default if slot is None else self.get_record(slot)
+
+    def __contains__(self, sys_id):
+        return self.find_slot(sys_id) is not None
+
+    def iter_slots(self):
+        # Slots in the order of the source export.
+        order = self.buffer[self.order_offset : self.order_offset + 4 * self.count]
+        for (slot,) in struct.iter_unpack('<I', order):
+            yield slot
+
+    def mapping(self):
+        # A fresh view to reconcile against (see IndexedSnowCustMapping).
+        return IndexedSnowCustMapping(self)
+
+
+class PreparedSnowCustIndex:
+    # Immutable in-memory index of the mapped ServiceNow customers, with the slot interface
+    # of SnowCustIndex. Duplicated sys_ids keep the position of their first occurrence
+    # and the values of their last one, as in prepare_reconciliation_tasks.
+    fpath = ':memory:'
+
+    def __init__(self, snow_cust_data, interner=None):
+        mapped_records = {}
+        for snow_cust_record in snow_cust_data:
+            mapped_record = MappedRecord.from_snow_cust_record(snow_cust_record, interner)
+            mapped_records[snow_cust_record['sys_id']] = mapped_record
+        self.sys_ids = tuple(mapped_records)
+        self.records = tuple(mapped_records.values())
+        self.slots = {sys_id: slot for slot, sys_id in enumerate(self.sys_ids)}
+        self.count = len(self.records)
+
+    @classmethod
+    def from_json_file(cls, source_fpath, interner=None):
+        return cls(iter_json_file(source_fpath, fields=SNOW_CUST_PROJECTION), interner)
+
+    def __len__(self):
+        return self.count
+
+    def find_slot(self, sys_id):
+        try:
+            return self.slots.get(sys_id)
+        except TypeError:
+            # Unhashable sys_id.
+            return None
+
+    def get_record(self, slot):
+        return self.records[slot]
+
+    def get_sys_id(self, slot):
+        return self.sys_ids[slot]
+
+    def get(self, sys_id, default=None):
+        slot = self.find_slot(sys_id)
+        return default if slot is None else self.records[slot]
+
+    def __contains__(self, sys_id):
+        return self.find_slot(sys_id) is not None
+
+    def iter_slots(self):
+        return iter(range(self.count))
+
+    def mapping(self):
+        return IndexedSnowCustMapping(self)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class IndexedSnowCustMapping:
+    # Drop-in replacement, for the reconciliation, of the sys_id keyed dict of mapped
+    # records: pop() marks a record as matched instead of deleting it, and values() gives
+    # the records that were never matched, in source order.
+    def __init__(self, index):
+        self.index = index
+        self.matched = bytearray(index.count)
+        self.matched_count = 0
+
+    def pop(self, sys_id, default=None):
+        slot = self.index.find_slot(sys_id)
+        if slot is None or self.matched[slot]:
+            return default
+        self.matched[slot] = 1
+        self.matched_count += 1
+        return self.index.get_record(slot)
+
+    def __contains__(self, sys_id):
+        slot = self.index.find_slot(sys_id)
+        return slot is not None and not self.matched[slot]
+
+    def __len__(self):
+        return self.index.count - self.matched_count
+
+    def values(self):
+        for slot in self.index.iter_slots():
+            if not self.matched[slot]:
+                yield self.index.get_record(slot)
@@ -0,0 +1,249 @@
+"""
+Source adapters fetching the ServiceNow customer (core_company) records and the Monitoring
+organizations straight from their APIs, instead of from exported files. Pages are fetched
+concurrently (over a pool of keep-alive connections) by an asyncio loop running in a background
+thread, and handed over in order, through a bounded queue, to a plain iterator of records that
+ReconciliationManager consumes like any other input.
+"""
+
+import asyncio
+import queue
+import threading
+
+from collections import deque
+from urllib.parse import urlencode
+
+from async_http import REQUEST_ERRORS, RETRY_STATUSES, ConnectionPool
+from field_mappings import MONIT_ORG_PROJECTION, SNOW_CUST_PROJECTION
+from record_loader import project_record
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 60
+SNOW_CUST_TABLE_PATH = '/api/now/table/core_company'
+MONIT_ORG_PATH = '/api/organization'
+# Pages kept in the queue per allowed concurrent request.
+PAGES_PER_REQUEST_SLOT = 2
+
+
+class SourceError(Exception):
+    pass
+
+
+class PaginatedSource:
+    # Base class of the API sources. Subclasses define the path of the page at a given
+    # offset and how a page response is parsed into (records, total count or None).
+    def __init__(
+        self,
+        base_url,
+        page_size=DEFAULT_PAGE_SIZE,
+        concurrency=DEFAULT_CONCURRENCY,
+        headers=None,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        timeout=DEFAULT_TIMEOUT,
+        fields=None,
+    ):
+        self.base_url = base_url
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.headers = dict(headers or {}, Accept='application/json')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.fields = fields
+        self.requests = 0
+
+    def get_page_path(self, offset):
+        raise NotImplementedError
+
+    def parse_page(self, response):
+        raise NotImplementedError
+
+    async def fetch_page(self, pool, offset):
+        path = self.get_page_path(offset)
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+            self.requests += 1
+            try:
+                response = await asyncio.wait_for(
+                    pool.request('GET', path, headers=self.headers), self.timeout
+                )
+            except REQUEST_ERRORS as e:
+                error = repr(e)
+                continue
+            if response.status in RETRY_STATUSES:
+                error = f'status {response.status}'
+                continue
+            if response.status != 200:
+                raise SourceError(f"GET {path} returned status {response.status}.")
+
+            records, total = self.parse_page(response)
+            if self.fields is not None:
+                records = [project_record(record, self.fields) for record in records]
+            return records, total
+
+        raise SourceError(
+            f"GET {path} failed after {self.max_retries + 1} attempt(s): {error}."
+        )
+
+    async def iter_pages(self):
+        # Yield the pages of records in order. The first page gives the total count (when
+        # the API returns it), then up to `concurrency` pages are fetched at once. Without
+        # a total count, the first short page ends the pagination.
+        pool = ConnectionPool(self.base_url, self.concurrency)
+        pending = deque()
+        try:
+            records, total = await self.fetch_page(pool, 0)
+            if records:
+                yield records
+            if len(records) < self.page_size and (total is None or total <= len(records)):
+                return
+
+            # The API may cap the page size below the requested one. An empty first page
+            # (e.g. records deleted since the count) does not tell the cap.
+            page_size = len(records) or self.page_size
+            offset = page_size
+            while True:
+                while len(pending) < self.concurrency and (total is None or offset < total):
+                    pending.append(asyncio.ensure_future(self.fetch_page(pool, offset)))
+                    offset += page_size
+                if not pending:
+                    return
+
+                records, _ = await pending.popleft()
+                if records:
+                    yield records
+                if total is None and len(records) < page_size:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            pool.close()
+
+    def stream(self, queue_size=None):
+        # Iterator of the records, fetched by a background thread.
+        return RecordStream(self, queue_size)
+
+
+class SnowCustomerSource(PaginatedSource):
+    # ServiceNow Table API. Records are ordered by sys_id so that offset pagination is
+    # stable, and only the fields of interest are requested.
+    def __init__(
+        self,
+        base_url,
+        table_path=SNOW_CUST_TABLE_PATH,
+        query='ORDERBYsys_id',
+        fields=SNOW_CUST_PROJECTION,
+        **kwargs,
+    ):
+        super(SnowCustomerSource, self).__init__(base_url, fields=fields, **kwargs)
+        self.table_path = table_path
+        self.query = query
+
+    def get_page_path(self, offset):
+        params = {
+            'sysparm_limit': self.page_size,
+            'sysparm_offset': offset,
+            'sysparm_exclude_reference_link': 'true',
+        }
+        if self.query:
+            params['sysparm_query'] = self.query
+        if self.fields is not None:
+            params['sysparm_fields'] = ','.join(self.fields)
+        return '{}?{}'.format(self.table_path, urlencode(params))
+
+    def parse_page(self, response):
+        total = response.headers.get('x-total-count')
+        return response.json()['result'], int(total) if total else None
+
+
+class MonitoringOrgSource(PaginatedSource):
+    # Monitoring organizations API. extended_fetch returns the details of every org of
+    # the page keyed by their URI, which are turned into {'uri': ..., 'details': ...}
+    # records like the ones of the monitoring orgs export.
+    def __init__(
+        self, base_url, path=MONIT_ORG_PATH, fields=MONIT_ORG_PROJECTION, **kwargs
+    ):
+        super(MonitoringOrgSource, self).__init__(base_url, fields=fields, **kwargs)
+        self.path = path
+
+    def get_page_path(self, offset):
+        params = {'limit': self.page_size, 'offset': offset, 'extended_fetch': 1}
+        return '{}?{}'.format(self.path, urlencode(params))
+
+    def parse_page(self, response):
+        content = response.json()
+        result_set = content.get('result_set') or {}
+        records = [{'uri': uri, 'details': details} for uri, details in result_set.items()]
+        return records, content.get('total_matched')
+
+
+class RecordStream:
+    # Single-use iterator of the records of a source. The fetching thread starts with
+    # start() (to prefetch while something else is consumed) or on the first iteration,
+    # and stops when the iterator is exhausted or closed. At most queue_size pages are
+    # buffered, so a slow consumer slows the fetching down instead of filling memory.
+    _DONE = object()
+
+    def __init__(self, source, queue_size=None):
+        self.source = source
+        self.queue = queue.Queue(
+            maxsize=queue_size or source.concurrency * PAGES_PER_REQUEST_SLOT
+        )
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        if not self.thread.is_alive() and self.thread.ident is None:
+            self.thread.start()
+        return self
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def _produce(self):
+        pages = self.source.iter_pages()
+        try:
+            async for records in pages:
+                if not self._put(records):
+                    break
+        finally:
+            await pages.aclose()
+
+    def _run(self):
+        try:
+            asyncio.run(self._produce())
+        except BaseException as e:
+            self._put(e)
+        else:
+            self._put(self._DONE)
+
+    def __iter__(self):
+        self.start()
+        try:
+            while True:
+                item = self.queue.get()
+                if item is self._DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield from item
+        finally:
+            self.close()
+
+    def close(self):
+        self.stopped.set()
+        if self.thread.ident is not None:
+            self.thread.join()
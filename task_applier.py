@@ -0,0 +1,359 @@
+"""
+An asyncio applier of the reconciliation tasks against the monitoring API. Creates are POSTed to
+the organization collection, updates are PUT and deletes are DELETEd on the organization URIs.
+Requests are executed with a bounded concurrency over a pool of keep-alive HTTP/1.1 connections,
+rate limited per endpoint, and retried with exponential backoff on connection errors, 429 and
+5xx responses. Creates are not idempotent: they are only retried on 429 and 503 responses, and
+on the errors raised before the request was sent. Every completed task is appended to a JSON
+Lines journal, so that an interrupted run can be resumed without re-applying the tasks already
+done. A create whose outcome is unknown (it failed after being sent) is journaled as such and is
+not applied again on resume, but reported for manual review. Only the standard library is used.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from async_http import (
+    REQUEST_ERRORS,
+    RETRY_STATUSES,
+    ConnectionPool,
+    RequestNotSentError,
+)
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_TIMEOUT = 30
+DEFAULT_CREATE_PATH = '/api/organization/'
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+# Statuses of a POST which tell that the server did not create anything.
+POST_RETRY_STATUSES = (429, 503)
+
+
+class RateLimiter:
+    # Token bucket of `rate` requests per second, allowing bursts of `burst` requests.
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ProgressJournal:
+    # JSON Lines journal of the applied tasks: {"id": ..., "status": ..., "ok": ...}, with
+    # "unknown": true for the failed tasks which may have been applied anyway.
+    def __init__(self, fpath):
+        self.fpath = fpath
+        self.done = set()
+        self.unknown = set()
+        content = ''
+        if os.path.exists(fpath):
+            with open(fpath, 'r') as f:
+                content = f.read()
+        for line in content.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Line cut by an interruption.
+                continue
+            # The last entry of a task tells its state.
+            if entry.get('ok'):
+                self.done.add(entry['id'])
+                self.unknown.discard(entry['id'])
+            elif entry.get('unknown'):
+                self.unknown.add(entry['id'])
+            else:
+                self.unknown.discard(entry['id'])
+        self.file = open(fpath, 'a')
+        if content and not content.endswith('\n'):
+            self.file.write('\n')
+
+    def record(self, task_id, status, ok, unknown=False):
+        entry = {'id': task_id, 'status': status, 'ok': ok}
+        if unknown:
+            entry['unknown'] = True
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+        if ok:
+            self.done.add(task_id)
+            self.unknown.discard(task_id)
+        elif unknown:
+            self.unknown.add(task_id)
+        else:
+            self.unknown.discard(task_id)
+
+    def close(self):
+        self.file.close()
+
+
+def get_task_id(action, task):
+    # The id of a create or an update includes a hash of its body, so that a task changed
+    # since the journal was written is applied again.
+    if action == 'delete':
+        return f"delete:{task}"
+    body_hash = hashlib.sha1(
+        json.dumps(task, sort_keys=True).encode('utf-8')
+    ).hexdigest()[:16]
+    if action == 'create':
+        return f"create:{task['crm_id']}:{body_hash}"
+    return f"update:{task['uri']}:{body_hash}"
+
+
+def get_endpoint(path):
+    # Organization URIs share the endpoint of their collection (/api/organization/12 ->
+    # /api/organization).
+    path = path.rstrip('/')
+    collection, _, last = path.rpartition('/')
+    return collection if collection and last.isdigit() else path
+
+
+def get_percentiles(values, percentiles=LATENCY_PERCENTILES):
+    # Nearest-rank percentiles.
+    if not values:
+        return {f'p{percentile}': None for percentile in percentiles}
+    values = sorted(values)
+    return {
+        f'p{percentile}': values[
+            max(0, min(len(values) - 1, -(-percentile * len(values) // 100) - 1))
+        ]
+        for percentile in percentiles
+    }
+
+
+class TaskApplier:
+    # rate_limits is {endpoint: requests per second}, e.g. {'/api/organization': 20}, and
+    # rate_limit applies to the endpoints not listed there (no limit when None).
+    # The journaled tasks of unknown outcome are only applied again with retry_unknown,
+    # once it was checked that the server did not apply them.
+    def __init__(
+        self,
+        base_url,
+        logger,
+        concurrency=DEFAULT_CONCURRENCY,
+        rate_limits=None,
+        rate_limit=None,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        timeout=DEFAULT_TIMEOUT,
+        journal_fpath=None,
+        headers=None,
+        create_path=DEFAULT_CREATE_PATH,
+        metrics=None,
+        retry_unknown=False,
+    ):
+        self.base_url = base_url
+        self.logger = logger
+        self.concurrency = concurrency
+        self.rate_limits = rate_limits or {}
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.journal_fpath = journal_fpath
+        self.headers = dict(headers or {})
+        self.create_path = create_path
+        self.metrics = metrics
+        self.retry_unknown = retry_unknown
+
+    def apply(self, tasks):
+        # Apply {'create': [...], 'update': [...], 'delete': [...]} and return the report.
+        return asyncio.run(self.apply_async(tasks))
+
+    def apply_stream(self, task_stream):
+        # Apply the (action, task) pairs of a blocking iterator as they come (e.g. from the
+        # task queue of a pipeline) and return the report.
+        return asyncio.run(self.apply_async(task_stream, streamed=True))
+
+    async def apply_async(self, tasks, streamed=False):
+        self.pool = ConnectionPool(self.base_url, self.concurrency)
+        self.limiters = {}
+        self.journal = ProgressJournal(self.journal_fpath) if self.journal_fpath else None
+        self.report = {
+            'applied': 0,
+            'failed': 0,
+            'skipped': 0,
+            'retries': 0,
+            'failures': [],
+            # Ids of the tasks which may have been applied, to be checked manually.
+            'unknown_outcome': [],
+        }
+        self.latencies = []
+
+        if streamed:
+            self.logger.info(f"Applying streamed reconciliation tasks to {self.base_url}...")
+        else:
+            self.logger.info(
+                f"Applying {sum(map(len, tasks.values()))} reconciliation task(s) to {self.base_url}..."  # NOQA
+            )
+
+        # Workers stop on a None task.
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        start = time.perf_counter()
+        workers = [
+            asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)
+        ]
+        feeder = asyncio.create_task(self._feed(queue, tasks, streamed))
+        try:
+            await asyncio.gather(feeder, *workers)
+        finally:
+            for worker in [feeder] + workers:
+                worker.cancel()
+            self.pool.close()
+            if self.journal is not None:
+                self.journal.close()
+
+        seconds = time.perf_counter() - start
+        self.report['seconds'] = seconds
+        self.report['tasks_per_second'] = (
+            self.report['applied'] / seconds if seconds else None
+        )
+        self.report['latency_seconds'] = get_percentiles(self.latencies)
+        self.report['latency_seconds']['max'] = max(self.latencies, default=None)
+        self.report['connections'] = self.pool.opened
+        summary = {
+            key: value
+            for key, value in self.report.items()
+            if key not in ('failures', 'unknown_outcome')
+        }
+        summary['unknown_outcome'] = len(self.report['unknown_outcome'])
+        self.logger.info(f"Applied reconciliation tasks : {summary}.")
+
+        return self.report
+
+    async def _feed(self, queue, tasks, streamed):
+        if streamed:
+            # The blocking iterator is read in the default executor, off the event loop.
+            loop = asyncio.get_running_loop()
+            task_iterator = iter(tasks)
+            while True:
+                item = await loop.run_in_executor(None, next, task_iterator, None)
+                if item is None:
+                    break
+                await queue.put(item)
+        else:
+            for action, action_tasks in tasks.items():
+                for task in action_tasks:
+                    await queue.put((action, task))
+        for _ in range(self.concurrency):
+            await queue.put(None)
+
+    async def _worker(self, queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            await self._apply_task(*item)
+
+    def _get_request(self, action, task):
+        if action == 'create':
+            return 'POST', self.create_path, task
+        if action == 'update':
+            return 'PUT', task['uri'], {k: v for k, v in task.items() if k != 'uri'}
+        return 'DELETE', task, None
+
+    async def _apply_task(self, action, task):
+        task_id = get_task_id(action, task)
+        if self.journal is not None and task_id in self.journal.done:
+            self.report['skipped'] += 1
+            return
+        if (
+            self.journal is not None
+            and task_id in self.journal.unknown
+            and not self.retry_unknown
+        ):
+            self.report['unknown_outcome'].append(task_id)
+            self.logger.error(
+                f"Not applying {task_id} again, its outcome is unknown: check whether it was applied."  # NOQA
+            )
+            return
+
+        method, path, payload = self._get_request(action, task)
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = dict(self.headers)
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        limiter = self._get_limiter(get_endpoint(path))
+        retry_statuses = POST_RETRY_STATUSES if method == 'POST' else RETRY_STATUSES
+
+        response = None
+        error = None
+        unknown = False
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.report['retries'] += 1
+                await asyncio.sleep(self._get_backoff(attempt, response))
+            if limiter is not None:
+                await limiter.acquire()
+
+            start = time.perf_counter_ns()
+            try:
+                response = await asyncio.wait_for(
+                    self.pool.request(method, path, body, headers), self.timeout
+                )
+            except REQUEST_ERRORS as e:
+                response, error = None, repr(e)
+                if method == 'POST' and not isinstance(e, RequestNotSentError):
+                    # The server may have created the organization.
+                    unknown = True
+                    break
+                continue
+            finally:
+                elapsed_ns = time.perf_counter_ns() - start
+                if self.metrics is not None:
+                    self.metrics.add(f'apply_{action}', elapsed_ns, 1)
+
+            error = None
+            if response.status not in retry_statuses:
+                self.latencies.append(elapsed_ns / 1e9)
+                break
+
+        status = response.status if response is not None else None
+        ok = status is not None and 200 <= status < 300
+        if method == 'POST' and status is not None and status >= 500:
+            # Unlike a 503 response, a server error does not tell that nothing was created.
+            unknown = status not in POST_RETRY_STATUSES
+        if ok:
+            self.report['applied'] += 1
+        else:
+            self.report['failed'] += 1
+            self.report['failures'].append(
+                {'id': task_id, 'status': status, 'error': error}
+            )
+            self.logger.error(
+                f"Failed to apply {task_id} (status: {status}, error: {error})."
+            )
+            if unknown:
+                self.report['unknown_outcome'].append(task_id)
+        if self.journal is not None:
+            self.journal.record(task_id, status, ok, unknown)
+
+    def _get_limiter(self, endpoint):
+        if endpoint not in self.limiters:
+            rate = self.rate_limits.get(endpoint, self.rate_limit)
+            self.limiters[endpoint] = RateLimiter(rate) if rate else None
+        return self.limiters[endpoint]
+
+    def _get_backoff(self, attempt, response=None):
+        # Retry-After (in seconds) of a 429/503 response takes precedence.
+        if response is not None:
+            retry_after = response.headers.get('retry-after', '')
+            if retry_after.isdigit():
+                return int(retry_after)
+        return self.backoff * 2 ** (attempt - 1)
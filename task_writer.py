@@ -0,0 +1,173 @@
+"""
+A streaming writer for the reconciliation tasks. Tasks are written to disk as they are produced
+instead of being serialized in one go, either as the usual JSON document ({"create": [...],
+"update": [...], "delete": [...]}), as JSON Lines or as a msgpack stream of the same
+{"action": ..., "task": ...} objects. Entries are serialized by the fastest installed JSON
+backend (see codec_backends), with the same output as the standard library json module. The
+output is written to a temporary file which is atomically renamed on completion, so a
+half-written file is never picked up.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+from codec_backends import get_codec, get_json_codec
+
+TASK_ACTIONS = ('create', 'update', 'delete')
+TASK_FORMATS = ('json', 'jsonl', 'msgpack')
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+class TaskWriter:
+    def __init__(
+        self,
+        fpath,
+        fmt='json',
+        indent=4,
+        buffer_size=DEFAULT_BUFFER_SIZE,
+        fsync=True,
+        codec=None,
+    ):
+        # codec is the JSON codec of the entries, the fastest installed when not given.
+        if fmt not in TASK_FORMATS:
+            raise ValueError(f"Task output format not supported: {fmt}")
+        if fmt == 'msgpack':
+            try:
+                self.codec = get_codec('msgpack')
+            except ImportError:
+                raise ValueError("The msgpack task output format requires msgpack.")
+        else:
+            self.codec = codec or get_json_codec()
+
+        self.fpath = fpath
+        self.fmt = fmt
+        self.indent = indent
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.counts = {action: 0 for action in TASK_ACTIONS}
+        self.closed = False
+
+        if indent is None:
+            self.entry_prefix = ''
+            self.entry_separator = ','
+        else:
+            self.entry_prefix = '\n' + ' ' * (2 * indent)
+            self.entry_separator = ','
+
+        dirname, basename = os.path.split(os.path.abspath(fpath))
+        self.dirname = dirname
+        # Random name from os.urandom rather than uuid, whose import is slow (startup).
+        self.tmp_fpath = os.path.join(
+            dirname, '.{}.{}.tmp'.format(basename, os.urandom(16).hex())
+        )
+        if self.codec.binary:
+            self.file = open(self.tmp_fpath, 'xb', buffering=buffer_size)
+        else:
+            self.file = open(
+                self.tmp_fpath, 'x', buffering=buffer_size, encoding='utf-8'
+            )
+
+        # In JSON format, each action gets its own spill section so that tasks can be
+        # written in any order and still end up grouped in the final document.
+        self.sections = {}
+        if fmt == 'json':
+            for action in TASK_ACTIONS:
+                self.sections[action] = tempfile.TemporaryFile(
+                    'w+', buffering=buffer_size, encoding='utf-8', dir=dirname
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _format_entry(self, task):
+        content = self.codec.dumps(task, self.indent)
+        if self.indent is None:
+            return content
+        return content.replace('\n', self.entry_prefix)
+
+    def write_task(self, action, task):
+        if self.fmt == 'jsonl':
+            self.file.write(self.codec.dumps({'action': action, 'task': task}))
+            self.file.write('\n')
+        elif self.fmt == 'msgpack':
+            self.file.write(self.codec.dumps({'action': action, 'task': task}))
+        else:
+            section = self.sections[action]
+            if self.counts[action]:
+                section.write(self.entry_separator)
+            section.write(self.entry_prefix)
+            section.write(self._format_entry(task))
+
+        self.counts[action] += 1
+
+    def write_tasks(self, tasks):
+        for action in TASK_ACTIONS:
+            for task in tasks.get(action, []):
+                self.write_task(action, task)
+
+    def _write_json_document(self):
+        # Assemble the final document from the spilled sections. The layout matches
+        # json.dumps(tasks, indent=indent, separators=(',', ': ')).
+        if self.indent is None:
+            key_prefix, key_separator, closing_prefix = '', ':', ''
+        else:
+            key_prefix = '\n' + ' ' * self.indent
+            key_separator = ': '
+            closing_prefix = '\n'
+
+        self.file.write('{')
+        for i, action in enumerate(TASK_ACTIONS):
+            if i:
+                self.file.write(',')
+            self.file.write(key_prefix + json.dumps(action) + key_separator + '[')
+            if self.counts[action]:
+                section = self.sections[action]
+                section.seek(0)
+                shutil.copyfileobj(section, self.file, self.buffer_size)
+                self.file.write(key_prefix)
+            self.file.write(']')
+        self.file.write(closing_prefix + '}')
+
+    def _close_sections(self):
+        for section in self.sections.values():
+            section.close()
+        self.sections = {}
+
+    def close(self):
+        # Finalize the output and atomically move it to its destination.
+        if self.closed:
+            return
+
+        try:
+            if self.fmt == 'json':
+                self._write_json_document()
+            self.file.flush()
+            if self.fsync:
+                os.fsync(self.file.fileno())
+            self.file.close()
+            os.replace(self.tmp_fpath, self.fpath)
+        except BaseException:
+            self.abort()
+            raise
+        finally:
+            self._close_sections()
+        self.closed = True
+
+    def abort(self):
+        # Discard everything written so far. The destination file is left untouched.
+        if self.closed:
+            return
+
+        self.closed = True
+        self.file.close()
+        self._close_sections()
+        if os.path.exists(self.tmp_fpath):
+            os.remove(self.tmp_fpath)
@@ -0,0 +1,135 @@
+"""
+Test class for testing the multi-tenant batch reconciliation.
+"""
+
+import json
+import os
+
+import pytest
+
+from ReconciliationManager import ReconciliationManager
+from batch_reconciliation import get_tenant_jobs, load_manifest, main, schedule_jobs
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestBatchReconciliation(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestBatchReconciliation, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def write_manifest(self):
+        # Paths are relative to the manifest, in the outputs folder.
+        manifest = [
+            {
+                'tenant': 'reduced',
+                'snow_cust_fpath': '../test_data/snow-customers-reduced.json',
+                'monit_orgs_fpath': '../test_data/monitoring-orgs-reduced.json',
+                'output': 'batch/reduced-tasks',
+            },
+            {
+                'tenant': 'missing',
+                'snow_cust_fpath': '../test_data/snow-customers-missing.json',
+                'monit_orgs_fpath': '../test_data/monitoring-orgs.json',
+                'output': 'batch/missing-tasks',
+            },
+            {
+                'tenant': 'full',
+                'snow_cust_fpath': '../test_data/snow-customers.json',
+                'monit_orgs_fpath': '../test_data/monitoring-orgs.json',
+                'output': 'batch/full-tasks',
+                'fmt': 'jsonl',
+            },
+        ]
+        manifest_fpath = os.path.join(OUTPUT_DATAPATH, 'batch-manifest.json')
+        with open(manifest_fpath, 'w') as f:
+            f.write(json.dumps(manifest))
+        return manifest_fpath
+
+    def get_expected_tasks(self, snow_cust_fname, monit_orgs_fname):
+        return ReconciliationManager(
+            self.logger,
+            self.read_json(os.path.join(TEST_DATAPATH, snow_cust_fname)),
+            self.read_json(os.path.join(TEST_DATAPATH, monit_orgs_fname)),
+        ).prepare_reconciliation_tasks()
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_schedule_jobs(self):
+        self.logger.info("Executing test for batch reconciliation scheduling...")
+        # Setting up
+        jobs = load_manifest(self.write_manifest())
+
+        # Calling the method to test
+        scheduled_jobs = schedule_jobs(jobs)
+
+        # Assertions
+        assert [job['tenant'] for job in scheduled_jobs] == ['full', 'missing', 'reduced']
+        assert jobs[0]['snow_cust_fpath'] == os.path.join(
+            OUTPUT_DATAPATH, '../test_data/snow-customers-reduced.json'
+        )
+        assert jobs[0]['fmt'] == 'json' and jobs[2]['fmt'] == 'jsonl'
+
+    def test_invalid_manifest(self):
+        self.logger.info("Executing test for batch reconciliation invalid manifest...")
+        # Calling the method to test and assertions
+        with pytest.raises(ValueError):
+            get_tenant_jobs([{'tenant': 'a', 'snow_cust_fpath': 'a.json'}])
+        entry = {
+            'tenant': 'a',
+            'snow_cust_fpath': 'a.json',
+            'monit_orgs_fpath': 'b.json',
+            'output': 'a',
+        }
+        with pytest.raises(ValueError):
+            get_tenant_jobs({'tenants': [entry, entry]})
+
+    def test_run_batch(self):
+        self.logger.info("Executing test for run_batch...")
+        # Setting up
+        manifest_fpath = self.write_manifest()
+        summary_fpath = os.path.join(OUTPUT_DATAPATH, 'batch-summary.json')
+        expected_full_tasks = self.get_expected_tasks(
+            'snow-customers.json', 'monitoring-orgs.json'
+        )
+        expected_reduced_tasks = self.get_expected_tasks(
+            'snow-customers-reduced.json', 'monitoring-orgs-reduced.json'
+        )
+
+        for workers in ('1', '2'):
+            # Calling the method to test
+            exit_code = main(
+                [manifest_fpath, '--workers', workers, '--summary', summary_fpath]
+            )
+
+            # Assertions
+            summary = self.read_json(summary_fpath)
+            assert exit_code == 1
+            assert [result['tenant'] for result in summary['tenants']] == [
+                'reduced',
+                'missing',
+                'full',
+            ]
+            reduced, missing, full = summary['tenants']
+            assert not missing['ok'] and 'FileNotFoundError' in missing['error']
+            assert summary['succeeded'] == 2 and summary['failed'] == 1
+            assert full['task_counts'] == {
+                action: len(tasks) for action, tasks in expected_full_tasks.items()
+            }
+            assert full['phases']['mapping'] > 0
+            assert summary['task_counts']['create'] == len(
+                expected_full_tasks['create']
+            ) + len(expected_reduced_tasks['create'])
+            assert self.read_json(reduced['output']) == expected_reduced_tasks
+            with open(full['output'], 'r') as f:
+                entries = [json.loads(line) for line in f]
+            assert [entry['task'] for entry in entries if entry['action'] == 'update'] == (
+                expected_full_tasks['update']
+            )
@@ -0,0 +1,170 @@
+"""
+Test class for testing the pluggable (de)serialization backends.
+"""
+
+import json
+import os
+
+import pytest
+
+from ReconciliationManager import ReconciliationManager
+from codec_backends import (
+    JSONCodec,
+    get_codec,
+    get_codec_for_path,
+    get_json_codec,
+    load_records,
+)
+from mapped_record import MappedRecord
+from task_writer import TaskWriter
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+def get_installed_json_codecs():
+    codecs = []
+    for backend in ('orjson', 'ujson', 'json'):
+        try:
+            codecs.append(get_json_codec(backend))
+        except ImportError:
+            continue
+    return codecs
+
+
+class TestCodecBackends(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestCodecBackends, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_json_dumps(self):
+        self.logger.info("Executing test for the JSON codecs dumps...")
+        # Setting up
+        tasks = {
+            'create': [
+                {'crm_id': '1', 'company': 'Zürich AG', 'tags': [], 'details': {}}
+            ],
+            'update': [{'uri': '/api/organization/2', 'city': 'Sydney', 'zip': 2000}],
+            'delete': ['/api/organization/3'],
+            'mapped': MappedRecord(('4', 'Pearl', '', 'Perth', 'WA', '', 'AU', '', '')),
+        }
+
+        # Calling the method to test and assertions
+        for codec in get_installed_json_codecs():
+            for indent in (None, 2, 4):
+                assert codec.dumps(tasks, indent) == JSONCodec().dumps(tasks, indent)
+            loaded_tasks = codec.loads(codec.dumps(tasks).encode('utf-8'))
+            assert loaded_tasks['mapped']['city'] == 'Perth'
+
+    def test_get_codec(self):
+        self.logger.info("Executing test for get_codec...")
+        # Calling the method to test and assertions
+        assert get_json_codec().name in ('orjson', 'ujson', 'json')
+        assert get_codec_for_path('monitoring-orgs.JSON', 'json').name == 'json'
+        assert get_codec_for_path('monitoring-orgs.yml').fmt == 'yaml'
+        with pytest.raises(ValueError):
+            get_json_codec('simplejson')
+        with pytest.raises(ValueError):
+            get_codec_for_path('monitoring-orgs.csv')
+
+    def test_load_records(self):
+        self.logger.info("Executing test for load_records...")
+        # Setting up
+        expected_records = self.read_yaml(
+            os.path.join(TEST_DATAPATH, 'monitoring-orgs-reduced.yml')
+        )
+
+        # Calling the method to test
+        actual_records = list(
+            load_records(os.path.join(TEST_DATAPATH, 'monitoring-orgs-reduced.yml'))
+        )
+
+        # Assertions
+        assert actual_records == expected_records
+        assert (
+            list(load_records(os.path.join(TEST_DATAPATH, 'monitoring-orgs-empty.json')))
+            == []
+        )
+
+    def test_from_files(self):
+        self.logger.info("Executing test for ReconciliationManager.from_files...")
+        # Setting up
+        expected_prepared_tasks = ReconciliationManager.from_json_files(
+            self.logger,
+            os.path.join(TEST_DATAPATH, 'snow-customers.json'),
+            os.path.join(TEST_DATAPATH, 'monitoring-orgs.json'),
+        ).prepare_reconciliation_tasks()
+
+        # Calling the method to test and assertions
+        for codec in get_installed_json_codecs():
+            base = ReconciliationManager.from_files(
+                self.logger,
+                os.path.join(TEST_DATAPATH, 'snow-customers.json'),
+                os.path.join(TEST_DATAPATH, 'monitoring-orgs.json'),
+                backend=codec.name,
+            )
+            assert base.prepare_reconciliation_tasks() == expected_prepared_tasks
+
+        base = ReconciliationManager.from_files(
+            self.logger,
+            os.path.join(TEST_DATAPATH, 'snow-customers-reduced.yml'),
+            os.path.join(TEST_DATAPATH, 'monitoring-orgs-reduced.yml'),
+        )
+        assert base.prepare_reconciliation_tasks() == (
+            ReconciliationManager.from_json_files(
+                self.logger,
+                os.path.join(TEST_DATAPATH, 'snow-customers-reduced.json'),
+                os.path.join(TEST_DATAPATH, 'monitoring-orgs-reduced.json'),
+            ).prepare_reconciliation_tasks()
+        )
+
+    def test_write_json_output(self):
+        self.logger.info("Executing test for write_json_output with every codec...")
+        # Setting up
+        base = ReconciliationManager.from_json_files(
+            self.logger,
+            os.path.join(TEST_DATAPATH, 'snow-customers.json'),
+            os.path.join(TEST_DATAPATH, 'monitoring-orgs.json'),
+        )
+        tasks = base.prepare_reconciliation_tasks()
+        name = os.path.join(OUTPUT_DATAPATH, 'codec_output')
+
+        # Calling the method to test and assertions
+        for codec in get_installed_json_codecs():
+            for indent in (4, None):
+                base.write_json_output(name, tasks, indent=indent, codec=codec)
+                assert self.read_file(name + '.json') == json.dumps(
+                    tasks,
+                    indent=indent,
+                    separators=(',', ': ') if indent is not None else (',', ':'),
+                )
+
+    def test_write_task_msgpack_format(self):
+        self.logger.info("Executing test for TaskWriter msgpack format...")
+        # Setting up
+        msgpack = pytest.importorskip('msgpack')
+        fpath = os.path.join(OUTPUT_DATAPATH, 'task_writer_msgpack.msgpack')
+
+        # Calling the method to test
+        with TaskWriter(fpath, fmt='msgpack') as task_writer:
+            task_writer.write_task('delete', '/api/organization/143')
+            task_writer.write_task('create', {'crm_id': '1', 'company': 'Fortune'})
+
+        # Assertions
+        with open(fpath, 'rb') as f:
+            entries = list(msgpack.Unpacker(f, raw=False))
+        assert entries == [
+            {'action': 'delete', 'task': '/api/organization/143'},
+            {'action': 'create', 'task': {'crm_id': '1', 'company': 'Fortune'}},
+        ]
+        assert get_codec('msgpack').loads(
+            get_codec('msgpack').dumps(entries)
+        ) == entries
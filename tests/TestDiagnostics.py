@@ -0,0 +1,140 @@
+"""
+Test class for testing RecordDiagnostics and BackgroundLogging.
+"""
+
+import logging
+import os
+
+from unittest.mock import MagicMock
+
+from diagnostics import BackgroundLogging, RecordDiagnostics
+from ReconciliationManager import ReconciliationManager
+from .TestLogger import Logger
+from .TestBase import TestBase
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class FormatCounter:
+    # Counts how many times it is formatted into a message.
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return 'formatted'
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super(ListHandler, self).__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestDiagnostics(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestDiagnostics, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_record_summary(self):
+        self.logger.info("Executing test for RecordDiagnostics summary...")
+        # Setting up
+        mock_logger = MagicMock()
+        diagnostics = RecordDiagnostics(mock_logger, sample_size=2, per_record=False)
+        value = FormatCounter()
+
+        # Calling the method to test
+        for index in range(5):
+            diagnostics.record('delete', logging.WARNING, "Org %s: %s", index, value)
+
+        # Assertions
+        assert diagnostics.summary() == {
+            'delete': {'count': 5, 'samples': ['Org 0: formatted', 'Org 1: formatted']}
+        }
+        assert value.count == 2
+        mock_logger.warn.assert_not_called()
+
+    def test_record_disabled_level(self):
+        self.logger.info("Executing test for RecordDiagnostics with a disabled level...")
+        # Setting up
+        logging_logger = logging.getLogger('TestDiagnostics.disabled')
+        logging_logger.setLevel(logging.WARNING)
+        diagnostics = RecordDiagnostics(logging_logger, sample_size=1)
+        value = FormatCounter()
+
+        # Calling the method to test
+        for _ in range(3):
+            diagnostics.record('update', logging.INFO, "Org %s", value)
+
+        # Assertions
+        assert diagnostics.counts == {'update': 3}
+        assert value.count == 1
+
+    def test_merge(self):
+        self.logger.info("Executing test for RecordDiagnostics.merge...")
+        # Setting up
+        diagnostics = RecordDiagnostics(MagicMock(), sample_size=3, per_record=False)
+        diagnostics.record('update', logging.INFO, "Org %s", 1)
+        other = diagnostics.spawn(MagicMock())
+        for index in range(2, 6):
+            other.record('update', logging.INFO, "Org %s", index)
+
+        # Calling the method to test
+        diagnostics.merge(other)
+
+        # Assertions
+        assert diagnostics.summary() == {
+            'update': {'count': 5, 'samples': ['Org 1', 'Org 2', 'Org 3']}
+        }
+
+    def test_prepare_reconciliation_tasks_summary(self):
+        self.logger.info(
+            "Executing test for prepare_reconciliation_tasks diagnostics summary..."
+        )
+        # Setting up
+        mock_logger = MagicMock()
+        base = ReconciliationManager(
+            mock_logger,
+            self.read_json(os.path.join(TEST_DATAPATH, 'snow-customers.json')),
+            self.read_json(os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')),
+            diagnostics=RecordDiagnostics(mock_logger, sample_size=1, per_record=False),
+        )
+
+        # Calling the method to test
+        base.prepare_reconciliation_tasks()
+
+        # Assertions
+        summary = base.diagnostics.summary()
+        assert summary['update']['count'] == base.task_counts['update']
+        assert summary['delete']['count'] == base.task_counts['delete']
+        assert len(summary['delete']['samples']) == 1
+        mock_logger.warn.assert_not_called()
+
+    def test_background_logging(self):
+        self.logger.info("Executing test for BackgroundLogging...")
+        # Setting up
+        logging_logger = logging.getLogger('TestDiagnostics.background')
+        logging_logger.propagate = False
+        handler = ListHandler()
+        logging_logger.addHandler(handler)
+
+        # Calling the method to test
+        with BackgroundLogging(logging_logger):
+            assert logging_logger.handlers != [handler]
+            for index in range(3):
+                logging_logger.warning("Org %s", index)
+
+        # Assertions
+        assert handler.messages == ['Org 0', 'Org 1', 'Org 2']
+        assert logging_logger.handlers == [handler]
+        logging_logger.removeHandler(handler)
@@ -0,0 +1,204 @@
+"""
+Test class for testing the out-of-core (external sort-merge) reconciliation.
+"""
+
+import copy
+import json
+import os
+import random
+
+from unittest.mock import patch
+
+import external_reconciliation
+
+from ReconciliationManager import ReconciliationManager
+from external_reconciliation import ExternalSorter, MemoryBudget
+from task_writer import TaskWriter
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+# Small enough for every input to be spilled in several sorted runs.
+MEMORY_BUDGET = 4096
+
+
+class PeakMemoryBudget(MemoryBudget):
+    # Records the most bytes held by the sorters once an entry is added.
+    instances = []
+
+    def __init__(self, limit):
+        super(PeakMemoryBudget, self).__init__(limit)
+        self.peak = 0
+        self.instances.append(self)
+
+    def reserve(self, size):
+        super(PeakMemoryBudget, self).reserve(size)
+        self.peak = max(self.peak, self.used)
+
+
+class TestExternalReconciliation(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestExternalReconciliation, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def setUp(self):
+        self.snow_cust_data = self.read_json(
+            os.path.join(TEST_DATAPATH, 'snow-customers.json')
+        )
+        self.monit_orgs_data = self.read_json(
+            os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')
+        )
+        self.spill_dpath = os.path.join(OUTPUT_DATAPATH, 'external-spill')
+        os.makedirs(self.spill_dpath, exist_ok=True)
+
+    def assert_same_reconciliation_tasks(self, snow_cust_data, monit_orgs_data):
+        base = ReconciliationManager(self.logger, snow_cust_data, monit_orgs_data)
+        expected_content = self.pretty_json(base.prepare_reconciliation_tasks())
+
+        external_base = ReconciliationManager(
+            self.logger, iter(snow_cust_data), iter(monit_orgs_data)
+        )
+        actual_prepared_tasks = external_base.prepare_external_reconciliation_tasks(
+            memory_budget=MEMORY_BUDGET, spill_dpath=self.spill_dpath
+        )
+
+        assert self.pretty_json(actual_prepared_tasks) == expected_content
+        assert external_base.task_counts == base.task_counts
+        assert external_base.fingerprint_stats == base.fingerprint_stats
+        # Spill files are removed once merged.
+        assert os.listdir(self.spill_dpath) == []
+        return external_base
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_external_sorter(self):
+        self.logger.info("Executing test for ExternalSorter...")
+        # Setting up
+        keys = [(f'{value:04d}', index) for index, value in enumerate(range(500))]
+        random.Random(7).shuffle(keys)
+        sorter = ExternalSorter(1024, self.spill_dpath, fan_in=3)
+
+        # Calling the method to test
+        for key in keys:
+            sorter.add(key, {'key': list(key)})
+        entries = list(sorter)
+
+        # Assertions
+        assert [key for key, _ in entries] == sorted(keys)
+        assert all(item['key'] == list(key) for key, item in entries)
+        # More runs than the fan-in: merged in several passes.
+        assert sorter.spilled_runs > 3
+        assert os.listdir(self.spill_dpath) == []
+
+        # In memory when the budget is not reached.
+        sorter = ExternalSorter(1024 * 1024, self.spill_dpath)
+        for key in keys:
+            sorter.add(key, None)
+        assert [key for key, _ in sorter] == sorted(keys)
+        assert sorter.spilled_runs == 0
+
+    def test_memory_budget(self):
+        self.logger.info("Executing test for MemoryBudget...")
+        # Setting up
+        budget = PeakMemoryBudget(4096)
+        first_sorter = ExternalSorter(budget, self.spill_dpath)
+        second_sorter = ExternalSorter(budget, self.spill_dpath)
+
+        # Calling the method to test
+        for index in range(20):
+            first_sorter.add((f'{index:04d}',), None)
+        first_bytes = first_sorter.buffer_bytes
+        for index in range(100):
+            second_sorter.add((f'{index:04d}',), None)
+
+        # Assertions
+        assert first_bytes > 2048
+        # The largest buffer, then the second sorter's, are spilled to stay in budget.
+        assert first_sorter.spilled_runs == 1 and first_sorter.buffer_bytes == 0
+        assert second_sorter.spilled_runs > 1
+        assert budget.peak < 4096
+        assert len(list(first_sorter)) == 20 and len(list(second_sorter)) == 100
+        assert budget.used == 0
+
+    def test_prepare_external_reconciliation_tasks(self):
+        self.logger.info("Executing test for prepare_external_reconciliation_tasks...")
+        # Calling the method to test
+        with patch.object(external_reconciliation, 'MemoryBudget', PeakMemoryBudget):
+            external_base = self.assert_same_reconciliation_tasks(
+                self.snow_cust_data, self.monit_orgs_data
+            )
+        budget = PeakMemoryBudget.instances[-1]
+
+        # Assertions
+        assert external_base.metrics.get_counter('spilled_runs') > 4
+        # The sorters only exceed their shared budget by the last entry added.
+        assert budget.peak < MEMORY_BUDGET + 1024
+        assert 'matching' in external_base.metrics.as_dict()['phases']
+
+    def test_prepare_external_reconciliation_tasks_edge_cases(self):
+        self.logger.info(
+            "Executing test for prepare_external_reconciliation_tasks edge cases..."
+        )
+        # Setting up, duplicated sys_id/crm_id, an org in sync, a missing field and a
+        # non string key.
+        snow_cust_data = copy.deepcopy(self.snow_cust_data)
+        monit_orgs_data = copy.deepcopy(self.monit_orgs_data)
+        snow_cust_data.append(dict(snow_cust_data[0], name='Renamed'))
+        snow_cust_data[3]['sys_id'] = 42
+        monit_orgs_data.extend(copy.deepcopy(monit_orgs_data[:2]))
+        linked_monit_orgs = [
+            monit_org_record
+            for monit_org_record in monit_orgs_data
+            if monit_org_record['details'].get('crm_id')
+        ]
+        linked_monit_orgs[0]['details'].update(
+            ReconciliationManager(self.logger, (), ())._map_snow_cust_record(
+                snow_cust_data[1]
+            )
+        )
+        del linked_monit_orgs[1]['details']['zip']
+        linked_monit_orgs[2]['details']['crm_id'] = 42
+
+        # Calling the method to test
+        self.assert_same_reconciliation_tasks(snow_cust_data, monit_orgs_data)
+        self.assert_same_reconciliation_tasks([], monit_orgs_data)
+        self.assert_same_reconciliation_tasks(snow_cust_data, [])
+
+    def test_prepare_external_reconciliation_tasks_task_writer(self):
+        self.logger.info(
+            "Executing test for prepare_external_reconciliation_tasks with a task writer..."  # NOQA
+        )
+        # Setting up
+        base = ReconciliationManager(
+            self.logger, self.snow_cust_data, self.monit_orgs_data
+        )
+        expected_prepared_tasks = base.prepare_reconciliation_tasks()
+        output_fpath = os.path.join(OUTPUT_DATAPATH, 'external-tasks.jsonl')
+
+        # Calling the method to test
+        with TaskWriter(output_fpath, fmt='jsonl') as task_writer:
+            external_base = ReconciliationManager.from_json_files(
+                self.logger,
+                os.path.join(TEST_DATAPATH, 'snow-customers.json'),
+                os.path.join(TEST_DATAPATH, 'monitoring-orgs.json'),
+                task_writer=task_writer,
+            )
+            external_base.prepare_external_reconciliation_tasks(
+                memory_budget=MEMORY_BUDGET, spill_dpath=self.spill_dpath
+            )
+
+        # Assertions
+        with open(output_fpath, 'r') as f:
+            entries = [json.loads(line) for line in f]
+        for action, tasks in expected_prepared_tasks.items():
+            assert [
+                entry['task'] for entry in entries if entry['action'] == action
+            ] == tasks
+        assert external_base.task_writer is task_writer
+        assert external_base.task_counts == base.task_counts
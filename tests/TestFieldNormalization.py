@@ -0,0 +1,129 @@
+"""
+Test class for testing the field-level normalization of the reconciliation.
+"""
+
+import os
+import pickle
+
+from ReconciliationManager import ReconciliationManager
+from field_normalization import FieldNormalizer
+from .TestLogger import Logger
+from .TestBase import TestBase
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestFieldNormalization(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestFieldNormalization, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def get_manager(self, **kwargs):
+        return ReconciliationManager(
+            self.logger,
+            self.read_json(os.path.join(TEST_DATAPATH, 'snow-customers.json')),
+            self.read_json(os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')),
+            **kwargs,
+        )
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_equal(self):
+        self.logger.info("Executing test for FieldNormalizer.equal...")
+        # Setting up
+        normalizer = FieldNormalizer()
+
+        # Calling the method to test and assertions
+        assert normalizer.equal('country', 'Australia', 'AU')
+        assert normalizer.equal('country', 'USA', 'US')
+        assert normalizer.equal('country', ' united states ', 'US')
+        assert not normalizer.equal('country', 'Australia', 'NZ')
+        assert normalizer.equal('state', 'Victoria ', 'VIC')
+        assert not normalizer.equal('state', 'Victoria', '')
+        assert normalizer.equal('city', 'SYDNEY ', 'Sydney')
+        assert normalizer.equal('company', 'Acme  Pty Ltd', 'Acme Pty Ltd')
+        assert not normalizer.equal('company', 'ACME Pty Ltd', 'Acme Pty Ltd')
+        assert normalizer.equal('latitude', '-33.8688', '-33.86880001')
+        assert not normalizer.equal('latitude', '-33.8688', '-33.87')
+        assert not normalizer.equal('latitude', '', '0')
+        assert not normalizer.equal('crm_id', 'a', 'A')
+        assert normalizer.equal('country', None, None)
+        assert not normalizer.equal('country', None, 'AU')
+        assert normalizer.stats['country'] == 3
+
+    def test_custom_rules(self):
+        self.logger.info("Executing test for FieldNormalizer custom rules...")
+        # Setting up
+        normalizer = FieldNormalizer(
+            {
+                'country': ['strip', 'country', ('aliases', {'Oz': 'AU'})],
+                'latitude': [('float', 0.01)],
+            },
+            cache_size=1,
+        )
+
+        # Calling the method to test and assertions
+        assert normalizer.equal('country', 'oz', 'Australia')
+        assert normalizer.equal('latitude', '-33.87', '-33.8688')
+        # Unhashable values are compared as they are.
+        assert normalizer.equal('latitude', [-33.87], [-33.87])
+        assert not normalizer.equal('latitude', {'value': 1}, '1')
+        assert not normalizer.equal('city', 'SYDNEY', 'Sydney')
+
+        normalizer = pickle.loads(pickle.dumps(normalizer))
+        assert normalizer.stats == {}
+        assert normalizer.equal('country', 'oz', 'Australia')
+
+    def test_prepare_reconciliation_tasks(self):
+        self.logger.info(
+            "Executing test for prepare_reconciliation_tasks with a normalizer..."
+        )
+        # Setting up
+        base = self.get_manager()
+        expected_prepared_tasks = base.prepare_reconciliation_tasks()
+        normalizer = FieldNormalizer()
+        normalized_base = self.get_manager(normalizer=normalizer)
+
+        # Calling the method to test
+        actual_prepared_tasks = normalized_base.prepare_reconciliation_tasks()
+
+        # Assertions
+        assert actual_prepared_tasks['create'] == expected_prepared_tasks['create']
+        assert actual_prepared_tasks['delete'] == expected_prepared_tasks['delete']
+        assert sum(map(len, actual_prepared_tasks['update'])) < sum(
+            map(len, expected_prepared_tasks['update'])
+        )
+        assert normalizer.stats['country'] > 0
+        expected_updates = {
+            update['uri']: update for update in expected_prepared_tasks['update']
+        }
+        # Only a subset of the raw changes of each org remain.
+        for update in actual_prepared_tasks['update']:
+            expected_update = expected_updates[update['uri']]
+            assert update.items() <= expected_update.items()
+            assert update.get('country') not in ('Australia', 'AU')
+        assert normalized_base.metrics.get_counter(
+            'normalized_matches', field='country'
+        ) == normalizer.stats['country']
+
+    def test_engines(self):
+        self.logger.info("Executing test for the engines with a normalizer...")
+        # Setting up
+        expected_prepared_tasks = self.get_manager(
+            normalizer=FieldNormalizer()
+        ).prepare_reconciliation_tasks()
+
+        # Calling the method to test and assertions
+        for shard_count in (1, 2):
+            normalizer = FieldNormalizer()
+            base = self.get_manager(normalizer=normalizer)
+            actual_prepared_tasks = base.prepare_partitioned_reconciliation_tasks(
+                shard_count=shard_count
+            )
+            assert actual_prepared_tasks == expected_prepared_tasks
+            assert normalizer.stats['country'] > 0
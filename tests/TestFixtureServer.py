@@ -0,0 +1,153 @@
+"""
+A local fixture server of the ServiceNow Table API (core_company) and of the Monitoring
+organizations API, serving the given records page by page. Used by the source adapter tests, and
+usable by hand to try the API sources on the test data:
+
+    $ python -m tests.TestFixtureServer 8000
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+SNOW_CUST_TABLE_PATH = '/api/now/table/core_company'
+MONIT_ORG_PATH = '/api/organization'
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        with server.lock:
+            server.requests.append(self.path)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            if url.path == SNOW_CUST_TABLE_PATH:
+                status, headers, content = self.get_snow_cust_page(params)
+            elif url.path == MONIT_ORG_PATH:
+                status, headers, content = self.get_monit_org_page(params)
+            else:
+                status, headers, content = 404, {}, {'error': 'Not found'}
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def get_page(self, records, offset, limit):
+        return records[offset : offset + min(limit, self.server.max_page_size)]
+
+    def get_snow_cust_page(self, params):
+        records = self.get_page(
+            self.server.snow_cust_records,
+            int(params.get('sysparm_offset', 0)),
+            int(params.get('sysparm_limit', 10000)),
+        )
+        if 'sysparm_fields' in params:
+            fields = params['sysparm_fields'].split(',')
+            records = [
+                {field: record[field] for field in fields if field in record}
+                for record in records
+            ]
+        headers = {'X-Total-Count': str(len(self.server.snow_cust_records))}
+        return 200, headers, {'result': records}
+
+    def get_monit_org_page(self, params):
+        records = self.get_page(
+            self.server.monit_org_records,
+            int(params.get('offset', 0)),
+            int(params.get('limit', 100)),
+        )
+        content = {
+            'total_matched': len(self.server.monit_org_records),
+            'total_returned': len(records),
+        }
+        if params.get('extended_fetch') == '1':
+            content['result_set'] = {record['uri']: record['details'] for record in records}
+        else:
+            content['result_set'] = [{'URI': record['uri']} for record in records]
+        return 200, {}, content
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    # with FixtureServer(snow_cust_records, monit_org_records) as server: server.url
+    # latency (seconds) is added to every request; max_page_size caps the page sizes.
+    def __init__(
+        self, snow_cust_records, monit_org_records, latency=0, max_page_size=10000, port=0
+    ):
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), FixtureRequestHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.snow_cust_records = snow_cust_records
+        self.server.monit_org_records = monit_org_records
+        self.server.latency = latency
+        self.server.max_page_size = max_page_size
+        self.server.requests = []
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={'poll_interval': 0.05}
+        )
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    @property
+    def max_in_flight(self):
+        return self.server.max_in_flight
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def read_test_data(fname):
+    with open(os.path.join(TEST_DATAPATH, fname), 'r') as f:
+        return json.loads(f.read())
+
+
+if __name__ == '__main__':
+    server = FixtureServer(
+        read_test_data('snow-customers.json'),
+        read_test_data('monitoring-orgs.json'),
+        port=int(sys.argv[1]) if len(sys.argv) > 1 else 8000,
+    )
+    print(f"Serving the test data on {server.url}")
+    server.server.serve_forever()
@@ -4,6 +4,7 @@
 # -------------------------------------------------------------------------------------------------
 
 import logging
+import os
 from logging.handlers import TimedRotatingFileHandler
 
 
@@ -21,17 +22,24 @@ class Logger(object):
         logging.getLogger("suds").setLevel(logging.WARNING)
         logging.getLogger("azure").setLevel(logging.WARNING)
 
-        file_handler = TimedRotatingFileHandler(
-            '%s.log' % name, when='midnight', backupCount=30
-        )
-        file_handler.setFormatter(formatter)
-        file_handler.setLevel(file_level)
-        logger.addHandler(file_handler)
-
-        screen_handler = logging.StreamHandler()
-        screen_handler.setFormatter(formatter)
-        screen_handler.setLevel(std_level)
-        logger.addHandler(screen_handler)
+        # The handlers are attached to the root logger once per log file, so that every
+        # test module can create its Logger without duplicating each log line.
+        log_fpath = os.path.abspath('%s.log' % name)
+        if not any(
+            getattr(handler, 'baseFilename', None) == log_fpath
+            for handler in logger.handlers
+        ):
+            file_handler = TimedRotatingFileHandler(
+                log_fpath, when='midnight', backupCount=30
+            )
+            file_handler.setFormatter(formatter)
+            file_handler.setLevel(file_level)
+            logger.addHandler(file_handler)
+
+            screen_handler = logging.StreamHandler()
+            screen_handler.setFormatter(formatter)
+            screen_handler.setLevel(std_level)
+            logger.addHandler(screen_handler)
         self.logging = logging
 
     def debug(self, message):
@@ -0,0 +1,124 @@
+"""
+Test class for testing MappedRecord.
+"""
+
+import gc
+import os
+import pickle
+
+import pytest
+
+from mapped_record import (
+    MappedRecord,
+    get_mapped_record_dict,
+    get_mapped_record_values,
+    paused_gc,
+)
+from .TestLogger import Logger
+from .TestBase import TestBase
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestMappedRecord(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestMappedRecord, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def get_snow_cust_data(self):
+        return self.read_json(os.path.join(TEST_DATAPATH, 'snow-customers-reduced.json'))
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_from_snow_cust_record(self):
+        self.logger.info("Executing test for MappedRecord.from_snow_cust_record...")
+        # Setting up
+        snow_cust_record = self.get_snow_cust_data()[0]
+
+        # Expectations setup
+        expected_mapped_record = {
+            'crm_id': '03b82e935c1f4dd9a9be0a2c21cb97d4',
+            'company': 'Pearl Lighting',
+            'address': '',
+            'city': 'Sydney',
+            'state': 'NSW',
+            'zip': '',
+            'country': 'Australia',
+            'latitude': '',
+            'longitude': '',
+        }
+
+        # Calling the method to test
+        actual_mapped_record = MappedRecord.from_snow_cust_record(snow_cust_record)
+
+        # Assertions
+        assert actual_mapped_record == expected_mapped_record
+        assert expected_mapped_record == actual_mapped_record
+        assert actual_mapped_record.to_dict() == expected_mapped_record
+        assert list(actual_mapped_record.to_dict()) == list(expected_mapped_record)
+        assert dict(actual_mapped_record) == expected_mapped_record
+        assert actual_mapped_record['company'] == 'Pearl Lighting'
+        assert actual_mapped_record.get('sys_id') is None
+        with pytest.raises(KeyError):
+            actual_mapped_record['sys_id']
+        assert 'company' in actual_mapped_record and 'sys_id' not in actual_mapped_record
+        assert list(actual_mapped_record.values()) == list(expected_mapped_record.values())
+        assert list(actual_mapped_record.items()) == list(expected_mapped_record.items())
+        assert get_mapped_record_dict(actual_mapped_record) == expected_mapped_record
+        assert get_mapped_record_values(actual_mapped_record) == get_mapped_record_values(
+            expected_mapped_record
+        )
+
+    def test_from_snow_cust_record_interned_values(self):
+        self.logger.info(
+            "Executing test for MappedRecord.from_snow_cust_record interned values..."
+        )
+        # Setting up
+        snow_cust_data = self.get_snow_cust_data()
+        snow_cust_data[1]['country'] = ''.join(['Austr', 'alia'])
+        interned_values = {}
+
+        # Calling the method to test
+        mapped_records = [
+            MappedRecord.from_snow_cust_record(snow_cust_record, interned_values)
+            for snow_cust_record in snow_cust_data
+        ]
+
+        # Assertions
+        assert snow_cust_data[0]['country'] is not snow_cust_data[1]['country']
+        assert mapped_records[0]['country'] is mapped_records[1]['country']
+
+    def test_pickle(self):
+        self.logger.info("Executing test for MappedRecord pickling...")
+        # Setting up
+        mapped_record = MappedRecord.from_snow_cust_record(self.get_snow_cust_data()[1])
+
+        # Calling the method to test
+        actual_mapped_record = pickle.loads(pickle.dumps(mapped_record))
+
+        # Assertions
+        assert actual_mapped_record == mapped_record
+        assert actual_mapped_record.values_tuple() == mapped_record.values_tuple()
+
+    def test_paused_gc(self):
+        self.logger.info("Executing test for paused_gc...")
+        # Calling the method to test and assertions
+        with paused_gc():
+            assert not gc.isenabled()
+        assert gc.isenabled()
+        with pytest.raises(ValueError):
+            with paused_gc():
+                raise ValueError("Mapping failed")
+        assert gc.isenabled()
+        gc.disable()
+        try:
+            with paused_gc():
+                pass
+            assert not gc.isenabled()
+        finally:
+            gc.enable()
@@ -0,0 +1,137 @@
+"""
+Test class for testing MetricsCollector and its use by ReconciliationManager.
+"""
+
+import json
+import os
+
+from logger_decorator import log_time
+from metrics import MetricsCollector
+from ReconciliationManager import ReconciliationManager
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestMetrics(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestMetrics, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def get_reconciliation_manager(self, metrics=None):
+        return ReconciliationManager(
+            self.logger,
+            self.read_json(os.path.join(TEST_DATAPATH, 'snow-customers.json')),
+            self.read_json(os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')),
+            metrics=metrics,
+        )
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_phase(self):
+        self.logger.info("Executing test for MetricsCollector.phase...")
+        # Setting up
+        metrics = MetricsCollector()
+
+        # Calling the method to test
+        for records in (3, 5):
+            with metrics.phase('mapping') as phase:
+                phase.records = records
+        metrics.add('diffing', 100, 1)
+        metrics.add('diffing', 300, 1)
+
+        # Assertions
+        mapping = metrics.get_phase('mapping')
+        assert mapping['calls'] == 2
+        assert mapping['records'] == 8
+        assert mapping['min_ns'] <= mapping['max_ns'] <= mapping['total_ns']
+        assert metrics.get_phase('diffing') == {
+            'calls': 2,
+            'total_ns': 400,
+            'min_ns': 100,
+            'max_ns': 300,
+            'mean_ns': 200,
+            'records': 2,
+            'peak_rss_delta_bytes': 0,
+            'traced_memory_delta_bytes': 0,
+        }
+
+    def test_counters(self):
+        self.logger.info("Executing test for MetricsCollector counters...")
+        # Setting up
+        metrics = MetricsCollector()
+
+        # Calling the method to test
+        metrics.increment('tasks', action='create')
+        metrics.increment('tasks', 2, action='create')
+        metrics.set('tasks', 4, action='delete')
+
+        # Assertions
+        assert metrics.get_counter('tasks', action='create') == 3
+        assert metrics.get_counter('tasks', action='delete') == 4
+        assert metrics.get_counter('tasks', action='update') == 0
+
+    def test_to_prometheus(self):
+        self.logger.info("Executing test for MetricsCollector.to_prometheus...")
+        # Setting up
+        metrics = MetricsCollector()
+        metrics.add('writing', 2500000000, 10)
+        metrics.set('tasks', 7, action='update')
+
+        # Calling the method to test
+        actual_text = metrics.to_prometheus()
+
+        # Assertions
+        lines = actual_text.splitlines()
+        assert '# TYPE reconciliation_phase_seconds_total counter' in lines
+        assert 'reconciliation_phase_seconds_total{phase="writing"} 2.5' in lines
+        assert 'reconciliation_phase_records_total{phase="writing"} 10' in lines
+        assert 'reconciliation_tasks{action="update"} 7' in lines
+
+    def test_prepare_reconciliation_tasks_metrics(self):
+        self.logger.info(
+            "Executing test for prepare_reconciliation_tasks metrics..."
+        )
+        # Setting up
+        metrics = MetricsCollector()
+        base = self.get_reconciliation_manager(metrics)
+        monit_orgs_count = len(base.monit_orgs)
+
+        # Calling the method to test
+        actual_prepared_tasks = base.prepare_reconciliation_tasks()
+        base.write_json_output(
+            os.path.join(OUTPUT_DATAPATH, 'metrics-tasks'), actual_prepared_tasks
+        )
+
+        # Assertions
+        assert base.metrics is metrics
+        actual_metrics = json.loads(metrics.to_json())
+        phases = actual_metrics['phases']
+        assert phases['mapping']['records'] == len(base.snow_cust_data)
+        assert phases['matching']['records'] == monit_orgs_count
+        assert phases['diffing']['records'] == base.fingerprint_stats['misses']
+        assert phases['writing']['records'] == sum(base.task_counts.values())
+        assert phases['prepare_reconciliation_tasks']['calls'] == 1
+        # The timed steps of the explicit phases are not recorded twice.
+        assert '_get_mapped_snow_cust_to_monit_org' not in phases
+        assert 'write_json_output' not in phases
+        for action, count in base.task_counts.items():
+            assert metrics.get_counter('tasks', action=action) == count
+
+    def test_log_time_without_logger(self):
+        self.logger.info("Executing test for log_time without a logger...")
+
+        # Setting up
+        @log_time()
+        def add(a, b):
+            return a + b
+
+        # Calling the method to test and assertions
+        assert add(1, 2) == 3
+        assert add.__name__ == 'add'
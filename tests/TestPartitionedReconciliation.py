@@ -0,0 +1,137 @@
+"""
+Test class for testing the partitioned (process pool) reconciliation.
+"""
+
+import os
+
+from field_mappings import MONIT_ORG_FIELDS, SNOW_CUST_FIELDS
+from partitioned_reconciliation import get_shard, reconcile_shard
+from ReconciliationManager import ReconciliationManager
+from .TestLogger import Logger
+from .TestBase import TestBase
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestPartitionedReconciliation(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestPartitionedReconciliation, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def get_reconciliation_manager(self, snow_cust_fname, monit_orgs_fname):
+        snow_cust_fpath = os.path.join(TEST_DATAPATH, snow_cust_fname)
+        monit_orgs_fpath = os.path.join(TEST_DATAPATH, monit_orgs_fname)
+
+        return ReconciliationManager(
+            self.logger, self.read_json(snow_cust_fpath), self.read_json(monit_orgs_fpath)
+        )
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_get_shard(self):
+        self.logger.info("Executing test for get_shard...")
+        sys_id = '03b82e935c1f4dd9a9be0a2c21cb97d4'
+        assert get_shard(sys_id, 8) == get_shard(sys_id, 8)
+        assert 0 <= get_shard(sys_id, 8) < 8
+        assert get_shard(sys_id, 1) == 0
+
+    def test_reconcile_shard(self):
+        self.logger.info("Executing test for reconcile_shard...")
+        # Setting up, a duplicated sys_id, an org in sync and an org without crm_id.
+        snow_cust_records = [
+            {'sys_id': f'CRM-{index}', 'name': f'Org {index}'} for index in range(1, 4)
+        ]
+        snow_cust_records.append({'sys_id': 'CRM-3', 'name': 'Org 3b'})
+        snow_cust_records = [
+            dict(dict.fromkeys(SNOW_CUST_FIELDS), **snow_cust_record)
+            for snow_cust_record in snow_cust_records
+        ]
+        monit_orgs = [{'uri': '/api/organization/0', 'details': {}}]
+        for index, details in [
+            (1, {'crm_id': 'CRM-1', 'company': 'Org 1'}),
+            (2, {'crm_id': 'CRM-2', 'company': 'Org'}),
+            (4, {'crm_id': 'CRM-4'}),
+        ]:
+            monit_orgs.append(
+                {
+                    'uri': f'/api/organization/{index}',
+                    'details': dict(dict.fromkeys(MONIT_ORG_FIELDS), **details),
+                }
+            )
+
+        # Calling the method to test
+        positioned_tasks, fingerprint_stats, *_ = reconcile_shard(
+            ReconciliationManager, snow_cust_records, monit_orgs
+        )
+        shard_tasks, shard_fingerprint_stats, *_ = reconcile_shard(
+            ReconciliationManager, snow_cust_records, monit_orgs, [1, 2, 3], [2, 3]
+        )
+
+        # Assertions
+        assert positioned_tasks == {
+            'update': [(2, {'company': 'Org 2', 'uri': '/api/organization/2'})],
+            'delete': [(3, '/api/organization/4')],
+            'create': [(2, 3)],
+        }
+        assert fingerprint_stats == {'hits': 1, 'misses': 1}
+        # Only the records at the positions of the shard are reconciled.
+        assert shard_tasks == positioned_tasks
+        assert shard_fingerprint_stats == {'hits': 0, 'misses': 1}
+
+    def test_prepare_partitioned_reconciliation_tasks(self):
+        self.logger.info("Executing test for prepare_partitioned_reconciliation_tasks...")
+        # Expectations setup
+        base = self.get_reconciliation_manager('snow-customers.json', 'monitoring-orgs.json')
+        expected_content = self.pretty_json(base.prepare_reconciliation_tasks())
+
+        for shard_count in [1, 3, 8]:
+            # Setting up
+            partitioned_base = self.get_reconciliation_manager(
+                'snow-customers.json', 'monitoring-orgs.json'
+            )
+
+            # Calling the method to test
+            actual_prepared_tasks = partitioned_base.prepare_partitioned_reconciliation_tasks(
+                shard_count=shard_count
+            )
+
+            # Assertions
+            assert self.pretty_json(actual_prepared_tasks) == expected_content
+            assert partitioned_base.task_counts == base.task_counts
+            assert partitioned_base.fingerprint_stats == base.fingerprint_stats
+
+    def test_prepare_partitioned_reconciliation_tasks_duplicates(self):
+        self.logger.info(
+            "Executing test for prepare_partitioned_reconciliation_tasks with duplicates..."
+        )
+        # Setting up, duplicated sys_id and crm_id in both inputs.
+        base = self.get_reconciliation_manager(
+            'snow-customers-reduced.json', 'monitoring-orgs-reduced.json'
+        )
+        base.snow_cust_data = base.snow_cust_data + [dict(base.snow_cust_data[0])]
+        base.snow_cust_data[-1]['name'] = 'Pearl Lighting Pty Ltd'
+        base.monit_orgs = base.monit_orgs + base.monit_orgs
+        partitioned_base = ReconciliationManager(
+            self.logger, base.snow_cust_data, base.monit_orgs
+        )
+
+        # Expectations setup
+        expected_prepared_tasks = base.prepare_reconciliation_tasks()
+
+        # Calling the method to test
+        actual_prepared_tasks = partitioned_base.prepare_partitioned_reconciliation_tasks(
+            shard_count=2
+        )
+
+        # Assertions
+        assert actual_prepared_tasks == expected_prepared_tasks
+        assert expected_prepared_tasks['delete'] == [
+            '/api/organization/143',
+            '/api/organization/53',
+            '/api/organization/143',
+        ]
@@ -0,0 +1,124 @@
+"""
+Test class for testing the pipelined reconciliation.
+"""
+
+import os
+
+import pytest
+
+from pipeline import run_reconciliation_pipeline
+from ReconciliationManager import ReconciliationManager
+from task_writer import TaskWriter
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class ListSink:
+    def __init__(self, fail_after=None):
+        self.tasks = []
+        self.fail_after = fail_after
+        self.aborted = False
+
+    def consume(self, task_stream):
+        for action, task in task_stream:
+            if self.fail_after is not None and len(self.tasks) == self.fail_after:
+                raise IOError("Sink failure")
+            self.tasks.append((action, task))
+        return len(self.tasks)
+
+    def abort(self):
+        self.aborted = True
+
+
+class TestPipeline(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestPipeline, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def get_reconciliation_manager(self):
+        return ReconciliationManager(
+            self.logger,
+            self.read_json(os.path.join(TEST_DATAPATH, 'snow-customers.json')),
+            self.read_json(os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')),
+        )
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_run_reconciliation_pipeline(self):
+        self.logger.info("Executing test for run_reconciliation_pipeline...")
+        # Setting up
+        base = self.get_reconciliation_manager()
+        expected_prepared_tasks = base.prepare_reconciliation_tasks()
+        pipeline_base = self.get_reconciliation_manager()
+        sink = ListSink()
+
+        # Calling the method to test
+        result = pipeline_base.run_reconciliation_pipeline(
+            sink, queue_size=2, prefetch_size=3
+        )
+
+        # Assertions
+        actual_prepared_tasks = {'create': [], 'update': [], 'delete': []}
+        for action, task in sink.tasks:
+            actual_prepared_tasks[action].append(task)
+        assert actual_prepared_tasks == expected_prepared_tasks
+        assert result == {'task_counts': base.task_counts, 'sink': len(sink.tasks)}
+        # Tasks were streamed, not accumulated.
+        assert pipeline_base.tasks == {'create': [], 'update': [], 'delete': []}
+        metrics = pipeline_base.metrics
+        assert metrics.get_gauge('queue_size', queue='tasks') == 2
+        assert 0 < metrics.get_gauge('queue_max_depth', queue='tasks') <= 2
+        assert metrics.get_gauge('queue_depth', queue='monit_orgs') == 0
+
+    def test_run_reconciliation_pipeline_task_writer(self):
+        self.logger.info("Executing test for run_reconciliation_pipeline to a file...")
+        # Setting up
+        base = self.get_reconciliation_manager()
+        expected_prepared_tasks = base.prepare_reconciliation_tasks()
+        fpath = os.path.join(OUTPUT_DATAPATH, 'pipeline-tasks.json')
+
+        # Calling the method to test
+        result = run_reconciliation_pipeline(
+            self.get_reconciliation_manager(), TaskWriter(fpath)
+        )
+
+        # Assertions
+        assert self.read_json(fpath) == expected_prepared_tasks
+        assert result['sink'] == base.task_counts
+
+    def test_run_reconciliation_pipeline_sink_failure(self):
+        self.logger.info("Executing test for run_reconciliation_pipeline failures...")
+        # Setting up
+        base = self.get_reconciliation_manager()
+        sink = ListSink(fail_after=5)
+
+        # Calling the method to test and assertions
+        with pytest.raises(IOError):
+            base.run_reconciliation_pipeline(sink, queue_size=1)
+        assert sink.aborted
+        assert base.task_writer is None
+
+    def test_run_reconciliation_pipeline_input_failure(self):
+        self.logger.info("Executing test for run_reconciliation_pipeline input failures...")
+        # Setting up
+        base = self.get_reconciliation_manager()
+        monit_orgs_data = base.monit_orgs
+
+        def failing_monit_orgs():
+            yield from monit_orgs_data[:10]
+            raise ValueError("Truncated export")
+
+        base.monit_orgs = failing_monit_orgs()
+        sink = ListSink()
+
+        # Calling the method to test and assertions
+        with pytest.raises(ValueError):
+            base.run_reconciliation_pipeline(sink)
+        assert sink.aborted
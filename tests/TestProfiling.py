@@ -0,0 +1,130 @@
+"""
+Test class for testing the per-phase profiling mode.
+"""
+
+import os
+import pstats
+import shutil
+import tracemalloc
+
+from ReconciliationManager import ReconciliationManager
+from metrics import MetricsCollector, PhaseTimer
+from profiling import SUMMARY_FNAME, PhaseProfiler
+from reconcile import main
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+def allocate(count):
+    return [str(index) * 10 for index in range(count)]
+
+
+class TestProfiling(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestProfiling, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def setUp(self):
+        self.profile_dpath = os.path.join(OUTPUT_DATAPATH, 'profile')
+        shutil.rmtree(self.profile_dpath, ignore_errors=True)
+        self.snow_cust_fpath = os.path.join(TEST_DATAPATH, 'snow-customers.json')
+        self.monit_orgs_fpath = os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')
+
+    def get_function_names(self, pstats_fpath):
+        return {function for _, _, function in pstats.Stats(pstats_fpath).stats}
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_profiled_reconciliation(self):
+        self.logger.info("Executing test for the profiled reconciliation...")
+        # Setting up
+        expected_prepared_tasks = ReconciliationManager.from_json_files(
+            self.logger, self.snow_cust_fpath, self.monit_orgs_fpath
+        ).prepare_reconciliation_tasks()
+        profiler = PhaseProfiler(self.profile_dpath)
+        base = ReconciliationManager.from_json_files(
+            self.logger,
+            self.snow_cust_fpath,
+            self.monit_orgs_fpath,
+            metrics=MetricsCollector(profiler=profiler),
+        )
+
+        # Calling the method to test
+        actual_prepared_tasks = base.prepare_reconciliation_tasks()
+        summary_fpath = profiler.write_summary()
+
+        # Assertions
+        assert actual_prepared_tasks == expected_prepared_tasks
+        assert [result['phase'] for result in profiler.results] == ['mapping', 'matching']
+        mapping, matching = profiler.results
+        assert '_map_snow_cust_record' in self.get_function_names(mapping['pstats'])
+        assert '_check_monit_org_for_update_or_delete' in self.get_function_names(
+            matching['pstats']
+        )
+        with open(mapping['allocations'], 'r') as f:
+            assert f.readline().startswith('Top 25 allocations of phase mapping')
+        assert mapping['peak_traced_bytes'] > 0
+        assert base.metrics.get_gauge(
+            'phase_peak_traced_bytes', phase='mapping'
+        ) == mapping['peak_traced_bytes']
+        assert os.path.basename(summary_fpath) == SUMMARY_FNAME
+        assert not tracemalloc.is_tracing()
+
+    def test_nested_phases(self):
+        self.logger.info("Executing test for the profiling of nested phases...")
+        # Setting up
+        metrics = MetricsCollector(profiler=PhaseProfiler(self.profile_dpath))
+
+        # Calling the method to test
+        with metrics.phase('outer'):
+            with metrics.phase('inner'):
+                inner_values = allocate(20000)
+            del inner_values
+            outer_values = allocate(100)
+
+        # Assertions
+        inner, outer = metrics.profiler.results
+        assert 'allocate' in self.get_function_names(inner['pstats'])
+        assert 'allocate' in self.get_function_names(outer['pstats'])
+        # The outer profile only counts its own call of allocate.
+        outer_stats = pstats.Stats(outer['pstats']).stats
+        assert [
+            stats[0] for key, stats in outer_stats.items() if key[2] == 'allocate'
+        ] == [1]
+        assert outer['peak_traced_bytes'] >= inner['peak_traced_bytes'] > 0
+        assert len(outer_values) == 100
+
+    def test_disabled_profiling(self):
+        self.logger.info("Executing test for the disabled profiling...")
+        # Calling the method to test and assertions
+        assert type(MetricsCollector().phase('mapping')) is PhaseTimer
+
+    def test_cli_profile(self):
+        self.logger.info("Executing test for the reconcile --profile option...")
+        # Setting up
+        output_fpath = os.path.join(OUTPUT_DATAPATH, 'profile-tasks.json')
+
+        # Calling the method to test
+        exit_code = main(
+            [
+                self.snow_cust_fpath,
+                self.monit_orgs_fpath,
+                '-o',
+                output_fpath,
+                '--profile',
+                self.profile_dpath,
+            ]
+        )
+
+        # Assertions
+        assert exit_code == 0
+        summary = self.read_json(os.path.join(self.profile_dpath, SUMMARY_FNAME))
+        assert set(summary['peak_traced_bytes']) == {'mapping', 'matching', 'writing'}
+        assert all(os.path.exists(result['pstats']) for result in summary['phases'])
@@ -0,0 +1,166 @@
+"""
+Test class for testing the command-line entry point (python -m reconcile).
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from ReconciliationManager import ReconciliationManager
+from reconcile import main
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+PROJECT_DIR = os.path.dirname(CWD)
+HEAVY_MODULES = (
+    'yaml',
+    'numpy',
+    'orjson',
+    'ujson',
+    'msgpack',
+    'multiprocessing',
+    'asyncio',
+    'logging.handlers',
+    'cProfile',
+    'profiling',
+    'inspect',
+)
+logger = Logger('testing_logger')
+
+
+class TestReconcileCli(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestReconcileCli, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def setUp(self):
+        self.snow_cust_fpath = os.path.join(TEST_DATAPATH, 'snow-customers.json')
+        self.monit_orgs_fpath = os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')
+
+    def get_loaded_heavy_modules(self, argv):
+        # Heavy modules loaded by a run in a fresh interpreter.
+        script = (
+            'import json, sys, reconcile; reconcile.main(sys.argv[1:]); '
+            f'print(json.dumps(sorted(set({HEAVY_MODULES!r}) & set(sys.modules))))'
+        )
+        process = subprocess.run(
+            [sys.executable, '-c', script] + argv,
+            cwd=PROJECT_DIR,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return json.loads(process.stdout)
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_main(self):
+        self.logger.info("Executing test for the reconcile command line...")
+        # Setting up
+        expected_prepared_tasks = ReconciliationManager(
+            self.logger,
+            self.read_json(self.snow_cust_fpath),
+            self.read_json(self.monit_orgs_fpath),
+        ).prepare_reconciliation_tasks()
+        output_fpath = os.path.join(OUTPUT_DATAPATH, 'cli-tasks.json')
+        metrics_fpath = os.path.join(OUTPUT_DATAPATH, 'cli-metrics.json')
+
+        for engine in ('default', 'external', 'pipeline'):
+            # Calling the method to test
+            exit_code = main(
+                [
+                    self.snow_cust_fpath,
+                    self.monit_orgs_fpath,
+                    '-o',
+                    output_fpath,
+                    '--engine',
+                    engine,
+                    '--metrics',
+                    metrics_fpath,
+                ]
+            )
+
+            # Assertions
+            assert exit_code == 0
+            assert self.read_json(output_fpath) == expected_prepared_tasks
+            assert 'phases' in self.read_json(metrics_fpath)
+
+        # Missing input.
+        assert main(['missing.json', self.monit_orgs_fpath, '-o', output_fpath]) == 1
+        # Unsupported input, the partial output is discarded.
+        failed_dpath = os.path.join(OUTPUT_DATAPATH, 'cli-failed')
+        shutil.rmtree(failed_dpath, ignore_errors=True)
+        os.makedirs(failed_dpath)
+        for engine in ('default', 'pipeline'):
+            failed_argv = [self.snow_cust_fpath, 'monitoring-orgs.csv', '--engine', engine]
+            failed_argv += ['-o', os.path.join(failed_dpath, 'tasks.json')]
+            assert main(failed_argv) == 1
+        assert os.listdir(failed_dpath) == []
+
+    def test_main_result_cache(self):
+        self.logger.info("Executing test for the reconcile --cache-dir option...")
+        # Setting up
+        expected_prepared_tasks = ReconciliationManager(
+            self.logger,
+            self.read_json(self.snow_cust_fpath),
+            self.read_json(self.monit_orgs_fpath),
+        ).prepare_reconciliation_tasks()
+        cache_dpath = os.path.join(OUTPUT_DATAPATH, 'cli-cache')
+        shutil.rmtree(cache_dpath, ignore_errors=True)
+        output_fpath = os.path.join(OUTPUT_DATAPATH, 'cli-cached-tasks.json')
+        metrics_fpath = os.path.join(OUTPUT_DATAPATH, 'cli-cached-metrics.json')
+        argv = [
+            self.snow_cust_fpath,
+            self.monit_orgs_fpath,
+            '-o',
+            output_fpath,
+            '--cache-dir',
+            cache_dpath,
+            '--metrics',
+            metrics_fpath,
+        ]
+
+        for expected_result in ('miss', 'hit'):
+            # Calling the method to test
+            exit_code = main(argv)
+
+            # Assertions
+            assert exit_code == 0
+            assert self.read_json(output_fpath) == expected_prepared_tasks
+            assert {
+                'name': 'result_cache',
+                'labels': {'result': expected_result},
+                'value': 1,
+            } in self.read_json(metrics_fpath)['counters']
+            assert os.listdir(cache_dpath)
+
+    def test_lazy_imports(self):
+        self.logger.info("Executing test for the reconcile command line imports...")
+        # Setting up
+        output_fpath = os.path.join(OUTPUT_DATAPATH, 'cli-lazy-tasks.jsonl')
+        options = ['-o', output_fpath, '--log-level', 'ERROR']
+
+        # Calling the method to test
+        json_run_modules = self.get_loaded_heavy_modules(
+            [self.snow_cust_fpath, self.monit_orgs_fpath, '--backend', 'json'] + options
+        )
+        yaml_run_modules = self.get_loaded_heavy_modules(
+            [
+                os.path.join(TEST_DATAPATH, 'snow-customers-reduced.yml'),
+                os.path.join(TEST_DATAPATH, 'monitoring-orgs-reduced.yml'),
+                '--backend',
+                'json',
+            ]
+            + options
+        )
+
+        # Assertions
+        assert json_run_modules == []
+        assert yaml_run_modules == ['yaml']
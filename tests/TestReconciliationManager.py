@@ -7,7 +7,11 @@ import os
 from collections import defaultdict
 from unittest.mock import MagicMock
 
-from ReconciliationManager import ReconciliationManager
+from ReconciliationManager import (
+    ReconciliationManager,
+    project_monit_org_records,
+    project_snow_cust_records,
+)
 from .TestLogger import Logger
 from .TestBase import TestBase
 
@@ -453,3 +457,154 @@ class TestReconciliationManager(TestBase):
 
         # Print output JSON
         self.print_json(actual_prepared_tasks)
+
+    def test_project_snow_cust_records(self):
+        self.logger.info("Executing test for project_snow_cust_records...")
+        # Setting up
+        snow_cust_fpath = os.path.join(TEST_DATAPATH, 'snow-customers-reduced.json')
+        snow_cust_data = self.read_json(snow_cust_fpath)
+
+        # Calling the method to test
+        actual_projected_records = list(project_snow_cust_records(snow_cust_data))
+
+        # Assertions
+        assert actual_projected_records[0] == {
+            'sys_id': '03b82e935c1f4dd9a9be0a2c21cb97d4',
+            'name': 'Pearl Lighting',
+            'street': '',
+            'city': 'Sydney',
+            'state': 'NSW',
+            'zip': '',
+            'country': 'Australia',
+            'latitude': '',
+            'longitude': '',
+            'sys_updated_on': '2019-12-13 01:04:32',
+        }
+        assert len(actual_projected_records) == len(snow_cust_data)
+
+    def test_project_monit_org_records(self):
+        self.logger.info("Executing test for project_monit_org_records...")
+        # Setting up
+        monit_orgs_fpath = os.path.join(TEST_DATAPATH, 'monitoring-orgs-reduced.json')
+        monit_orgs_data = self.read_json(monit_orgs_fpath)
+
+        # Calling the method to test
+        actual_projected_records = list(project_monit_org_records(monit_orgs_data))
+
+        # Assertions
+        assert actual_projected_records[0] == {
+            'uri': '/api/organization/53',
+            'details': {
+                'crm_id': '03b82e935c1f4dd9a9be0a2c21cb97d4',
+                'company': 'Smartechnologies',
+                'address': '',
+                'city': 'Melbourne',
+                'state': 'VIC',
+                'zip': '',
+                'country': 'AU',
+                'latitude': '',
+                'longitude': '',
+                'date_edit': '1620780558',
+            },
+        }
+        assert 'custom_fields' not in actual_projected_records[1]['details']
+
+    def test_prepare_reconciliation_tasks_streamed_inputs(self):
+        self.logger.info(
+            "Executing test for prepare_reconciliation_tasks with streamed inputs..."
+        )
+        # Setting up
+        snow_cust_data, monit_orgs_data = self.get_test_data(
+            [
+                os.path.join(TEST_DATAPATH, 'snow-customers.json'),
+                os.path.join(TEST_DATAPATH, 'monitoring-orgs.json'),
+            ]
+        )
+        base = ReconciliationManager(self.logger, snow_cust_data, monit_orgs_data)
+        streamed_base = ReconciliationManager(self.logger, None, None)
+
+        # Expectations setup
+        expected_prepared_tasks = base.prepare_reconciliation_tasks()
+
+        # Calling the method to test
+        actual_prepared_tasks = streamed_base.prepare_reconciliation_tasks(
+            project_snow_cust_records(iter(snow_cust_data)),
+            project_monit_org_records(iter(monit_orgs_data)),
+        )
+
+        # Assertions
+        assert actual_prepared_tasks == expected_prepared_tasks
+
+    def test_check_monit_org_for_unchanged(self):
+        self.logger.info(
+            "Executing test for _check_monit_org_for_update_or_delete : UNCHANGED..."
+        )
+        # Setting up
+        base = self.get_reconciliation_manager(
+            'snow-customers-reduced.json', 'monitoring-orgs-reduced.json'
+        )
+        base._get_snow_cust_data_for_monit_org_update = MagicMock()
+        dummy_mapped_snow_cust_to_monit_org = (
+            self.get_dummy_mapped_snow_cust_to_monit_org()
+        )
+        dummy_monit_org_record = {
+            'uri': '/api/organization/53',
+            'details': dict(
+                dummy_mapped_snow_cust_to_monit_org['03b82e935c1f4dd9a9be0a2c21cb97d4'],
+                date_edit='1620780558',
+            ),
+        }
+
+        # Calling the method to test
+        base._check_monit_org_for_update_or_delete(
+            dummy_mapped_snow_cust_to_monit_org, dummy_monit_org_record
+        )
+
+        # Assertions
+        assert base.tasks == {'create': [], 'update': [], 'delete': []}
+        assert base.fingerprint_stats == {'hits': 1, 'misses': 0}
+        base._get_snow_cust_data_for_monit_org_update.assert_not_called()
+
+    def test_prepare_reconciliation_tasks_fingerprint_stats(self):
+        self.logger.info(
+            "Executing test for prepare_reconciliation_tasks fingerprint stats..."
+        )
+        # Setting up
+        base = self.get_reconciliation_manager(
+            'snow-customers.json', 'monitoring-orgs.json'
+        )
+
+        # Expectations setup
+        expected_linked_monit_orgs = [
+            monit_org_record
+            for monit_org_record in base.monit_orgs
+            if monit_org_record['details'].get('crm_id')
+        ]
+
+        # Calling the method to test
+        actual_prepared_tasks = base.prepare_reconciliation_tasks()
+
+        # Assertions
+        assert base.fingerprint_stats['misses'] == len(actual_prepared_tasks['update'])
+        assert base.fingerprint_stats['hits'] + base.fingerprint_stats['misses'] + len(
+            actual_prepared_tasks['delete']
+        ) == len(expected_linked_monit_orgs)
+
+    def test_prepare_reconciliation_tasks_repeated(self):
+        self.logger.info("Executing test for prepare_reconciliation_tasks repeated...")
+        # Setting up
+        base = self.get_reconciliation_manager(
+            'snow-customers.json', 'monitoring-orgs.json'
+        )
+        first_prepared_tasks = base.prepare_reconciliation_tasks()
+        first_task_counts = dict(base.task_counts)
+        first_fingerprint_stats = dict(base.fingerprint_stats)
+
+        # Calling the method to test
+        second_prepared_tasks = base.prepare_reconciliation_tasks()
+
+        # Assertions
+        assert second_prepared_tasks == first_prepared_tasks
+        assert second_prepared_tasks is not first_prepared_tasks
+        assert base.task_counts == first_task_counts
+        assert base.fingerprint_stats == first_fingerprint_stats
@@ -0,0 +1,224 @@
+"""
+Test class for testing the long-running reconciliation service.
+"""
+
+import copy
+import json
+import os
+import threading
+
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from ReconciliationManager import ReconciliationManager
+from reconciliation_service import ReconciliationService, ServiceHTTPServer
+from .TestLogger import Logger
+from .TestBase import TestBase
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestReconciliationService(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestReconciliationService, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def setUp(self):
+        self.snow_cust_fpath = os.path.join(TEST_DATAPATH, 'snow-customers.json')
+        self.monit_orgs_fpath = os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')
+        self.snow_cust_data = self.read_json(self.snow_cust_fpath)
+        self.monit_orgs_data = self.read_json(self.monit_orgs_fpath)
+        self.service = ReconciliationService.from_json_files(
+            self.logger, self.snow_cust_fpath, self.monit_orgs_fpath
+        )
+        self.service.reconcile()
+
+    def get_linked_snow_cust(self):
+        # A ServiceNow customer with exactly one org.
+        for snow_cust_record in self.snow_cust_data:
+            linked_monit_orgs = [
+                monit_org_record
+                for monit_org_record in self.monit_orgs_data
+                if monit_org_record['details'].get('crm_id') == snow_cust_record['sys_id']
+            ]
+            if len(linked_monit_orgs) == 1:
+                return snow_cust_record, linked_monit_orgs[0]
+        raise AssertionError("No linked ServiceNow customer in the test data.")
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_reconcile(self):
+        self.logger.info("Executing test for ReconciliationService.reconcile...")
+        # Setting up
+        expected_prepared_tasks = ReconciliationManager(
+            self.logger, self.snow_cust_data, self.monit_orgs_data
+        ).prepare_reconciliation_tasks()
+
+        # Calling the method to test
+        tasks = self.service.reconcile()
+
+        # Assertions
+        for action, expected_tasks in expected_prepared_tasks.items():
+            assert [
+                entry['task'] for entry in tasks if entry['action'] == action
+            ] == expected_tasks
+        assert self.service.stats()['reconciliations'] == 2
+        assert self.service.stats()['snow_custs'] == len(
+            {record['sys_id'] for record in self.snow_cust_data}
+        )
+
+    def test_snow_cust_events(self):
+        self.logger.info("Executing test for ReconciliationService ServiceNow events...")
+        # Setting up
+        snow_cust_record, monit_org_record = self.get_linked_snow_cust()
+        renamed_record = dict(snow_cust_record, name='Renamed Company')
+        new_record = dict(snow_cust_record, sys_id='0' * 32)
+        # The org is in sync with the customer before the rename.
+        monit_org_record = copy.deepcopy(monit_org_record)
+        monit_org_record['details'].update(
+            self.service.manager._map_snow_cust_record(snow_cust_record)
+        )
+        self.service.handle_event(
+            {'type': 'monit_org_changed', 'record': monit_org_record}
+        )
+
+        # Calling the method to test and assertions
+        tasks = self.service.handle_event(
+            {'type': 'snow_cust_upserted', 'record': renamed_record}
+        )
+        assert tasks == [
+            {
+                'action': 'update',
+                'task': {'company': 'Renamed Company', 'uri': monit_org_record['uri']},
+            }
+        ]
+        tasks = self.service.handle_event(
+            {'type': 'snow_cust_upserted', 'record': new_record}
+        )
+        assert [entry['action'] for entry in tasks] == ['create']
+        assert tasks[0]['task']['crm_id'] == '0' * 32
+        tasks = self.service.handle_event(
+            {'type': 'snow_cust_deleted', 'sys_id': snow_cust_record['sys_id']}
+        )
+        assert tasks == [{'action': 'delete', 'task': monit_org_record['uri']}]
+        assert self.service.stats()['events']['snow_cust_upserted'] == 2
+
+    def test_monit_org_events(self):
+        self.logger.info("Executing test for ReconciliationService monitoring events...")
+        # Setting up
+        snow_cust_record, monit_org_record = self.get_linked_snow_cust()
+        synced_record = copy.deepcopy(monit_org_record)
+        synced_record['details'].update(
+            self.service.manager._map_snow_cust_record(snow_cust_record)
+        )
+        moved_record = copy.deepcopy(synced_record)
+        moved_record['details']['crm_id'] = 'unknown'
+
+        # Calling the method to test and assertions
+        tasks = self.service.handle_event(
+            {'type': 'monit_org_changed', 'record': synced_record}
+        )
+        assert tasks == []
+        # The customer is left without org, the org without customer.
+        tasks = self.service.handle_event(
+            {'type': 'monit_org_changed', 'record': moved_record}
+        )
+        assert [entry['action'] for entry in tasks] == ['create', 'delete']
+        tasks = self.service.handle_event(
+            {'type': 'monit_org_deleted', 'uri': monit_org_record['uri']}
+        )
+        assert tasks == []
+        with pytest.raises(ValueError):
+            self.service.handle_event({'type': 'unknown'})
+
+    def test_monit_org_changed_position(self):
+        self.logger.info(
+            "Executing test for the position of a changed org in ReconciliationService..."
+        )
+        # Setting up, a second org of the crm_id.
+        snow_cust_record, monit_org_record = self.get_linked_snow_cust()
+        duplicated_record = copy.deepcopy(monit_org_record)
+        duplicated_record['uri'] = '/api/organization/duplicated'
+        self.service.handle_event(
+            {'type': 'monit_org_changed', 'record': duplicated_record}
+        )
+        renamed_record = copy.deepcopy(monit_org_record)
+        renamed_record['details']['company'] = 'Renamed Organization'
+
+        # Calling the method to test
+        tasks = self.service.handle_event(
+            {'type': 'monit_org_changed', 'record': renamed_record}
+        )
+
+        # Assertions
+        # The changed org is still the first one of the crm_id: it is the one updated.
+        assert [entry['action'] for entry in tasks] == ['update', 'delete']
+        assert tasks[0]['task']['uri'] == monit_org_record['uri']
+        assert tasks[1]['task'] == duplicated_record['uri']
+        assert self.service.monit_org_uris[snow_cust_record['sys_id']] == [
+            monit_org_record['uri'],
+            duplicated_record['uri'],
+        ]
+
+    def test_handle_events_atomic(self):
+        self.logger.info("Executing test for ReconciliationService.handle_events...")
+        # Setting up
+        snow_cust_record, monit_org_record = self.get_linked_snow_cust()
+        events = [
+            {'type': 'snow_cust_deleted', 'sys_id': snow_cust_record['sys_id']},
+            {'type': 'monit_org_changed', 'record': {'details': {}}},
+        ]
+        expected_stats = self.service.stats()
+
+        # Calling the method to test
+        with pytest.raises(ValueError):
+            self.service.handle_events(events)
+
+        # Assertions
+        # The valid first event is not applied either.
+        assert self.service.stats() == expected_stats
+        assert snow_cust_record['sys_id'] in self.service.snow_custs
+        assert self.service.handle_events(events[:1]) == [
+            {'action': 'delete', 'task': monit_org_record['uri']}
+        ]
+
+    def test_http_endpoint(self):
+        self.logger.info("Executing test for the ReconciliationService HTTP endpoint...")
+        # Setting up
+        snow_cust_record, monit_org_record = self.get_linked_snow_cust()
+        server = ServiceHTTPServer(('127.0.0.1', 0), self.service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+
+        def post(path, content):
+            request = Request(base_url + path, data=json.dumps(content).encode('utf-8'))
+            with urlopen(request) as response:
+                return json.loads(response.read())
+
+        try:
+            # Calling the method to test
+            content = post(
+                '/events',
+                [{'type': 'snow_cust_deleted', 'sys_id': snow_cust_record['sys_id']}],
+            )
+            with urlopen(base_url + '/stats') as response:
+                stats = json.loads(response.read())
+            with pytest.raises(HTTPError) as error:
+                post('/events', {'type': 'unknown'})
+
+            # Assertions
+            assert content == {
+                'tasks': [{'action': 'delete', 'task': monit_org_record['uri']}]
+            }
+            assert stats['events']['snow_cust_deleted'] == 1
+            assert error.value.code == 400
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,141 @@
+"""
+Test class for testing the incremental JSON record loader.
+"""
+
+import io
+import json
+import os
+
+import pytest
+
+from record_loader import iter_json_array, iter_json_file
+from ReconciliationManager import (
+    MONIT_ORG_PROJECTION,
+    SNOW_CUST_PROJECTION,
+    ReconciliationManager,
+)
+from .TestLogger import Logger
+from .TestBase import TestBase
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestRecordLoader(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestRecordLoader, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_iter_json_file(self):
+        self.logger.info("Executing test for iter_json_file...")
+        for fname in ['snow-customers.json', 'monitoring-orgs.json']:
+            # Setting up
+            fpath = os.path.join(TEST_DATAPATH, fname)
+
+            # Expectations setup
+            expected_records = self.read_json(fpath)
+
+            # Calling the method to test
+            actual_records = list(iter_json_file(fpath))
+            actual_mmap_records = list(iter_json_file(fpath, use_mmap=True))
+
+            # Assertions
+            assert actual_records == expected_records
+            assert actual_mmap_records == expected_records
+
+    def test_iter_json_array_small_chunks(self):
+        self.logger.info("Executing test for iter_json_array with small chunks...")
+        # Setting up
+        content = '[1, 23, 456, "a\\"b", {"x": [1, 2]}, 7.25, null, "café"]'
+
+        # Expectations setup
+        expected_records = json.loads(content)
+
+        # Calling the method to test
+        actual_text_records = list(iter_json_array(io.StringIO(content), chunk_size=1))
+        actual_bytes_records = list(
+            iter_json_array(io.BytesIO(content.encode('utf-8')), chunk_size=1)
+        )
+
+        # Assertions
+        assert actual_text_records == expected_records
+        assert actual_bytes_records == expected_records
+
+    def test_iter_json_array_empty(self):
+        self.logger.info("Executing test for iter_json_array with empty inputs...")
+        assert list(iter_json_array(io.StringIO('[]'))) == []
+        assert list(iter_json_array(io.StringIO(' [ \n ] '))) == []
+        assert list(iter_json_array(io.StringIO(''))) == []
+
+    def test_iter_json_array_malformed(self):
+        self.logger.info("Executing test for iter_json_array with malformed inputs...")
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('{"a": 1}')))
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('[{"a": 1} {"b": 2}]')))
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('[{"a": 1}, {"b": ')))
+
+    def test_iter_json_file_projection(self):
+        self.logger.info("Executing test for iter_json_file with field projection...")
+        # Setting up
+        fpath = os.path.join(TEST_DATAPATH, 'monitoring-orgs-reduced.json')
+
+        # Calling the method to test
+        actual_records = list(iter_json_file(fpath, fields=MONIT_ORG_PROJECTION))
+
+        # Assertions
+        assert actual_records[1] == {
+            'uri': '/api/organization/143',
+            'details': {
+                'crm_id': '1622ba1365444b7dae75daf7f073a05a',
+                'company': 'Bridgelectrics',
+                'address': '',
+                'city': '',
+                'state': '',
+                'zip': '',
+                'country': 'AU',
+                'latitude': '',
+                'longitude': '',
+                'date_edit': '1625234440',
+            },
+        }
+
+        # Setting up
+        fpath = os.path.join(TEST_DATAPATH, 'snow-customers-reduced.json')
+
+        # Calling the method to test
+        actual_records = list(iter_json_file(fpath, fields=SNOW_CUST_PROJECTION))
+
+        # Assertions
+        assert [set(record) for record in actual_records] == [
+            set(SNOW_CUST_PROJECTION),
+            set(SNOW_CUST_PROJECTION),
+        ]
+
+    def test_reconciliation_manager_from_json_files(self):
+        self.logger.info("Executing test for ReconciliationManager.from_json_files...")
+        # Setting up
+        snow_cust_fpath = os.path.join(TEST_DATAPATH, 'snow-customers.json')
+        monit_orgs_fpath = os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')
+        base = ReconciliationManager(
+            self.logger, self.read_json(snow_cust_fpath), self.read_json(monit_orgs_fpath)
+        )
+
+        # Expectations setup
+        expected_prepared_tasks = base.prepare_reconciliation_tasks()
+
+        # Calling the method to test
+        streamed_base = ReconciliationManager.from_json_files(
+            self.logger, snow_cust_fpath, monit_orgs_fpath, use_mmap=True
+        )
+        actual_prepared_tasks = streamed_base.prepare_reconciliation_tasks()
+
+        # Assertions
+        assert actual_prepared_tasks == expected_prepared_tasks
@@ -0,0 +1,160 @@
+"""
+Test class for testing the result cache of the reconciliation tasks.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from ReconciliationManager import ReconciliationManager
+from field_normalization import FieldNormalizer, casefold, strip
+from result_cache import ResultCache, get_cache_key
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+PROJECT_DIR = os.path.dirname(CWD)
+logger = Logger('testing_logger')
+
+
+class TestResultCache(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestResultCache, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def setUp(self):
+        self.cache_dpath = os.path.join(OUTPUT_DATAPATH, 'result-cache')
+        shutil.rmtree(self.cache_dpath, ignore_errors=True)
+        # The source is copied, as some tests modify it.
+        self.snow_cust_fpath = os.path.join(OUTPUT_DATAPATH, 'cache-snow-customers.json')
+        shutil.copyfile(
+            os.path.join(TEST_DATAPATH, 'snow-customers.json'), self.snow_cust_fpath
+        )
+        self.monit_orgs_fpath = os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')
+
+    def get_manager(self, **kwargs):
+        return ReconciliationManager.from_json_files(
+            self.logger, self.snow_cust_fpath, self.monit_orgs_fpath, **kwargs
+        )
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_prepare_reconciliation_tasks_cached(self):
+        self.logger.info("Executing test for prepare_reconciliation_tasks cached...")
+        # Setting up
+        result_cache = ResultCache(self.cache_dpath)
+        expected_prepared_tasks = self.get_manager().prepare_reconciliation_tasks()
+
+        # Calling the method to test
+        first_base = self.get_manager()
+        first_prepared_tasks = first_base.prepare_reconciliation_tasks(
+            result_cache=result_cache
+        )
+        second_base = self.get_manager()
+        second_prepared_tasks = second_base.prepare_reconciliation_tasks(
+            result_cache=result_cache
+        )
+
+        # Assertions
+        assert first_prepared_tasks == expected_prepared_tasks
+        assert second_prepared_tasks == expected_prepared_tasks
+        assert second_base.task_counts == first_base.task_counts
+        assert result_cache.stats == {'hits': 1, 'misses': 1, 'evictions': 0}
+        assert second_base.metrics.get_counter('result_cache', result='hit') == 1
+        # The cache hit neither mapped nor matched any record.
+        assert 'mapping' not in second_base.metrics.as_dict()['phases']
+
+        # Changed input: cache miss.
+        snow_cust_data = self.read_json(self.snow_cust_fpath)
+        snow_cust_data[0]['name'] = 'Renamed Company'
+        with open(self.snow_cust_fpath, 'w') as f:
+            f.write(json.dumps(snow_cust_data))
+        self.get_manager().prepare_reconciliation_tasks(result_cache=result_cache)
+        assert result_cache.stats['misses'] == 2
+
+    def test_prepare_reconciliation_tasks_cached_records(self):
+        self.logger.info(
+            "Executing test for prepare_reconciliation_tasks cached records..."
+        )
+        # Setting up
+        result_cache = ResultCache(self.cache_dpath)
+        snow_cust_data = self.read_json(self.snow_cust_fpath)
+        monit_orgs_data = self.read_json(self.monit_orgs_fpath)
+        expected_prepared_tasks = ReconciliationManager(
+            self.logger, snow_cust_data, monit_orgs_data
+        ).prepare_reconciliation_tasks()
+
+        # Calling the method to test and assertions
+        for _ in range(2):
+            base = ReconciliationManager(self.logger, None, None)
+            actual_prepared_tasks = base.prepare_reconciliation_tasks(
+                iter(snow_cust_data), iter(monit_orgs_data), result_cache=result_cache
+            )
+            assert actual_prepared_tasks == expected_prepared_tasks
+        assert result_cache.stats['hits'] == 1
+
+        # Other normalization rules give other tasks.
+        base = ReconciliationManager(
+            self.logger, snow_cust_data, monit_orgs_data, normalizer=FieldNormalizer()
+        )
+        base.prepare_reconciliation_tasks(result_cache=result_cache)
+        assert result_cache.stats['misses'] == 2
+
+    def test_get_cache_key(self):
+        self.logger.info("Executing test for get_cache_key...")
+        # Setting up, a function step, whose repr changes in every process.
+        normalizer = FieldNormalizer({'city': [strip, 'casefold']})
+        code = (
+            "from field_normalization import FieldNormalizer, strip\n"
+            "from result_cache import get_cache_key\n"
+            "print(get_cache_key([b'0'], FieldNormalizer({'city': [strip, 'casefold']})))"
+        )
+
+        # Calling the method to test
+        other_process_key = subprocess.check_output(
+            [sys.executable, '-c', code], cwd=PROJECT_DIR
+        )
+
+        # Assertions
+        assert other_process_key.decode().strip() == get_cache_key([b'0'], normalizer)
+        assert get_cache_key([b'0'], normalizer) != get_cache_key(
+            [b'0'], FieldNormalizer({'city': [casefold, 'casefold']})
+        )
+        with pytest.raises(ValueError):
+            get_cache_key([b'0'], FieldNormalizer({'city': [lambda value: value]}))
+
+    def test_eviction_and_invalidation(self):
+        self.logger.info("Executing test for ResultCache eviction and invalidation...")
+        # Setting up
+        result_cache = ResultCache(self.cache_dpath, max_entries=2)
+        keys = [get_cache_key([bytes([index])]) for index in range(3)]
+
+        # Calling the method to test and assertions
+        result_cache.put(keys[0], {'create': [], 'update': [], 'delete': ['/0']})
+        result_cache.put(keys[1], {'create': [], 'update': [], 'delete': ['/1']})
+        os.utime(result_cache.get_fpath(keys[0]), ns=(0, 0))
+        os.utime(result_cache.get_fpath(keys[1]), ns=(1, 1))
+        # Least recently used: keys[1] once keys[0] is used.
+        assert result_cache.get(keys[0])['delete'] == ['/0']
+        result_cache.put(keys[2], {'create': [], 'update': [], 'delete': ['/2']})
+        assert result_cache.get(keys[1]) is None
+        assert result_cache.get(keys[2])['delete'] == ['/2']
+        assert result_cache.stats['evictions'] == 1
+
+        assert result_cache.invalidate(keys[2])
+        assert not result_cache.invalidate(keys[2])
+        result_cache.clear()
+        assert result_cache.get_entries() == []
+
+        # Size bound.
+        result_cache = ResultCache(self.cache_dpath, max_bytes=10)
+        result_cache.put(keys[0], {'create': [], 'update': [], 'delete': ['/0']})
+        assert result_cache.get_entries() == []
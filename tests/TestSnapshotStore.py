@@ -0,0 +1,217 @@
+"""
+Test class for testing the delta reconciliation with SnapshotStore.
+"""
+
+import copy
+import os
+
+from unittest.mock import patch
+
+from ReconciliationManager import ReconciliationManager
+from result_cache import get_cache_key
+from snapshot_store import SnapshotStore, get_in_sync_state
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestSnapshotStore(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestSnapshotStore, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def setUp(self):
+        self.snapshot_fpath = os.path.join(OUTPUT_DATAPATH, 'snapshot.sqlite3')
+        if os.path.exists(self.snapshot_fpath):
+            os.remove(self.snapshot_fpath)
+        self.snow_cust_data = self.read_json(
+            os.path.join(TEST_DATAPATH, 'snow-customers.json')
+        )
+        self.monit_orgs_data = self.read_json(
+            os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')
+        )
+
+    def prepare_delta_reconciliation_tasks(self, snow_cust_data, monit_orgs_data):
+        base = ReconciliationManager(self.logger, snow_cust_data, monit_orgs_data)
+        with SnapshotStore(self.snapshot_fpath) as snapshot_store:
+            prepared_tasks = base.prepare_delta_reconciliation_tasks(snapshot_store)
+
+        return prepared_tasks, base.delta_stats
+
+    def prepare_reconciliation_tasks(self, snow_cust_data, monit_orgs_data):
+        base = ReconciliationManager(self.logger, snow_cust_data, monit_orgs_data)
+        return base.prepare_reconciliation_tasks()
+
+    def load_in_sync_state(self):
+        with SnapshotStore(self.snapshot_fpath) as snapshot_store:
+            return snapshot_store.load_in_sync_state(get_cache_key([]))
+
+    def get_in_sync_data(self):
+        # The first 20 records, with the first org put in sync with its ServiceNow record.
+        snow_cust_data = copy.deepcopy(self.snow_cust_data[:20])
+        monit_orgs_data = copy.deepcopy(self.monit_orgs_data[:20])
+        details = monit_orgs_data[0]['details']
+        details.update(
+            ReconciliationManager(self.logger, (), ())._map_snow_cust_record(
+                snow_cust_data[0]
+            )
+        )
+        return snow_cust_data, monit_orgs_data
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_prepare_delta_reconciliation_tasks_first_run(self):
+        self.logger.info("Executing test for prepare_delta_reconciliation_tasks...")
+        # Setting up
+        snow_cust_data, monit_orgs_data = self.get_in_sync_data()
+
+        # Expectations setup
+        expected_prepared_tasks = self.prepare_reconciliation_tasks(
+            snow_cust_data, monit_orgs_data
+        )
+
+        # Calling the method to test
+        actual_prepared_tasks, actual_delta_stats = self.prepare_delta_reconciliation_tasks(
+            snow_cust_data, monit_orgs_data
+        )
+
+        # Assertions
+        assert actual_prepared_tasks == expected_prepared_tasks
+        compared_count = len(
+            [
+                monit_org_record
+                for monit_org_record in monit_orgs_data
+                if monit_org_record['details'].get('crm_id')
+            ]
+        ) - len(actual_prepared_tasks['delete'])
+        assert actual_delta_stats == {
+            'unchanged_matches': 0,
+            'compared_matches': compared_count,
+            'saved_changes': 1,
+        }
+        assert self.load_in_sync_state() == {
+            monit_orgs_data[0]['uri']: get_in_sync_state(
+                snow_cust_data[0]['sys_id'],
+                monit_orgs_data[0]['details']['date_edit'],
+                snow_cust_data[0]['sys_updated_on'],
+            )
+        }
+
+    def test_prepare_delta_reconciliation_tasks_full_inputs(self):
+        self.logger.info(
+            "Executing test for prepare_delta_reconciliation_tasks on the full inputs..."
+        )
+        # Expectations setup
+        expected_prepared_tasks = self.prepare_reconciliation_tasks(
+            self.snow_cust_data, self.monit_orgs_data
+        )
+
+        # Calling the method to test
+        first_prepared_tasks, _ = self.prepare_delta_reconciliation_tasks(
+            self.snow_cust_data, self.monit_orgs_data
+        )
+        second_prepared_tasks, _ = self.prepare_delta_reconciliation_tasks(
+            self.snow_cust_data, self.monit_orgs_data
+        )
+
+        # Assertions
+        assert first_prepared_tasks == expected_prepared_tasks
+        assert second_prepared_tasks == expected_prepared_tasks
+
+    def test_prepare_delta_reconciliation_tasks_unchanged_inputs(self):
+        self.logger.info(
+            "Executing test for prepare_delta_reconciliation_tasks with unchanged inputs..."  # NOQA
+        )
+        # Setting up
+        snow_cust_data, monit_orgs_data = self.get_in_sync_data()
+        _, first_delta_stats = self.prepare_delta_reconciliation_tasks(
+            snow_cust_data, monit_orgs_data
+        )
+
+        # Expectations setup
+        expected_prepared_tasks = self.prepare_reconciliation_tasks(
+            snow_cust_data, monit_orgs_data
+        )
+
+        # Calling the method to test
+        with patch.object(
+            ReconciliationManager,
+            '_map_snow_cust_record',
+            side_effect=ReconciliationManager._map_snow_cust_record,
+            autospec=True,
+        ) as map_snow_cust_record:
+            actual_prepared_tasks, actual_delta_stats = (
+                self.prepare_delta_reconciliation_tasks(snow_cust_data, monit_orgs_data)
+            )
+
+        # Assertions
+        assert actual_prepared_tasks == expected_prepared_tasks
+        assert actual_delta_stats == {
+            'unchanged_matches': 1,
+            'compared_matches': first_delta_stats['compared_matches'] - 1,
+            'saved_changes': 0,
+        }
+        # The ServiceNow customer of the org in sync is not mapped again.
+        assert snow_cust_data[0]['sys_id'] not in [
+            call.args[1]['sys_id'] for call in map_snow_cust_record.call_args_list
+        ]
+        assert len(map_snow_cust_record.call_args_list) == len(snow_cust_data) - 1
+
+    def test_prepare_delta_reconciliation_tasks_changed_inputs(self):
+        self.logger.info(
+            "Executing test for prepare_delta_reconciliation_tasks with changed inputs..."
+        )
+        # Setting up
+        snow_cust_data, monit_orgs_data = self.get_in_sync_data()
+        self.prepare_delta_reconciliation_tasks(snow_cust_data, monit_orgs_data)
+
+        # A renamed customer and a removed org.
+        snow_cust_data[0]['name'] = 'Renamed Lighting'
+        snow_cust_data[0]['sys_updated_on'] = '2021-09-05 00:00:00'
+        monit_orgs_data.pop(14)
+
+        # Expectations setup
+        expected_prepared_tasks = self.prepare_reconciliation_tasks(
+            snow_cust_data, monit_orgs_data
+        )
+
+        # Calling the method to test
+        actual_prepared_tasks, actual_delta_stats = self.prepare_delta_reconciliation_tasks(
+            snow_cust_data, monit_orgs_data
+        )
+
+        # Assertions
+        assert actual_prepared_tasks == expected_prepared_tasks
+        assert {
+            'company': 'Renamed Lighting',
+            'uri': monit_orgs_data[0]['uri'],
+        } in actual_prepared_tasks['update']
+        assert actual_delta_stats['unchanged_matches'] == 0
+        # The renamed customer's org is no longer in sync.
+        assert actual_delta_stats['saved_changes'] == 1
+        assert self.load_in_sync_state() == {}
+
+    def test_snapshot_store_config_key(self):
+        self.logger.info("Executing test for the config key of SnapshotStore...")
+        # Setting up
+        state = get_in_sync_state('CRM-1', '2021-09-01 00:00:00', '2021-09-02 00:00:00')
+        with SnapshotStore(self.snapshot_fpath) as snapshot_store:
+            snapshot_store.save_changes('first', {'/api/organization/1': state}, [])
+
+            # Calling the method to test
+            first_state = snapshot_store.load_in_sync_state('first')
+            other_state = snapshot_store.load_in_sync_state('second')
+            snapshot_store.save_changes('second', {'/api/organization/2': state}, [])
+            second_state = snapshot_store.load_in_sync_state('second')
+
+        # Assertions
+        assert first_state == {'/api/organization/1': state}
+        assert other_state == {}
+        # The state of another config key is replaced.
+        assert second_state == {'/api/organization/2': state}
@@ -0,0 +1,176 @@
+"""
+Test class for testing the memory-mapped ServiceNow customer index.
+"""
+
+import copy
+import json
+import os
+import shutil
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ReconciliationManager import ReconciliationManager
+from snow_cust_index import (
+    PreparedSnowCustIndex,
+    SnowCustIndex,
+    build_snow_cust_index,
+)
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestSnowCustIndex(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestSnowCustIndex, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def setUp(self):
+        # The source is copied, as some tests modify it.
+        self.source_fpath = os.path.join(OUTPUT_DATAPATH, 'index-snow-customers.json')
+        shutil.copyfile(
+            os.path.join(TEST_DATAPATH, 'snow-customers.json'), self.source_fpath
+        )
+        self.index_fpath = os.path.join(OUTPUT_DATAPATH, 'snow-customers.idx')
+        if os.path.exists(self.index_fpath):
+            os.remove(self.index_fpath)
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_get(self):
+        self.logger.info("Executing test for SnowCustIndex.get...")
+        # Setting up
+        snow_cust_data = self.read_json(self.source_fpath)
+        base = ReconciliationManager(self.logger, snow_cust_data, [])
+        expected_records = base._get_mapped_snow_cust_to_monit_org()
+
+        # Calling the method to test
+        count = build_snow_cust_index(self.source_fpath, self.index_fpath)
+        with SnowCustIndex(self.index_fpath) as index:
+            # Assertions
+            assert count == len(index) == len(expected_records)
+            for sys_id, expected_record in expected_records.items():
+                assert index.get(sys_id) == expected_record
+                assert sys_id in index
+            assert index.get('0' * 32) is None
+            assert index.get('unknown') is None
+            assert [index.get_sys_id(slot) for slot in index.iter_slots()] == list(
+                expected_records
+            )
+
+    def test_prepare_indexed_reconciliation_tasks(self):
+        self.logger.info("Executing test for prepare_indexed_reconciliation_tasks...")
+        # Setting up
+        monit_orgs_fpath = os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')
+        base = ReconciliationManager(
+            self.logger,
+            self.read_json(self.source_fpath),
+            self.read_json(monit_orgs_fpath),
+        )
+        expected_prepared_tasks = base.prepare_reconciliation_tasks()
+        indexed_base = ReconciliationManager(
+            self.logger, None, self.read_json(monit_orgs_fpath)
+        )
+
+        # Calling the method to test
+        with SnowCustIndex.open_or_build(self.source_fpath, self.index_fpath) as index:
+            actual_prepared_tasks = indexed_base.prepare_indexed_reconciliation_tasks(
+                index
+            )
+
+        # Assertions
+        assert actual_prepared_tasks == expected_prepared_tasks
+        assert indexed_base.fingerprint_stats == base.fingerprint_stats
+
+    def test_open_or_build_rebuild_check(self):
+        self.logger.info("Executing test for SnowCustIndex.open_or_build...")
+        # Setting up
+        SnowCustIndex.open_or_build(self.source_fpath, self.index_fpath).close()
+        index_mtime_ns = os.stat(self.index_fpath).st_mtime_ns
+
+        # Calling the method to test and assertions
+        # Touched, but same content: not rebuilt.
+        os.utime(self.source_fpath, ns=(0, 0))
+        with SnowCustIndex.open_or_build(self.source_fpath, self.index_fpath) as index:
+            assert not index.is_stale(self.source_fpath)
+        assert os.stat(self.index_fpath).st_mtime_ns == index_mtime_ns
+
+        # Changed content: rebuilt.
+        snow_cust_data = self.read_json(self.source_fpath)
+        snow_cust_data[0]['name'] = 'Renamed Company'
+        with open(self.source_fpath, 'w') as f:
+            f.write(json.dumps(snow_cust_data))
+        with SnowCustIndex.open_or_build(self.source_fpath, self.index_fpath) as index:
+            assert index.get(snow_cust_data[0]['sys_id'])['company'] == 'Renamed Company'
+
+    def test_open_or_build_invalid_index(self):
+        self.logger.info("Executing test for SnowCustIndex.open_or_build invalid index...")
+        # Setting up
+        with open(self.index_fpath, 'wb') as f:
+            f.write(b'not an index')
+
+        # Calling the method to test
+        with SnowCustIndex.open_or_build(self.source_fpath, self.index_fpath) as index:
+            # Assertions
+            assert len(index) == len(self.read_json(self.source_fpath))
+
+    def test_build_invalid_sys_id(self):
+        self.logger.info("Executing test for build_snow_cust_index invalid sys_id...")
+        # Setting up
+        snow_cust_data = self.read_json(self.source_fpath)
+        snow_cust_data[0]['sys_id'] = 'short'
+        with open(self.source_fpath, 'w') as f:
+            f.write(json.dumps(snow_cust_data))
+
+        # Calling the method to test and assertions
+        with pytest.raises(ValueError):
+            build_snow_cust_index(self.source_fpath, self.index_fpath)
+        assert not os.path.exists(self.index_fpath)
+
+    def test_prepared_index_shared_runs(self):
+        self.logger.info("Executing test for PreparedSnowCustIndex shared runs...")
+        # Setting up, monitoring exports of several regions and a duplicated sys_id.
+        snow_cust_data = self.read_json(self.source_fpath)
+        snow_cust_data.append(dict(snow_cust_data[0], name='Renamed'))
+        monit_orgs_data = self.read_json(
+            os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')
+        )
+        monit_orgs_exports = [
+            monit_orgs_data,
+            monit_orgs_data[::2],
+            copy.deepcopy(monit_orgs_data[1::3]),
+            [],
+        ]
+        expected_prepared_tasks = [
+            ReconciliationManager(
+                self.logger, snow_cust_data, monit_orgs
+            ).prepare_reconciliation_tasks()
+            for monit_orgs in monit_orgs_exports
+        ]
+        index = PreparedSnowCustIndex(snow_cust_data)
+
+        def reconcile(monit_orgs):
+            base = ReconciliationManager(self.logger, None, monit_orgs)
+            return base.prepare_indexed_reconciliation_tasks(index)
+
+        # Calling the method to test
+        sequential_prepared_tasks = [
+            reconcile(monit_orgs) for monit_orgs in monit_orgs_exports
+        ]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            concurrent_prepared_tasks = list(executor.map(reconcile, monit_orgs_exports))
+
+        # Assertions
+        assert sequential_prepared_tasks == expected_prepared_tasks
+        assert concurrent_prepared_tasks == expected_prepared_tasks
+        assert len(index) == len({record['sys_id'] for record in snow_cust_data})
+        assert index.get(snow_cust_data[0]['sys_id'])['company'] == 'Renamed'
+        assert index.get(['unhashable']) is None
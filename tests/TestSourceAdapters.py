@@ -0,0 +1,153 @@
+"""
+Test class for testing the ServiceNow and Monitoring API source adapters.
+"""
+
+import os
+
+import pytest
+
+from ReconciliationManager import ReconciliationManager
+from source_adapters import MonitoringOrgSource, SnowCustomerSource, SourceError
+from .TestFixtureServer import FixtureServer, read_test_data
+from .TestLogger import Logger
+from .TestBase import TestBase
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestSourceAdapters(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestSourceAdapters, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def setUp(self):
+        self.snow_cust_data = read_test_data('snow-customers.json')
+        self.monit_orgs_data = read_test_data('monitoring-orgs.json')
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_snow_customer_source(self):
+        self.logger.info("Executing test for SnowCustomerSource...")
+        with FixtureServer(self.snow_cust_data, self.monit_orgs_data) as server:
+            # Setting up
+            source = SnowCustomerSource(server.url, page_size=50, concurrency=3)
+
+            # Calling the method to test
+            actual_records = list(source.stream())
+
+        # Assertions
+        assert [record['sys_id'] for record in actual_records] == [
+            record['sys_id'] for record in self.snow_cust_data
+        ]
+        assert set(actual_records[0]) <= set(source.fields)
+        assert len(server.requests) == 10
+
+    def test_monitoring_org_source(self):
+        self.logger.info("Executing test for MonitoringOrgSource...")
+        with FixtureServer(self.snow_cust_data, self.monit_orgs_data) as server:
+            # Setting up
+            source = MonitoringOrgSource(server.url, page_size=20, concurrency=3)
+
+            # Calling the method to test
+            actual_records = list(source.stream())
+
+        # Assertions
+        assert [record['uri'] for record in actual_records] == [
+            record['uri'] for record in self.monit_orgs_data
+        ]
+        assert 'custom_fields' not in actual_records[0]['details']
+        assert actual_records[0]['details']['crm_id'] == (
+            self.monit_orgs_data[0]['details']['crm_id']
+        )
+
+    def test_capped_page_size(self):
+        self.logger.info("Executing test for sources with capped page sizes...")
+        with FixtureServer(
+            self.snow_cust_data, self.monit_orgs_data, max_page_size=30
+        ) as server:
+            # Calling the method to test
+            actual_records = list(
+                SnowCustomerSource(server.url, page_size=100, concurrency=2).stream()
+            )
+
+        # Assertions
+        assert len(actual_records) == len(self.snow_cust_data)
+
+    def test_empty_first_page(self):
+        self.logger.info("Executing test for sources with an empty first page...")
+        with FixtureServer(
+            self.snow_cust_data, self.monit_orgs_data, max_page_size=0
+        ) as server:
+            # Calling the method to test
+            actual_records = list(
+                SnowCustomerSource(server.url, page_size=50, concurrency=2).stream()
+            )
+
+        # Assertions
+        # The pages up to the total count are requested once, then the stream ends.
+        assert actual_records == []
+        assert len(server.requests) == -(-len(self.snow_cust_data) // 50)
+
+    def test_concurrent_requests(self):
+        self.logger.info("Executing test for concurrent page requests...")
+        with FixtureServer(
+            self.snow_cust_data, self.monit_orgs_data, latency=0.02
+        ) as server:
+            # Calling the method to test
+            list(SnowCustomerSource(server.url, page_size=25, concurrency=4).stream())
+
+        # Assertions
+        assert server.max_in_flight > 1
+
+    def test_source_error(self):
+        self.logger.info("Executing test for source errors...")
+        with FixtureServer(self.snow_cust_data, self.monit_orgs_data) as server:
+            # Setting up
+            source = SnowCustomerSource(server.url, table_path='/api/now/table/unknown')
+
+            # Calling the method to test and assertions
+            with pytest.raises(SourceError):
+                list(source.stream())
+
+    def test_from_api(self):
+        self.logger.info("Executing test for ReconciliationManager.from_api...")
+        # Setting up
+        base = ReconciliationManager(
+            self.logger, self.snow_cust_data, self.monit_orgs_data
+        )
+        expected_prepared_tasks = base.prepare_reconciliation_tasks()
+
+        with FixtureServer(self.snow_cust_data, self.monit_orgs_data) as server:
+            api_base = ReconciliationManager.from_api(
+                self.logger,
+                server.url,
+                server.url,
+                snow_cust_options={'page_size': 40, 'concurrency': 4},
+                monit_orgs_options={'page_size': 10, 'concurrency': 2},
+            )
+
+            # Calling the method to test
+            actual_prepared_tasks = api_base.prepare_reconciliation_tasks()
+
+        # Assertions
+        assert actual_prepared_tasks == expected_prepared_tasks
+
+    def test_stream_close(self):
+        self.logger.info("Executing test for closing a record stream early...")
+        with FixtureServer(self.snow_cust_data, self.monit_orgs_data) as server:
+            # Setting up
+            stream = SnowCustomerSource(server.url, page_size=10, concurrency=2).stream()
+            records = iter(stream)
+
+            # Calling the method to test
+            next(records)
+            records.close()
+
+            # Assertions
+            assert not stream.thread.is_alive()
+            assert len(server.requests) < 46
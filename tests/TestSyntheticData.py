@@ -0,0 +1,45 @@
+"""
+Test class for testing the synthetic exports generator of the benchmarks.
+"""
+
+import os
+
+from benchmarks.synthetic_data import write_synthetic_exports
+from ReconciliationManager import ReconciliationManager
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+logger = Logger('testing_logger')
+
+
+class TestSyntheticData(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestSyntheticData, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_write_synthetic_exports(self):
+        self.logger.info("Executing test for write_synthetic_exports...")
+        # Setting up
+        directory = os.path.join(OUTPUT_DATAPATH, 'synthetic')
+        ratios = {'create': 0.1, 'update': 0.2, 'delete': 0.05, 'no_crm_id': 0.1}
+
+        # Calling the method to test
+        result = write_synthetic_exports(directory, 200, ratios, seed=1)
+
+        # Assertions
+        assert result['expected_task_counts'] == {'create': 20, 'update': 40, 'delete': 10}
+        base = ReconciliationManager.from_json_files(
+            self.logger, result['snow_cust_fpath'], result['monit_orgs_fpath']
+        )
+        actual_prepared_tasks = base.prepare_reconciliation_tasks()
+        assert base.task_counts == result['expected_task_counts']
+        assert all(
+            set(update_task) == {'company', 'uri'}
+            for update_task in actual_prepared_tasks['update']
+        )
+        assert len(self.read_json(result['monit_orgs_fpath'])) == 180 + 10 + 20
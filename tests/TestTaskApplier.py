@@ -0,0 +1,343 @@
+"""
+Test class for testing TaskApplier against a local stub of the monitoring API.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from async_http import ConnectionPool
+from task_applier import (
+    RateLimiter,
+    TaskApplier,
+    get_endpoint,
+    get_percentiles,
+    get_task_id,
+)
+from ReconciliationManager import ReconciliationManager
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class StubMonitoringAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def handle_task(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        with server.lock:
+            server.requests.append((self.command, self.path, body))
+            failures = server.failures.get(self.path, 0)
+            if failures:
+                server.failures[self.path] = failures - 1
+        time.sleep(server.delay)
+        status = (
+            server.failure_status
+            if failures
+            else {'POST': 201, 'PUT': 200, 'DELETE': 204}[self.command]
+        )
+        response = b'' if status == 204 else b'{}'
+        self.send_response(status)
+        if status in (429, 503):
+            self.send_header('Retry-After', '0')
+        if status != 204:
+            self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    do_POST = do_PUT = do_DELETE = handle_task
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTaskApplier(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestTaskApplier, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubMonitoringAPIHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.failures = {}
+        self.server.failure_status = 503
+        self.server.delay = 0
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={'poll_interval': 0.05}
+        )
+        self.server_thread.start()
+        self.base_url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+
+    def get_prepared_tasks(self):
+        base = ReconciliationManager(
+            self.logger,
+            self.read_json(os.path.join(TEST_DATAPATH, 'snow-customers.json')),
+            self.read_json(os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')),
+        )
+        return base, base.prepare_reconciliation_tasks()
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_apply_reconciliation_tasks(self):
+        self.logger.info("Executing test for apply_reconciliation_tasks...")
+        # Setting up
+        base, prepared_tasks = self.get_prepared_tasks()
+        task_count = sum(base.task_counts.values())
+
+        # Calling the method to test
+        report = base.apply_reconciliation_tasks(self.base_url, concurrency=4)
+
+        # Assertions
+        assert report['applied'] == task_count
+        assert report['failed'] == 0
+        assert report['connections'] <= 4
+        assert report['latency_seconds']['p50'] <= report['latency_seconds']['max']
+        requests = self.server.requests
+        assert sorted(
+            (method, path) for method, path, _ in requests if method != 'POST'
+        ) == sorted(
+            [('PUT', task['uri']) for task in prepared_tasks['update']]
+            + [('DELETE', uri) for uri in prepared_tasks['delete']]
+        )
+        assert sorted(
+            body['crm_id'] for method, _, body in requests if method == 'POST'
+        ) == sorted(task['crm_id'] for task in prepared_tasks['create'])
+        assert all('uri' not in body for method, _, body in requests if method == 'PUT')
+        assert base.metrics.get_phase('apply_update')['calls'] == len(
+            prepared_tasks['update']
+        )
+
+    def test_run_reconciliation_pipeline_applier(self):
+        self.logger.info("Executing test for run_reconciliation_pipeline to the API...")
+        # Setting up
+        base, prepared_tasks = self.get_prepared_tasks()
+        pipeline_base = ReconciliationManager(
+            self.logger,
+            self.read_json(os.path.join(TEST_DATAPATH, 'snow-customers.json')),
+            self.read_json(os.path.join(TEST_DATAPATH, 'monitoring-orgs.json')),
+        )
+
+        # Calling the method to test
+        result = pipeline_base.run_reconciliation_pipeline(
+            TaskApplier(self.base_url, self.logger, concurrency=4), queue_size=10
+        )
+
+        # Assertions
+        assert result['sink']['applied'] == sum(base.task_counts.values())
+        assert len(self.server.requests) == sum(base.task_counts.values())
+
+    def test_apply_retries(self):
+        self.logger.info("Executing test for TaskApplier retries...")
+        # Setting up
+        tasks = {'delete': ['/api/organization/1', '/api/organization/2']}
+        self.server.failures = {'/api/organization/1': 2}
+        applier = TaskApplier(self.base_url, self.logger, backoff=0)
+
+        # Calling the method to test
+        report = applier.apply(tasks)
+
+        # Assertions
+        assert report['applied'] == 2
+        assert report['retries'] == 2
+        assert len(self.server.requests) == 4
+
+    def test_apply_failure(self):
+        self.logger.info("Executing test for TaskApplier failures...")
+        # Setting up
+        tasks = {'delete': ['/api/organization/1']}
+        self.server.failures = {'/api/organization/1': 5}
+        applier = TaskApplier(self.base_url, self.logger, max_retries=1, backoff=0)
+
+        # Calling the method to test
+        report = applier.apply(tasks)
+
+        # Assertions
+        assert report['applied'] == 0
+        assert report['failures'] == [
+            {'id': 'delete:/api/organization/1', 'status': 503, 'error': None}
+        ]
+
+    def test_apply_create_retries(self):
+        self.logger.info("Executing test for TaskApplier retries of creates...")
+        # Setting up
+        tasks = {'create': [{'crm_id': 'CRM-1', 'name': 'Org 1'}]}
+        applier = TaskApplier(self.base_url, self.logger, backoff=0)
+
+        # Calling the method to test
+        self.server.failures = {'/api/organization/': 2}
+        unavailable_report = applier.apply(tasks)
+        self.server.failures = {'/api/organization/': 1}
+        self.server.failure_status = 500
+        error_report = applier.apply(tasks)
+
+        # Assertions
+        assert unavailable_report['applied'] == 1
+        assert unavailable_report['retries'] == 2
+        # The server may have created the organization before failing.
+        assert error_report['applied'] == 0
+        assert error_report['retries'] == 0
+        assert error_report['failures'][0]['status'] == 500
+        assert len(self.server.requests) == 4
+
+    def test_apply_create_connection_refused(self):
+        self.logger.info("Executing test for TaskApplier retries of unsent creates...")
+        # Setting up
+        with socket.socket() as free_socket:
+            free_socket.bind(('127.0.0.1', 0))
+            port = free_socket.getsockname()[1]
+        tasks = {'create': [{'crm_id': 'CRM-1', 'name': 'Org 1'}]}
+        applier = TaskApplier(
+            f'http://127.0.0.1:{port}', self.logger, max_retries=2, backoff=0
+        )
+
+        # Calling the method to test
+        report = applier.apply(tasks)
+
+        # Assertions
+        assert report['retries'] == 2
+        assert report['failures'][0]['error'].startswith('RequestNotSentError')
+
+    def test_pool_cancelled_request(self):
+        self.logger.info("Executing test for a cancelled request of ConnectionPool...")
+
+        # Setting up
+        async def cancel_request():
+            pool = ConnectionPool(self.base_url)
+            await pool.request('DELETE', '/api/organization/1')
+            connection = pool.idle[-1]
+            self.server.delay = 0.5
+            # The stub cannot send the response of the cancelled request.
+            self.server.handle_error = lambda request, client_address: None
+            request = asyncio.create_task(pool.request('DELETE', '/api/organization/2'))
+            await asyncio.sleep(0.1)
+            request.cancel()
+            try:
+                await request
+            except asyncio.CancelledError:
+                pass
+            return pool, connection
+
+        # Calling the method to test
+        pool, connection = asyncio.run(cancel_request())
+
+        # Assertions
+        # The connection still has a response to read: it is not reused.
+        assert pool.idle == []
+        assert connection.writer is None
+
+    def test_apply_resume_from_journal(self):
+        self.logger.info("Executing test for TaskApplier journal resume...")
+        # Setting up
+        journal_fpath = os.path.join(OUTPUT_DATAPATH, 'apply-journal.jsonl')
+        if os.path.exists(journal_fpath):
+            os.remove(journal_fpath)
+        tasks = {'delete': ['/api/organization/1', '/api/organization/2']}
+        self.server.failures = {'/api/organization/2': 10}
+        TaskApplier(
+            self.base_url, self.logger, max_retries=0, journal_fpath=journal_fpath
+        ).apply(tasks)
+        self.server.failures = {}
+        self.server.requests = []
+
+        # Calling the method to test
+        report = TaskApplier(
+            self.base_url, self.logger, journal_fpath=journal_fpath
+        ).apply(tasks)
+
+        # Assertions
+        assert report['skipped'] == 1
+        assert report['applied'] == 1
+        assert self.server.requests == [('DELETE', '/api/organization/2', None)]
+
+    def test_apply_resume_unknown_outcome(self):
+        self.logger.info("Executing test for TaskApplier resume of unknown outcomes...")
+        # Setting up, a create failing after it was sent.
+        journal_fpath = os.path.join(OUTPUT_DATAPATH, 'apply-journal.jsonl')
+        if os.path.exists(journal_fpath):
+            os.remove(journal_fpath)
+        tasks = {'create': [{'crm_id': 'CRM-1', 'name': 'Org 1'}]}
+        task_id = get_task_id('create', tasks['create'][0])
+        self.server.failures = {'/api/organization/': 1}
+        self.server.failure_status = 500
+        failed_report = TaskApplier(
+            self.base_url, self.logger, backoff=0, journal_fpath=journal_fpath
+        ).apply(tasks)
+        self.server.requests = []
+
+        # Calling the method to test
+        resumed_report = TaskApplier(
+            self.base_url, self.logger, journal_fpath=journal_fpath
+        ).apply(tasks)
+        resumed_requests = list(self.server.requests)
+        retried_report = TaskApplier(
+            self.base_url, self.logger, journal_fpath=journal_fpath, retry_unknown=True
+        ).apply(tasks)
+
+        # Assertions
+        assert failed_report['unknown_outcome'] == [task_id]
+        # The organization may exist: it is reported instead of being created again.
+        assert resumed_report['unknown_outcome'] == [task_id]
+        assert resumed_report['applied'] == resumed_report['skipped'] == 0
+        assert resumed_requests == []
+        assert retried_report['applied'] == 1
+        assert retried_report['unknown_outcome'] == []
+
+    def test_rate_limit(self):
+        self.logger.info("Executing test for TaskApplier rate limits...")
+        # Setting up
+        tasks = {'delete': [f'/api/organization/{i}' for i in range(1, 7)]}
+        applier = TaskApplier(
+            self.base_url, self.logger, rate_limits={'/api/organization': 20}
+        )
+
+        # Calling the method to test
+        report = applier.apply(tasks)
+
+        # Assertions
+        assert report['applied'] == 6
+        # A burst of 20 requests is allowed, so no wait should happen here.
+        assert report['seconds'] < 1
+        assert RateLimiter(5).capacity == 5
+
+    def test_get_endpoint(self):
+        self.logger.info("Executing test for get_endpoint...")
+        assert get_endpoint('/api/organization/12') == '/api/organization'
+        assert get_endpoint('/api/organization/') == '/api/organization'
+
+    def test_get_task_id(self):
+        self.logger.info("Executing test for get_task_id...")
+        # Setting up
+        task = {'uri': '/api/organization/1', 'name': 'Org 1'}
+
+        # Calling the method to test and assertions
+        assert get_task_id('update', task) == get_task_id('update', dict(task))
+        assert get_task_id('update', task) != get_task_id(
+            'update', dict(task, name='Org 2')
+        )
+        assert get_task_id('update', task).startswith('update:/api/organization/1:')
+        assert get_task_id('delete', '/api/organization/1') == 'delete:/api/organization/1'
+
+    def test_get_percentiles(self):
+        self.logger.info("Executing test for get_percentiles...")
+        assert get_percentiles(list(range(1, 101)), (50, 99)) == {'p50': 50, 'p99': 99}
+        assert get_percentiles([], (50,)) == {'p50': None}
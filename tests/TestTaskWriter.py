@@ -0,0 +1,153 @@
+"""
+Test class for testing the streaming TaskWriter.
+"""
+
+import json
+import os
+
+import pytest
+
+from ReconciliationManager import ReconciliationManager
+from task_writer import TaskWriter
+from .TestLogger import Logger
+from .TestBase import TestBase, OUTPUT_DATAPATH
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestTaskWriter(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestTaskWriter, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    @staticmethod
+    def get_dummy_tasks():
+        return {
+            'create': [
+                {'crm_id': 'e806eb2f66ad41babd790d7d254fab64', 'company': 'Fortune'},
+                {'crm_id': '03b82e935c1f4dd9a9be0a2c21cb97d4', 'company': 'Pearl'},
+            ],
+            'update': [],
+            'delete': ['/api/organization/143', '/api/organization/55'],
+        }
+
+    def get_reconciliation_manager(self, snow_cust_fname, monit_orgs_fname, **kwargs):
+        snow_cust_fpath = os.path.join(TEST_DATAPATH, snow_cust_fname)
+        monit_orgs_fpath = os.path.join(TEST_DATAPATH, monit_orgs_fname)
+
+        return ReconciliationManager(
+            self.logger,
+            self.read_json(snow_cust_fpath),
+            self.read_json(monit_orgs_fpath),
+            **kwargs,
+        )
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_write_task_json_format(self):
+        self.logger.info("Executing test for TaskWriter JSON format...")
+        # Setting up
+        dummy_tasks = self.get_dummy_tasks()
+        fpath = os.path.join(OUTPUT_DATAPATH, 'task_writer_json.json')
+
+        for indent, separators in [(4, (',', ': ')), (None, (',', ':'))]:
+            # Expectations setup
+            expected_content = json.dumps(dummy_tasks, indent=indent, separators=separators)
+
+            # Calling the method to test, tasks are interleaved across actions.
+            with TaskWriter(fpath, indent=indent) as task_writer:
+                task_writer.write_task('delete', dummy_tasks['delete'][0])
+                task_writer.write_task('create', dummy_tasks['create'][0])
+                task_writer.write_task('delete', dummy_tasks['delete'][1])
+                task_writer.write_task('create', dummy_tasks['create'][1])
+
+            # Assertions
+            assert self.read_file(fpath) == expected_content
+            assert task_writer.counts == {'create': 2, 'update': 0, 'delete': 2}
+
+    def test_write_task_jsonl_format(self):
+        self.logger.info("Executing test for TaskWriter JSON Lines format...")
+        # Setting up
+        fpath = os.path.join(OUTPUT_DATAPATH, 'task_writer_jsonl.jsonl')
+
+        # Calling the method to test
+        with TaskWriter(fpath, fmt='jsonl') as task_writer:
+            task_writer.write_task('delete', '/api/organization/143')
+            task_writer.write_task('create', {'crm_id': 'e806eb2f'})
+
+        # Assertions
+        assert [json.loads(line) for line in self.read_file(fpath).splitlines()] == [
+            {'action': 'delete', 'task': '/api/organization/143'},
+            {'action': 'create', 'task': {'crm_id': 'e806eb2f'}},
+        ]
+
+    def test_write_task_atomic(self):
+        self.logger.info("Executing test for TaskWriter atomic output...")
+        # Setting up
+        fpath = os.path.join(OUTPUT_DATAPATH, 'task_writer_atomic.json')
+        with TaskWriter(fpath) as task_writer:
+            task_writer.write_tasks(self.get_dummy_tasks())
+        expected_content = self.read_file(fpath)
+
+        # Calling the method to test, the output is only replaced on completion.
+        with pytest.raises(RuntimeError):
+            with TaskWriter(fpath) as task_writer:
+                task_writer.write_task('delete', '/api/organization/1')
+                assert self.read_file(fpath) == expected_content
+                raise RuntimeError("Interrupted")
+
+        # Assertions
+        assert self.read_file(fpath) == expected_content
+        assert not os.path.exists(task_writer.tmp_fpath)
+
+    def test_write_task_unsupported_format(self):
+        self.logger.info("Executing test for TaskWriter with unsupported format...")
+        with pytest.raises(ValueError):
+            TaskWriter(os.path.join(OUTPUT_DATAPATH, 'task_writer.csv'), fmt='csv')
+
+    def test_prepare_reconciliation_tasks_streamed_output(self):
+        self.logger.info(
+            "Executing test for prepare_reconciliation_tasks with streamed output..."
+        )
+        # Setting up
+        base = self.get_reconciliation_manager('snow-customers.json', 'monitoring-orgs.json')
+        fpath = os.path.join(OUTPUT_DATAPATH, 'output_JSON_streamed.json')
+
+        # Expectations setup
+        expected_content = self.pretty_json(base.prepare_reconciliation_tasks())
+
+        # Calling the method to test
+        with TaskWriter(fpath) as task_writer:
+            streamed_base = self.get_reconciliation_manager(
+                'snow-customers.json', 'monitoring-orgs.json', task_writer=task_writer
+            )
+            actual_prepared_tasks = streamed_base.prepare_reconciliation_tasks()
+
+        # Assertions
+        assert self.read_file(fpath) == expected_content
+        assert actual_prepared_tasks == {'create': [], 'update': [], 'delete': []}
+        assert streamed_base.task_counts == base.task_counts
+
+    def test_write_json_output(self):
+        self.logger.info("Executing test for write_json_output...")
+        # Setting up
+        base = self.get_reconciliation_manager(
+            'snow-customers-reduced.json', 'monitoring-orgs-reduced.json'
+        )
+        name = os.path.join(OUTPUT_DATAPATH, 'output_JSON_write_json_output')
+        prepared_tasks = base.prepare_reconciliation_tasks()
+
+        # Calling the method to test
+        base.write_json_output(name, prepared_tasks)
+        base.write_json_output(name, prepared_tasks, fmt='jsonl')
+
+        # Assertions
+        assert self.read_file(name + '.json') == self.pretty_json(prepared_tasks)
+        assert len(self.read_file(name + '.jsonl').splitlines()) == sum(
+            base.task_counts.values()
+        )
@@ -0,0 +1,143 @@
+"""
+Test class for testing the bounded value interner.
+"""
+
+import os
+
+from ReconciliationManager import ReconciliationManager
+from value_interner import ValueInterner
+from .TestLogger import Logger
+from .TestBase import TestBase
+
+
+CWD = os.path.abspath(os.path.dirname(__file__))
+TEST_DATAPATH = os.path.join(CWD, 'test_data')
+logger = Logger('testing_logger')
+
+
+class TestValueInterner(TestBase):
+    def __init__(self, *args, **kwargs):
+        super(TestValueInterner, self).__init__(*args, **kwargs)
+        self.logger = logger
+
+    ###################################
+    #           TEST PROPER           #
+    ###################################
+
+    def test_intern(self):
+        self.logger.info("Executing test for ValueInterner.intern...")
+        # Setting up
+        interner = ValueInterner(max_size=2)
+        first = ''.join(['Austr', 'alia'])
+        second = ''.join(['Austr', 'alia'])
+
+        # Calling the method to test
+        interned = [interner.intern(value) for value in (first, second, 'NSW', 'VIC')]
+        unhashable = interner.intern(['AU'])
+
+        # Assertions
+        assert first is not second
+        assert interned[0] is first and interned[1] is first
+        assert interned[3] == 'VIC'
+        assert unhashable == ['AU']
+        assert interner.stats() == {
+            'distinct': 2,
+            'max_size': 2,
+            'lookups': 5,
+            'hits': 1,
+            'overflows': 2,
+        }
+
+    def test_intern_values(self):
+        self.logger.info("Executing test for ValueInterner.intern_values...")
+        # Setting up
+        interner = ValueInterner(max_size=6)
+        values = [
+            ('1', 'Pearl', '', 'Sydney', 'NSW', '2000', 'Australia', '', ''),
+            ('2', 'Smart', '', ''.join(['Syd', 'ney']), 'NSW', '2001', 'AU', '', ''),
+            ('3', 'Bridge', '', 'Perth', 'WA', ['6000'], 'AU', '', ''),
+        ]
+
+        # Calling the method to test
+        interned = [interner.intern_values(record_values) for record_values in values]
+
+        # Assertions
+        assert interned == values
+        assert interned[1][3] is interned[0][3]
+        assert interner.stats() == {
+            'distinct': 6,
+            'max_size': 6,
+            'lookups': 12,
+            'hits': 3,
+            'overflows': 3,
+        }
+
+    def test_intern_values_fields(self):
+        self.logger.info("Executing test for ValueInterner.intern_values fields...")
+        # Setting up
+        interner = ValueInterner(fields=('city',))
+        values = [
+            ('1', 'Pearl', '', 'Sydney', 'NSW', '2000', 'Australia', '', ''),
+            ('2', 'Smart', '', ''.join(['Syd', 'ney']), 'NSW', '2001', 'AU', '', ''),
+        ]
+
+        # Calling the method to test
+        interned = [interner.intern_values(record_values) for record_values in values]
+
+        # Assertions
+        assert interned == values
+        assert interned[1][3] is interned[0][3]
+        # Only the city is interned.
+        assert interner.stats()['lookups'] == 2
+        assert set(interner.values) == {'Sydney'}
+
+    def test_intern_record(self):
+        self.logger.info("Executing test for ValueInterner.intern_record...")
+        # Setting up
+        interner = ValueInterner()
+        records = [
+            {'uri': '/api/organization/1', 'details': {'city': ''.join(['Syd', 'ney'])}},
+            {'uri': '/api/organization/2', 'details': {'city': ''.join(['Syd', 'ney'])}},
+        ]
+
+        # Calling the method to test
+        for record in records:
+            interner.intern_record(record)
+
+        # Assertions
+        assert records[0]['details']['city'] is records[1]['details']['city']
+        assert interner.stats()['hits'] == 1
+
+    def test_mapping_and_loading_share_values(self):
+        self.logger.info("Executing test for interned values of from_json_files...")
+        # Setting up
+        base = ReconciliationManager.from_json_files(
+            self.logger,
+            os.path.join(TEST_DATAPATH, 'snow-customers.json'),
+            os.path.join(TEST_DATAPATH, 'monitoring-orgs.json'),
+        )
+
+        # Calling the method to test
+        snow_cust_to_monit_org = base._get_mapped_snow_cust_to_monit_org()
+        monit_orgs = list(base.monit_orgs)
+
+        # Assertions
+        countries = {
+            id(record['country'])
+            for record in snow_cust_to_monit_org.values()
+            if record['country'] == 'Australia'
+        }
+        assert len(countries) == 1
+        matched = [
+            (snow_cust_to_monit_org[monit_org['details']['crm_id']], monit_org['details'])
+            for monit_org in monit_orgs
+            if monit_org['details'].get('crm_id') in snow_cust_to_monit_org
+        ]
+        assert matched
+        for snow_cust_record, details in matched:
+            for field in ('city', 'state', 'zip', 'country'):
+                if snow_cust_record[field] == details[field]:
+                    assert snow_cust_record[field] is details[field]
+        stats = base.interner.stats()
+        assert 0 < stats['distinct'] < stats['lookups']
+        assert stats['overflows'] == 0
@@ -0,0 +1,101 @@
+"""
+A bounded value dictionary of the low cardinality field values (country, state, city, ...) that
+repeat across the ServiceNow customers and the monitoring orgs. Equal values are stored as one
+shared object, so that the mapped records take less memory and the comparison of a ServiceNow
+record with its monitoring org mostly compares identical objects (an identity check) instead of
+full strings. Once max_size distinct values are held, new values are returned as they are.
+"""
+
+from field_mappings import MONIT_ORG_FIELDS
+
+DEFAULT_MAX_SIZE = 65536
+# Low cardinality fields (monitoring org field names) interned by the loaders.
+DEFAULT_INTERNED_FIELDS = ('city', 'state', 'zip', 'country')
+
+
+def get_field_indexes(fields):
+    # Indexes of the fields in the values of a mapped record (FIELD_MAPPINGS order).
+    return tuple(
+        index for index, field in enumerate(MONIT_ORG_FIELDS) if field in fields
+    )
+
+
+INTERNED_FIELD_INDEXES = get_field_indexes(DEFAULT_INTERNED_FIELDS)
+
+
+class ValueInterner:
+    def __init__(self, fields=DEFAULT_INTERNED_FIELDS, max_size=DEFAULT_MAX_SIZE):
+        self.fields = frozenset(fields)
+        self.field_indexes = get_field_indexes(self.fields)
+        self.max_size = max_size
+        self.values = {}
+        # Only the lookups and the values that did not fit are counted on the hot path,
+        # hits and distinct counts are derived in stats().
+        self.lookups = 0
+        self.overflows = 0
+
+    def intern(self, value):
+        self.lookups += 1
+        try:
+            return self.values[value]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable values are not interned.
+            self.overflows += 1
+            return value
+        if len(self.values) < self.max_size:
+            self.values[value] = value
+        else:
+            self.overflows += 1
+        return value
+
+    def intern_values(self, values, indexes=None):
+        # Tuple of the values of a mapped record with the ones at the given indexes (of the
+        # interner's fields by default) interned. This runs once per mapped record: while
+        # the interner has room, a plain setdefault() per value, with only the lookups
+        # counted (hits are derived in stats()).
+        if indexes is None:
+            indexes = self.field_indexes
+        interned_values = self.values
+        if len(interned_values) + len(indexes) > self.max_size:
+            return self._intern_values_bounded(values, indexes)
+        self.lookups += len(indexes)
+        setdefault = interned_values.setdefault
+        interned = list(values)
+        try:
+            for index in indexes:
+                value = interned[index]
+                interned[index] = setdefault(value, value)
+        except TypeError:
+            # Unhashable values are not interned.
+            self.lookups -= len(indexes)
+            return self._intern_values_bounded(values, indexes)
+        return tuple(interned)
+
+    def _intern_values_bounded(self, values, indexes):
+        # intern_values once the interner may fill up, or with unhashable values.
+        interned = list(values)
+        for index in indexes:
+            interned[index] = self.intern(interned[index])
+        return tuple(interned)
+
+    def intern_record(self, record):
+        # Intern, in place, the values of the interned fields of a record and of its
+        # nested records (e.g. the details of a monitoring org). Returns the record.
+        for field, value in record.items():
+            if isinstance(value, dict):
+                self.intern_record(value)
+            elif field in self.fields:
+                record[field] = self.intern(value)
+        return record
+
+    def stats(self):
+        distinct = len(self.values)
+        return {
+            'distinct': distinct,
+            'max_size': self.max_size,
+            'lookups': self.lookups,
+            'hits': self.lookups - distinct - self.overflows,
+            'overflows': self.overflows,
+        }